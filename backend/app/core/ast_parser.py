@@ -1,15 +1,19 @@
 """AST-based dependency extraction for Python cells."""
 import ast
-from typing import Set, Tuple
+from types import CodeType
+from typing import FrozenSet, NamedTuple, Optional, Set, Tuple
 
 
 class DependencyExtractor(ast.NodeVisitor):
-    """Extract variable reads and writes from Python code."""
+    """Extract variable reads and writes (and side effects) from Python code."""
 
     def __init__(self):
         self.reads: Set[str] = set()
         self.writes: Set[str] = set()
         self.scope_stack: list[Set[str]] = [set()]  # Track local scopes
+        self.mutates: Set[str] = set()  # Read variables modified in place (x[0] = ..., x.a = ...)
+        self.star_import = False
+        self.global_writes = False  # A function declares `global` (writes when called)
 
     def visit_Name(self, node: ast.Name):
         """Visit variable name nodes."""
@@ -26,30 +30,59 @@ class DependencyExtractor(ast.NodeVisitor):
                 self.scope_stack[0].add(node.id)
         self.generic_visit(node)
 
+    def visit_Subscript(self, node: ast.Subscript):
+        """Visit item assignments/deletions (x[0] = 1)."""
+        self._visit_target(node)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        """Visit attribute assignments/deletions (x.a = 1)."""
+        self._visit_target(node)
+
+    def _visit_target(self, node: ast.AST):
+        if isinstance(node.ctx, (ast.Store, ast.Del)) and len(self.scope_stack) == 1:
+            base = node.value
+            while isinstance(base, (ast.Subscript, ast.Attribute)):
+                base = base.value
+            # Modifying a variable defined by another cell
+            if isinstance(base, ast.Name) and base.id not in self.scope_stack[0]:
+                self.mutates.add(base.id)
+        self.generic_visit(node)
+
     def visit_FunctionDef(self, node: ast.FunctionDef):
         """Visit function definitions."""
         # Functions define a name at module level
         if len(self.scope_stack) == 1:
             self.writes.add(node.name)
+            self.scope_stack[0].add(node.name)
         # Don't descend into function body (local variables are not tracked)
+        self._check_global(node)
 
     def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
         """Visit async function definitions."""
         if len(self.scope_stack) == 1:
             self.writes.add(node.name)
+            self.scope_stack[0].add(node.name)
         # Don't descend into function body
+        self._check_global(node)
 
     def visit_ClassDef(self, node: ast.ClassDef):
         """Visit class definitions."""
         if len(self.scope_stack) == 1:
             self.writes.add(node.name)
+            self.scope_stack[0].add(node.name)
         # Don't descend into class body
+        self._check_global(node)
+
+    def _check_global(self, node: ast.AST):
+        if not self.global_writes:
+            self.global_writes = any(isinstance(n, ast.Global) for n in ast.walk(node))
 
     def visit_Import(self, node: ast.Import):
         """Visit import statements."""
         for alias in node.names:
             name = alias.asname or alias.name.split('.')[0]
             self.writes.add(name)
+            self.scope_stack[0].add(name)
         self.generic_visit(node)
 
     def visit_ImportFrom(self, node: ast.ImportFrom):
@@ -57,9 +90,11 @@ class DependencyExtractor(ast.NodeVisitor):
         for alias in node.names:
             if alias.name == '*':
                 # Can't track wildcard imports
+                self.star_import = True
                 continue
             name = alias.asname or alias.name
             self.writes.add(name)
+            self.scope_stack[0].add(name)
         self.generic_visit(node)
 
     def visit_AugAssign(self, node: ast.AugAssign):
@@ -82,6 +117,53 @@ class DependencyExtractor(ast.NodeVisitor):
         return False
 
 
+class CellAnalysis(NamedTuple):
+    """Everything the kernel needs to know about a version of a Python cell."""
+
+    reads: FrozenSet[str]
+    writes: FrozenSet[str]  # A variable can be both read and written (e.g., x += 1)
+    statements: Optional[CodeType]  # Everything but a trailing expression (None if empty)
+    expression: Optional[CodeType]  # Trailing expression, evaluated for display (None if absent)
+    mutates: FrozenSet[str]
+    star_import: bool
+    global_writes: bool
+
+    @property
+    def has_side_effects(self) -> bool:
+        """Whether running the cell changes state beyond assigning its writes."""
+        return bool(self.mutates) or self.star_import or self.global_writes
+
+
+def analyze_python(code: str) -> CellAnalysis:
+    """
+    Parse, analyze and compile a Python cell in one pass.
+
+    Raises:
+        SyntaxError: If the code doesn't compile
+    """
+    tree = ast.parse(code)
+    extractor = DependencyExtractor()
+    extractor.visit(tree)
+
+    # Split off a trailing expression so its value can be displayed
+    body = tree.body
+    expression = None
+    if body and isinstance(body[-1], ast.Expr):
+        expression = compile(ast.Expression(body=body[-1].value), '<cell>', 'eval')
+        body = body[:-1]
+    statements = compile(ast.Module(body=body, type_ignores=[]), '<cell>', 'exec') if body else None
+
+    return CellAnalysis(
+        reads=frozenset(extractor.reads),
+        writes=frozenset(extractor.writes),
+        statements=statements,
+        expression=expression,
+        mutates=frozenset(extractor.mutates),
+        star_import=extractor.star_import,
+        global_writes=extractor.global_writes,
+    )
+
+
 def extract_python_dependencies(code: str) -> Tuple[Set[str], Set[str]]:
     """
     Extract variable dependencies from Python code.
@@ -90,16 +172,22 @@ def extract_python_dependencies(code: str) -> Tuple[Set[str], Set[str]]:
         (reads, writes) - Sets of variable names that are read and written
     """
     try:
-        tree = ast.parse(code)
-        extractor = DependencyExtractor()
-        extractor.visit(tree)
-
-        # Return raw reads and writes
-        # A variable can be both read and written (e.g., x += 1)
-        return extractor.reads, extractor.writes
+        analysis = analyze_python(code)
     except SyntaxError:
         # If code has syntax errors, return empty sets
         return set(), set()
+    return set(analysis.reads), set(analysis.writes)
+
+
+def is_memoized(code: str) -> bool:
+    """
+    Whether a Python cell opts into on-disk memoization.
+
+    A line containing just `# memo` makes the kernel reuse the cell's stored
+    results (across restarts) when its code and inputs are unchanged.
+    """
+    import re
+    return re.search(r'^\s*#\s*memo\s*$', code, re.MULTILINE | re.IGNORECASE) is not None
 
 
 def extract_sql_dependencies(sql: str) -> Set[str]:
@@ -114,3 +202,49 @@ def extract_sql_dependencies(sql: str) -> Set[str]:
     """
     import re
     return set(re.findall(r'\{(\w+)\}', sql))
+
+
+def extract_sql_result_name(sql: str) -> Optional[str]:
+    """
+    Get the variable a SQL cell binds its result to, if any.
+
+    A line of the form `-- as df_users` makes the query result available to
+    Python cells as a pandas DataFrame named df_users.
+
+    Returns:
+        The variable name, or None if the cell has no `-- as` directive
+    """
+    import re
+    match = re.search(r'^\s*--\s*as\s+([A-Za-z_]\w*)\s*$', sql, re.MULTILINE | re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def extract_sql_fetch_engine(sql: str) -> Optional[str]:
+    """
+    Get the fetch engine a SQL cell asks for, if any.
+
+    A line of the form `-- engine: copy` selects how the result is read:
+    'cursor' (row by row through asyncpg), 'copy' (binary COPY decoded into
+    NumPy columns) or 'auto' (COPY when the planner expects a large result).
+
+    Returns:
+        The engine name, or None if the cell has no `-- engine:` directive
+    """
+    import re
+    match = re.search(r'^\s*--\s*engine\s*:\s*(cursor|copy|auto)\s*$', sql, re.MULTILINE | re.IGNORECASE)
+    return match.group(1).lower() if match else None
+
+
+def extract_sql_cache_mode(sql: str) -> Optional[str]:
+    """
+    Get a SQL cell's result cache setting, if any.
+
+    A line of the form `-- cache: off` makes the cell always query the
+    database instead of reusing a cached result.
+
+    Returns:
+        'on' or 'off', or None if the cell has no `-- cache:` directive
+    """
+    import re
+    match = re.search(r'^\s*--\s*cache\s*:\s*(on|off)\s*$', sql, re.MULTILINE | re.IGNORECASE)
+    return match.group(1).lower() if match else None
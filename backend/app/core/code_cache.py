@@ -0,0 +1,71 @@
+"""Cache of analyzed and compiled Python cells."""
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from .ast_parser import CellAnalysis, analyze_python
+
+# Distinct cell sources kept analyzed per kernel (least recently used dropped)
+CODE_CACHE_SIZE = int(os.environ.get("KERNEL_CODE_CACHE_SIZE", "512"))
+
+
+class CodeCache:
+    """
+    LRU cache of Python cell sources → CellAnalysis, so re-running or
+    re-registering an unchanged cell doesn't parse or compile it again.
+
+    Thread-safe: cells of a cascade are compiled from scheduler threads.
+    """
+
+    def __init__(self, max_entries: int = CODE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CellAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._entries
+
+    def get(self, code: str) -> CellAnalysis:
+        """
+        The analysis of code.
+
+        Raises:
+            SyntaxError: If code doesn't compile (failures aren't cached)
+        """
+        with self._lock:
+            analysis = self._entries.get(code)
+            if analysis is not None:
+                self._entries.move_to_end(code)
+                return analysis
+
+        analysis = analyze_python(code)
+
+        with self._lock:
+            self._entries[code] = analysis
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def analyze(self, code: str) -> Optional[CellAnalysis]:
+        """The analysis of code, or None if it doesn't compile."""
+        try:
+            return self.get(code)
+        except SyntaxError:
+            return None
+
+    def dependencies(self, code: str) -> Tuple[Set[str], Set[str]]:
+        """(reads, writes) of code, as extract_python_dependencies."""
+        analysis = self.analyze(code)
+        if analysis is None:
+            return set(), set()
+        return set(analysis.reads), set(analysis.writes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
@@ -1,10 +1,59 @@
 """Code execution engine."""
-import ast
+import asyncio
+import os
+import re
 import traceback
-from io import StringIO
-from contextlib import redirect_stdout
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from pydantic import BaseModel
+from .ast_parser import extract_sql_cache_mode, extract_sql_fetch_engine, extract_sql_result_name
+from .code_cache import CodeCache
+from .query_cache import QueryCache, estimate_size, make_key
+from .streams import StreamCapture, capture_output
+
+# Connection pool settings for SQL cells (one pool per kernel)
+SQL_POOL_MIN_SIZE = int(os.environ.get("SQL_POOL_MIN_SIZE", "1"))
+SQL_POOL_MAX_SIZE = int(os.environ.get("SQL_POOL_MAX_SIZE", "10"))
+# Idle connections are closed (and reopened on demand) after this many seconds
+SQL_POOL_MAX_IDLE = float(os.environ.get("SQL_POOL_MAX_IDLE", "300"))
+# Prepared statements cached per connection, so re-runs skip the parse round trip
+SQL_STATEMENT_CACHE_SIZE = int(os.environ.get("SQL_STATEMENT_CACHE_SIZE", "256"))
+SQL_CONNECT_TIMEOUT = 10.0
+
+# Rows kept from one query; larger results are cut off and marked truncated
+SQL_ROW_LIMIT = int(os.environ.get("SQL_ROW_LIMIT", "100000"))
+# Rows pulled from the server-side cursor per round trip
+SQL_FETCH_CHUNK = 5000
+
+# How SQL results are read: 'cursor' (asyncpg records), 'copy' (binary COPY
+# decoded into NumPy columns, see pgcopy.py) or 'auto' (COPY when the planner
+# expects at least SQL_COPY_ROW_THRESHOLD rows). Cells override it with an
+# `-- engine: copy` line.
+SQL_FETCH_ENGINE = os.environ.get("SQL_FETCH_ENGINE", "cursor")
+SQL_COPY_ROW_THRESHOLD = int(os.environ.get("SQL_COPY_ROW_THRESHOLD", "50000"))
+
+# Statements COPY can wrap as a subquery
+_COPYABLE_SQL = re.compile(r'^\s*(?:--[^\n]*\n\s*)*(select|with|values|table)\b', re.IGNORECASE)
+_WITH_SQL = re.compile(r'^\s*(?:--[^\n]*\n\s*)*with\b', re.IGNORECASE)
+_WRITE_KEYWORDS = re.compile(r'\b(insert|update|delete|merge)\b', re.IGNORECASE)
+# Queries that change state anyway: SELECT ... INTO creates a table, and
+# these functions advance sequences, set settings, notify or take locks
+_SIDE_EFFECTS = re.compile(
+    r'\binto\b|\b(?:nextval|setval|set_config|pg_notify|pg_(?:try_)?advisory_\w+)\s*\(',
+    re.IGNORECASE,
+)
+
+
+def _is_query(sql: str) -> bool:
+    """
+    Whether sql only reads data.
+
+    A WITH statement containing INSERT/UPDATE/DELETE/MERGE (a data-modifying
+    CTE such as `WITH d AS (DELETE ... RETURNING *) SELECT ...`) is a write,
+    as are SELECT ... INTO and queries calling functions like nextval().
+    """
+    if not _COPYABLE_SQL.match(sql) or _SIDE_EFFECTS.search(sql):
+        return False
+    return not (_WITH_SQL.match(sql) and _WRITE_KEYWORDS.search(sql))
 
 
 class Output(BaseModel):
@@ -17,7 +66,7 @@ class Output(BaseModel):
 class ExecutionResult(BaseModel):
     """Result of executing a cell."""
     status: str  # 'success' or 'error'
-    stdout: str = ''
+    stdout: str = ''  # Most recent output only (see STREAM_BUFFER_LIMIT)
     outputs: List[Output] = []
     error: Optional[str] = None
 
@@ -25,49 +74,51 @@ class ExecutionResult(BaseModel):
 class PythonExecutor:
     """Executes Python code and captures outputs."""
 
-    def __init__(self):
+    def __init__(self, code_cache: Optional[CodeCache] = None):
         self.globals_dict: Dict[str, Any] = {}
-
-    def execute(self, code: str) -> ExecutionResult:
+        # Shared with dependency extraction in the kernel, so each distinct
+        # cell source is parsed and compiled once
+        self.code_cache = code_cache if code_cache is not None else CodeCache()
+
+    def execute(
+        self,
+        code: str,
+        on_stdout: Optional[Callable[[str], None]] = None,
+        on_stderr: Optional[Callable[[str], None]] = None,
+    ) -> ExecutionResult:
         """
         Execute Python code and capture outputs.
 
         Strategy:
-        1. Parse code into AST
+        1. Parse and compile code (cached per distinct source, see CodeCache)
         2. If last statement is an expression, eval it and capture the result
         3. Execute all other statements with exec()
-        4. Capture stdout during execution
+        4. Capture stdout/stderr during execution, streaming chunks to
+           on_stdout/on_stderr while the cell runs (if given)
         5. Convert final expression result to output (if not None)
         """
-        stdout_buffer = StringIO()
+        stdout_buffer = StreamCapture(on_stdout)
+        stderr_buffer = StreamCapture(on_stderr) if on_stderr else None
         outputs: List[Output] = []
 
         try:
-            tree = ast.parse(code)
-
-            # Check if last statement is an expression
-            if tree.body and isinstance(tree.body[-1], ast.Expr):
-                # Split into statements + final expression
-                statements = ast.Module(body=tree.body[:-1], type_ignores=[])
-                expression = ast.Expression(body=tree.body[-1].value)
-
-                with redirect_stdout(stdout_buffer):
-                    # Execute statements
-                    if statements.body:
-                        exec(compile(statements, '<cell>', 'exec'), self.globals_dict)
-
-                    # Evaluate expression
-                    result = eval(compile(expression, '<cell>', 'eval'), self.globals_dict)
-
-                # Convert result to output
-                if result is not None:
-                    output = self._to_output(result)
-                    if output:
-                        outputs.append(output)
-            else:
-                # Pure statements, no expression
-                with redirect_stdout(stdout_buffer):
-                    exec(compile(tree, '<cell>', 'exec'), self.globals_dict)
+            compiled = self.code_cache.get(code)
+
+            with capture_output(stdout_buffer, stderr_buffer):
+                # Execute statements
+                if compiled.statements is not None:
+                    exec(compiled.statements, self.globals_dict)
+
+                # Evaluate the final expression, if any
+                result = None
+                if compiled.expression is not None:
+                    result = eval(compiled.expression, self.globals_dict)
+
+            # Convert result to output
+            if result is not None:
+                output = self._to_output(result)
+                if output:
+                    outputs.append(output)
 
             return ExecutionResult(
                 status='success',
@@ -75,11 +126,12 @@ class PythonExecutor:
                 outputs=outputs
             )
 
-        except Exception as e:
-            # Capture full traceback
+        except (Exception, KeyboardInterrupt) as e:
+            # Capture full traceback (KeyboardInterrupt: the kernel was interrupted)
             tb = traceback.format_exception(type(e), e, e.__traceback__)
             return ExecutionResult(
                 status='error',
+                stdout=stdout_buffer.getvalue(),
                 error=''.join(tb)
             )
 
@@ -169,22 +221,319 @@ class PythonExecutor:
         self.globals_dict.clear()
 
 
+# Column value types that need no conversion for display
+_PLAIN_TYPES = frozenset({int, float, str, bool, type(None)})
+
+
+def _serialize_column(values: list) -> list:
+    """Serialize one result column, skipping the per-value pass when possible."""
+    if set(map(type, values)) <= _PLAIN_TYPES:
+        return values
+    return [_serialize_value(val) for val in values]
+
+
+def _to_dataframe(columns: list[str], values: list[list]):
+    """Build a DataFrame column by column from a query result."""
+    import pandas as pd
+
+    df = pd.DataFrame({i: column for i, column in enumerate(values)})
+    # Positional keys above, so duplicate column names survive
+    df.columns = columns
+    return df
+
+
+def _serialize_value(val):
+    """Convert non-JSON-serializable types to strings."""
+    from datetime import datetime, date, time
+    from decimal import Decimal
+    if isinstance(val, (datetime, date, time)):
+        return val.isoformat()
+    if isinstance(val, Decimal):
+        return float(val)
+    return val
+
+
 class SQLExecutor:
     """Executes SQL queries against PostgreSQL database."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        row_limit: int = SQL_ROW_LIMIT,
+        fetch_engine: str = SQL_FETCH_ENGINE,
+        cache: Optional[QueryCache] = None,
+    ):
         """Initialize SQL executor with no connection."""
         self.connection_string: str | None = None
+        self.row_limit = row_limit
+        self.fetch_engine = fetch_engine
+        # Query results reused across re-runs with unchanged parameters
+        self.cache = cache if cache is not None else QueryCache()
+
+        # Connection pool for connection_string, created lazily on the loop
+        # that runs the queries (asyncpg pools are bound to one event loop)
+        self._pool_task: Optional[asyncio.Task] = None
+        self._pool_key: Optional[tuple] = None  # (connection_string, loop)
 
     def set_connection_string(self, conn_str: str) -> None:
         """
         Configure database connection string.
 
+        The previous pool (if any) is closed; a new one is created by
+        connect() or by the first query.
+
         Args:
             conn_str: PostgreSQL connection string (e.g., "postgresql://localhost/testdb")
         """
+        if conn_str != self.connection_string:
+            self._discard_pool()
         self.connection_string = conn_str
 
+    def invalidate_cache(self) -> int:
+        """
+        Drop every cached query result.
+
+        Returns:
+            Number of results dropped
+        """
+        return self.cache.invalidate()
+
+    async def connect(self) -> None:
+        """
+        Create the pool now and check that the database answers.
+
+        Raises:
+            ValueError: If no connection string is configured
+            Exception: Any connection error from asyncpg
+        """
+        if not self.connection_string:
+            raise ValueError("Database connection not configured")
+        pool = await self._get_pool()
+        await self._fetch(pool, "SELECT 1", [])
+
+    async def close(self) -> None:
+        """Close the pool."""
+        task, self._pool_task, self._pool_key = self._pool_task, None, None
+        if task is None or not task.done() or task.cancelled() or task.exception():
+            return
+        await task.result().close()
+
+    async def _get_pool(self):
+        """Pool for the current connection string on the running loop."""
+        import asyncpg
+
+        loop = asyncio.get_running_loop()
+        key = (self.connection_string, loop)
+        if self._pool_task is None or self._pool_key != key:
+            self._discard_pool()
+            self._pool_key = key
+            self._pool_task = loop.create_task(asyncpg.create_pool(
+                self.connection_string,
+                min_size=SQL_POOL_MIN_SIZE,
+                max_size=SQL_POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=SQL_POOL_MAX_IDLE,
+                statement_cache_size=SQL_STATEMENT_CACHE_SIZE,
+                timeout=SQL_CONNECT_TIMEOUT,
+            ))
+
+        # Concurrent first queries share one pool creation
+        task = self._pool_task
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Don't keep a failed pool around; the next query retries
+            if self._pool_task is task:
+                self._pool_task = None
+                self._pool_key = None
+            raise
+
+    def _discard_pool(self) -> None:
+        """Drop the current pool, closing it if it was created."""
+        task, self._pool_task, self._pool_key = self._pool_task, None, None
+        if task is None:
+            return
+        if not task.done():
+            task.cancel()
+            return
+        if task.cancelled() or task.exception():
+            return
+
+        pool = task.result()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is task.get_loop():
+            running.create_task(pool.close())
+        else:
+            pool.terminate()
+
+    async def _fetch(self, pool, sql: str, params: list) -> list:
+        """Run a query on a pooled connection and return all records."""
+        return await self._with_connection(pool, lambda conn: conn.fetch(sql, *params))
+
+    async def _fetch_table(
+        self, pool, sql: str, params: list, row_limit: int
+    ) -> tuple[list[str], list[list], bool]:
+        """
+        Run a query through a server-side cursor, SQL_FETCH_CHUNK rows per round trip.
+
+        Stops after row_limit rows, so a huge result never has to fit in
+        memory. Records are transposed into per-column value lists one chunk
+        at a time, so only one chunk of asyncpg Records is alive at once.
+
+        Returns:
+            (columns, column_values, truncated)
+        """
+        import asyncpg
+
+        def read_chunk(records, values: list[list]):
+            for column, chunk_values in zip(values, zip(*records)):
+                column.extend(chunk_values)
+
+        def columns_of(statement) -> tuple[list[str], list[list]]:
+            # From the statement, not the first row, so empty results keep them
+            columns = [attribute.name for attribute in statement.get_attributes()]
+            return columns, [[] for _ in columns]
+
+        async def read_cursor(conn):
+            chunk = []
+            count = 0
+            truncated = False
+
+            # Cursors need a transaction; the statement goes through the
+            # connection's statement cache like conn.fetch()
+            async with conn.transaction():
+                statement = await conn.prepare(sql)
+                columns, values = columns_of(statement)
+                cursor = statement.cursor(*params, prefetch=SQL_FETCH_CHUNK)
+                async for record in cursor:
+                    if count == row_limit:
+                        truncated = True
+                        break
+                    chunk.append(record)
+                    count += 1
+                    if len(chunk) == SQL_FETCH_CHUNK:
+                        read_chunk(chunk, values)
+                        chunk = []
+            read_chunk(chunk, values)
+
+            return columns, values, truncated
+
+        async def read_all(conn):
+            statement = await conn.prepare(sql)
+            columns, values = columns_of(statement)
+            records = await statement.fetch(*params)
+            read_chunk(records[:row_limit], values)
+            return columns, values, len(records) > row_limit
+
+        try:
+            return await self._with_connection(pool, read_cursor)
+        except asyncpg.exceptions.ActiveSQLTransactionError:
+            # Statements like VACUUM or CREATE DATABASE can't run in a transaction
+            return await self._with_connection(pool, read_all)
+
+    async def _fetch_table_copy(
+        self, pool, sql: str, params: list, row_limit: int, auto: bool
+    ) -> Optional[tuple]:
+        """
+        Read a query's result with binary COPY, decoded into NumPy columns.
+
+        The statement is prepared first to learn its column names and types;
+        queries with types pgcopy can't decode, statements other than
+        queries, and (when auto) results the planner expects to be smaller
+        than SQL_COPY_ROW_THRESHOLD return None so the caller falls back
+        to _fetch_table.
+
+        Returns:
+            (columns, copy_columns, truncated), or None
+        """
+        import asyncpg
+        from . import pgcopy
+
+        if not _is_query(sql):
+            return None
+
+        async def read_copy(conn):
+            statement = await conn.prepare(sql)
+            attributes = statement.get_attributes()
+            type_names = [attribute.type.name for attribute in attributes]
+            if not attributes or not pgcopy.supports(type_names):
+                return None
+            if auto:
+                plan = await statement.explain(*params)
+                if plan[0]['Plan']['Plan Rows'] < SQL_COPY_ROW_THRESHOLD:
+                    return None
+
+            chunks: list[bytes] = []
+
+            async def collect(data: bytes):
+                chunks.append(data)
+
+            # One extra row tells us whether the result was cut off. The
+            # newline keeps a trailing line comment from swallowing the paren.
+            query = f"SELECT * FROM (\n{sql.rstrip().rstrip(';')}\n) AS _copy LIMIT {row_limit + 1}"
+            try:
+                await conn.copy_from_query(query, *params, output=collect, format='binary')
+            except (asyncpg.exceptions.PostgresSyntaxError, asyncpg.exceptions.FeatureNotSupportedError):
+                # e.g. a data-modifying WITH, which can't be a subquery
+                return None
+
+            values = pgcopy.decode(b''.join(chunks), type_names)
+            truncated = len(values[0].values) > row_limit
+            if truncated:
+                values = [pgcopy.head(column, row_limit) for column in values]
+            return [attribute.name for attribute in attributes], values, truncated
+
+        return await self._with_connection(pool, read_copy)
+
+    async def _fetch_result(self, sql: str, params: list, engine: str) -> tuple:
+        """
+        Run a query with the given fetch engine.
+
+        Returns:
+            (source, columns, values, truncated), where source is 'copy'
+            (values are pgcopy.CopyColumns) or 'cursor' (values are lists)
+        """
+        # Execute on a pooled connection (statement is prepared once per connection)
+        pool = await self._get_pool()
+        if engine != 'cursor':
+            fetched = await self._fetch_table_copy(
+                pool, sql, params, self.row_limit, auto=engine == 'auto'
+            )
+            if fetched is not None:
+                return ('copy', *fetched)
+        return ('cursor', *await self._fetch_table(pool, sql, params, self.row_limit))
+
+    def _cache_key(self, sql: str, safe_sql: str, params: list, engine: str):
+        """Result cache key for a query, or None if it mustn't be cached."""
+        if not self.cache.enabled or extract_sql_cache_mode(sql) == 'off':
+            return None
+        # Only queries: other statements change data rather than read it
+        if not _is_query(safe_sql):
+            return None
+        return make_key(self.connection_string, safe_sql, params, engine, self.row_limit)
+
+    async def _with_connection(self, pool, operation):
+        """
+        Run operation(conn) on a pooled connection.
+
+        Retried once if the connection turns out to be dead (e.g. the server
+        restarted or dropped it while idle); the pool replaces it.
+        """
+        import asyncpg
+
+        stale_connection_errors = (
+            asyncpg.exceptions.ConnectionDoesNotExistError,
+            asyncpg.exceptions.AdminShutdownError,
+            ConnectionResetError,
+        )
+        try:
+            async with pool.acquire() as conn:
+                return await operation(conn)
+        except stale_connection_errors:
+            async with pool.acquire() as conn:
+                return await operation(conn)
+
     def _prepare_parameterized_query(
         self, sql: str, variables: Dict[str, Any]
     ) -> tuple[str, list[str]]:
@@ -236,13 +585,17 @@ class SQLExecutor:
         safe_sql = re.sub(r'\{(\w+)\}', replace_var, sql)
         return safe_sql, params
 
-    async def execute(self, sql: str, variables: Dict[str, Any]) -> ExecutionResult:
+    async def execute(
+        self, sql: str, variables: Dict[str, Any], use_cache: bool = True
+    ) -> ExecutionResult:
         """
         Execute SQL query with safe parameter binding.
 
         Args:
             sql: SQL query with {variable_name} templates
             variables: Python namespace for variable substitution
+            use_cache: Whether a cached result may answer the query. The
+                result is cached either way, so an explicit re-run refreshes it.
 
         Returns:
             ExecutionResult with table data or error
@@ -267,53 +620,70 @@ class SQLExecutor:
             stdout_buffer.write(f"Executing: {safe_sql}\n")
             stdout_buffer.write(f"Parameters: {params}\n")
 
-            # Connect and execute
-            conn = await asyncpg.connect(self.connection_string)
-            try:
-                # Parameters are already converted to strings in _prepare_parameterized_query
-                records = await conn.fetch(safe_sql, *params)
-
-                if records:
-                    # Convert asyncpg Records to table format
-                    from datetime import datetime, date, time
-
-                    def serialize_value(val):
-                        """Convert non-JSON-serializable types to strings."""
-                        from decimal import Decimal
-                        if isinstance(val, (datetime, date, time)):
-                            return val.isoformat()
-                        if isinstance(val, Decimal):
-                            return float(val)
-                        return val
-
-                    columns = list(records[0].keys())
-                    rows = [[serialize_value(val) for val in record.values()] for record in records]
-
-                    stdout_buffer.write(f"Returned {len(rows)} row(s)\n")
-
-                    return ExecutionResult(
-                        status='success',
-                        stdout=stdout_buffer.getvalue(),
-                        outputs=[
-                            Output(
-                                mime_type='application/json',
-                                data={
-                                    'type': 'table',
-                                    'columns': columns,
-                                    'rows': rows
-                                }
-                            )
-                        ]
-                    )
-                else:
-                    # No results
-                    return ExecutionResult(
-                        status='success',
-                        stdout=stdout_buffer.getvalue() + "Query returned 0 rows\n"
-                    )
-
-            finally:
-                await conn.close()
+            engine = extract_sql_fetch_engine(sql) or self.fetch_engine
+            cache_key = self._cache_key(sql, safe_sql, params, engine)
+            cached = self.cache.get(cache_key) if cache_key is not None and use_cache else None
+
+            if cached is not None:
+                source, columns, values, truncated = cached.value
+                age = self.cache.age(cached)
+                stdout_buffer.write(f"Result from cache ({age:.0f}s old)\n")
+            else:
+                source, columns, values, truncated = await self._fetch_result(safe_sql, params, engine)
+                if source == 'copy':
+                    stdout_buffer.write("Fetched with binary COPY\n")
+                if cache_key is not None:
+                    self.cache.put(cache_key, (source, columns, values, truncated), estimate_size(values))
+                elif not _is_query(safe_sql):
+                    # The statement may have changed data that cached queries read
+                    self.cache.invalidate(self.connection_string)
+
+            if source == 'copy':
+                from . import pgcopy
+
+                display_columns = [pgcopy.to_list(column) for column in values]
+                to_dataframe = lambda: pgcopy.to_dataframe(columns, values)
+            else:
+                # Converted a column at a time
+                display_columns = [_serialize_column(column) for column in values]
+                to_dataframe = lambda: _to_dataframe(columns, values)
+
+            # Bind the result for Python cells (`-- as name`)
+            result_name = extract_sql_result_name(sql)
+            if result_name:
+                variables[result_name] = to_dataframe()
+                stdout_buffer.write(f"Result bound to {result_name}\n")
+
+            rows = [list(row) for row in zip(*display_columns)]
+
+            if rows:
+                stdout_buffer.write(f"Returned {len(rows)} row(s)\n")
+
+                table = {
+                    'type': 'table',
+                    'columns': columns,
+                    'rows': rows
+                }
+                if truncated:
+                    table['truncated'] = f"Result truncated to the first {self.row_limit} rows"
+                    stdout_buffer.write(f"Result truncated at {self.row_limit} rows\n")
+
+                return ExecutionResult(
+                    status='success',
+                    stdout=stdout_buffer.getvalue(),
+                    outputs=[
+                        Output(
+                            mime_type='application/json',
+                            data=table
+                        )
+                    ]
+                )
+            else:
+                # No results
+                return ExecutionResult(
+                    status='success',
+                    stdout=stdout_buffer.getvalue() + "Query returned 0 rows\n"
+                )
 
         except ValueError as e:
             # Missing variable in template
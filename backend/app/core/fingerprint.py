@@ -0,0 +1,124 @@
+"""Value fingerprints for detecting whether a cell's writes changed."""
+import hashlib
+import types
+from typing import Any, Hashable
+
+# Builtin containers larger than this are compared by identity
+MAX_CONTAINER_ITEMS = 10_000
+
+_SCALARS = (type(None), bool, int, float, complex, str, bytes)
+
+
+def fingerprint(value: Any) -> Hashable:
+    """
+    Summarize a value so that equal fingerprints mean "unchanged".
+
+    - Scalars and strings: the value itself (with its type)
+    - NumPy arrays, pandas DataFrames/Series: a blake2b digest of the contents
+    - Lists, tuples, dicts and sets: a digest of their items' fingerprints
+    - Modules: their name
+    - Anything else: the object's identity, so a re-created object always
+      counts as changed
+    """
+    if isinstance(value, _SCALARS):
+        return (type(value).__name__, value)
+    if isinstance(value, types.ModuleType):
+        return ('module', value.__name__)
+    digest = _content_digest(value, depth=0)
+    if digest is not None:
+        return (type(value).__name__, digest)
+    return _Identity(value)
+
+
+def is_stable(fp: Hashable) -> bool:
+    """Whether a fingerprint means the same thing in another process (i.e. isn't an identity)."""
+    return not isinstance(fp, _Identity)
+
+
+class _Identity:
+    """Fingerprint equal only to one for the very same object."""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        # Holding the object keeps its id from being reused while we compare
+        self.value = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Identity) and other.value is self.value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+
+def _content_digest(value: Any, depth: int):
+    """blake2b digest of value's contents, or None if it can't be hashed by content."""
+    hasher = hashlib.blake2b(digest_size=16)
+    if not _feed(hasher, value, depth):
+        return None
+    return hasher.digest()
+
+
+def _feed(hasher, value: Any, depth: int) -> bool:
+    if isinstance(value, _SCALARS):
+        hasher.update(type(value).__name__.encode())
+        hasher.update(repr(value).encode())
+        return True
+
+    if depth > 8:
+        return False
+
+    module = type(value).__module__.split('.')[0]
+    if module == 'numpy':
+        return _feed_numpy(hasher, value)
+    if module == 'pandas':
+        return _feed_pandas(hasher, value)
+
+    if isinstance(value, (list, tuple, set, frozenset, dict)):
+        if len(value) > MAX_CONTAINER_ITEMS:
+            return False
+        hasher.update(f"{type(value).__name__}:{len(value)}".encode())
+        if isinstance(value, dict):
+            items = [item for pair in value.items() for item in pair]
+        elif isinstance(value, (set, frozenset)):
+            # Order-independent: feed the sorted item digests
+            digests = [_content_digest(item, depth + 1) for item in value]
+            if any(digest is None for digest in digests):
+                return False
+            items = sorted(digests)
+        else:
+            items = value
+        return all(_feed(hasher, item, depth + 1) for item in items)
+
+    return False
+
+
+def _feed_numpy(hasher, value: Any) -> bool:
+    import numpy as np
+
+    if isinstance(value, np.generic):
+        value = np.asarray(value)
+    if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+        return False
+    hasher.update(f"ndarray:{value.dtype.str}:{value.shape}".encode())
+    hasher.update(np.ascontiguousarray(value).data)
+    return True
+
+
+def _feed_pandas(hasher, value: Any) -> bool:
+    import pandas as pd
+
+    if not isinstance(value, (pd.DataFrame, pd.Series)):
+        return False
+    try:
+        # One vectorized 64-bit hash per row, index included
+        row_hashes = pd.util.hash_pandas_object(value, index=True).to_numpy()
+    except TypeError:
+        # Unhashable cells (e.g. lists inside an object column)
+        return False
+    if isinstance(value, pd.DataFrame):
+        header = (list(value.columns), [str(dtype) for dtype in value.dtypes])
+    else:
+        header = (value.name, str(value.dtype))
+    hasher.update(f"{type(value).__name__}:{header!r}".encode())
+    hasher.update(row_hashes.tobytes())
+    return True
@@ -1,6 +1,12 @@
 """Dependency graph for reactive cell execution."""
-import networkx as nx
-from typing import Set, List, Optional
+import heapq
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Ancestor / descendant sets remembered per direction (oldest dropped first)
+CLOSURE_CACHE_SIZE = 1024
+
+
+Edge = Tuple[str, str]
 
 
 class CycleDetectedError(Exception):
@@ -8,48 +14,179 @@ class CycleDetectedError(Exception):
     pass
 
 
+class _Closure(NamedTuple):
+    """A cell's ancestors or descendants, as a set and in topological order."""
+    members: FrozenSet[int]
+    ordered: Tuple[int, ...]
+
+
 class DependencyGraph:
     """
     Manages variable dependencies between cells using a directed acyclic graph (DAG).
 
     Each node represents a cell. Edges represent dependencies:
     - Edge from A to B means "B depends on A" (B reads variables that A writes)
+
+    A variable may be written by several cells. A reader then depends on the
+    nearest definition above it in notebook order (or, if there's none, the
+    first one below). Since all cells share one namespace, the definitions
+    of a variable also run in notebook order, each after the cells reading
+    the previous one, so the last definition is the value left in place.
+
+    Cells are stored by integer index, with each cell's parents and children
+    kept as sets of indices, so traversals don't go through cell IDs or
+    allocate graph views.
+
+    A topological order of all cells is maintained incrementally
+    (Pearce–Kelly): adding an edge that already agrees with the order costs
+    nothing, and otherwise only the cells between its endpoints in the order
+    are searched and renumbered, which is also how cycles are detected.
+
+    Each cell's ancestors and descendants are memoized in topological order.
+    An edge change only invalidates the cached sets that contain (or belong
+    to) its endpoints, so execution orders for unaffected cells are reused
+    as they are.
     """
 
     def __init__(self):
-        self._graph = nx.DiGraph()
+        self._index: dict[str, int] = {}             # cell_id → index
+        self._cells: List[Optional[str]] = []        # index → cell_id (None once removed)
+        self._children: List[Set[int]] = []          # index → indices of cells depending on it
+        self._parents: List[Set[int]] = []           # index → indices of cells it depends on
+        self._position: List[int] = []              # index → position in topological order
+        self._free: List[int] = []                   # indices of removed cells, for reuse
+        self._next_position = 0
+        self._sorted: Optional[List[str]] = None     # every cell in topological order (cached)
+        self._ancestor_cache: dict[int, _Closure] = {}    # index → its ancestors
+        self._descendant_cache: dict[int, _Closure] = {}  # index → its descendants
         self._cell_writes: dict[str, Set[str]] = {}  # cell_id → variables written
         self._cell_reads: dict[str, Set[str]] = {}   # cell_id → variables read
-        self._var_writers: dict[str, str] = {}       # variable → cell_id that writes it
-
-    def _would_edge_create_cycle(self, from_cell: str, to_cell: str) -> bool:
+        self._var_writers: dict[str, Set[str]] = {}  # variable → cell_ids that write it
+        self._var_readers: dict[str, Set[str]] = {}  # variable → cell_ids that read it
+        self._rank: dict[str, int] = {}              # cell_id → position in the notebook
+        self._next_rank = 0
+        # variable → the edges it induces, by the reader they're for (None: between writers)
+        self._var_edges: dict[str, Dict[Optional[str], FrozenSet[Edge]]] = {}
+        self._edge_count: dict[Edge, int] = {}       # edge → number of variables inducing it
+
+    def _add_node(self, cell_id: str) -> int:
+        """Index of a cell, adding it (with no edges) at the end of the order if new."""
+        index = self._index.get(cell_id)
+        if index is not None:
+            return index
+
+        if cell_id not in self._rank:
+            self._rank[cell_id] = self._next_rank
+            self._next_rank += 1
+        if self._free:
+            index = self._free.pop()
+            self._cells[index] = cell_id
+            self._position[index] = self._next_position
+        else:
+            index = len(self._cells)
+            self._cells.append(cell_id)
+            self._children.append(set())
+            self._parents.append(set())
+            self._position.append(self._next_position)
+        self._index[cell_id] = index
+        self._next_position += 1
+        if self._sorted is not None:
+            self._sorted.append(cell_id)
+        return index
+
+    def _remove_node(self, cell_id: str) -> None:
+        index = self._index.pop(cell_id, None)
+        if index is None:
+            return
+        self._invalidate_closures(self._parents[index] | {index}, self._children[index] | {index})
+        for child in self._children[index]:
+            self._parents[child].discard(index)
+        for parent in self._parents[index]:
+            self._children[parent].discard(index)
+        self._children[index] = set()
+        self._parents[index] = set()
+        self._cells[index] = None
+        self._free.append(index)
+        # Removing a cell never invalidates the order of the others
+        if self._sorted is not None:
+            self._sorted.remove(cell_id)
+
+    def _edges_of(self, index: int) -> List[Tuple[int, int]]:
+        return [(parent, index) for parent in self._parents[index]] + [
+            (index, child) for child in self._children[index]
+        ]
+
+    def _remove_edges(self, edges: List[Tuple[int, int]]) -> None:
+        self._invalidate_closures({parent for parent, _ in edges}, {child for _, child in edges})
+        for parent, child in edges:
+            self._children[parent].discard(child)
+            self._parents[child].discard(parent)
+
+    def _invalidate_closures(self, parents: Set[int], children: Set[int]) -> None:
         """
-        Check if adding edge from_cell → to_cell would create a cycle.
-
-        Uses the fact that adding edge A→B creates a cycle iff there's already
-        a path B→A in the graph (incremental detection, no graph copy needed).
-
-        Args:
-            from_cell: Source cell of the edge
-            to_cell: Destination cell of the edge
-
-        Returns:
-            True if edge would create a cycle, False otherwise
+        Forget cached closures that change when edges between parents and
+        children are added or removed: the descendants of every cell that
+        reaches a parent, and the ancestors of every cell reached from a child.
         """
-        if from_cell == to_cell:
-            return True  # Self-loop
-
-        if not self._graph.has_node(to_cell):
-            return False  # to_cell doesn't exist yet, can't have path back
-
-        if not self._graph.has_node(from_cell):
-            return False  # from_cell doesn't exist yet, no path possible
+        for cache, endpoints in ((self._descendant_cache, parents), (self._ancestor_cache, children)):
+            stale = [
+                index for index, closure in cache.items()
+                if index in endpoints or not closure.members.isdisjoint(endpoints)
+            ]
+            for index in stale:
+                del cache[index]
+
+    def _add_edge(self, parent: int, child: int) -> None:
+        """
+        Add edge parent → child, reordering cells as needed.
 
-        # Check if there's a path from to_cell back to from_cell
-        try:
-            return nx.has_path(self._graph, to_cell, from_cell)
-        except nx.NodeNotFound:
-            return False
+        Raises:
+            CycleDetectedError: If the edge would close a cycle (graph unchanged)
+        """
+        position = self._position
+        lower = position[child]
+        upper = position[parent]
+        if lower < upper or parent == child:
+            # child is ordered before parent: look for cells that must move,
+            # i.e. those reachable from child that are ordered before parent,
+            # and those reaching parent that are ordered after child
+            forward = self._search(child, parent, upper, self._children, forward=True)
+            backward = self._search(parent, child, lower, self._parents, forward=False)
+
+            # Reuse the same positions: everything reaching parent first
+            moved = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+            for index, new_position in zip(moved, sorted(position[index] for index in moved)):
+                position[index] = new_position
+            self._sorted = None
+
+        self._invalidate_closures({parent}, {child})
+        self._children[parent].add(child)
+        self._parents[child].add(parent)
+
+    def _search(self, start: int, target: int, bound: int, neighbors: List[Set[int]], forward: bool) -> Set[int]:
+        """Cells reachable from start (via neighbors) without leaving the affected order range."""
+        if forward and start == target:
+            raise CycleDetectedError(f"Circular dependency detected: {self._cells[start]} depends on itself")
+        position = self._position
+        found = {start}
+        stack = [start]
+        while stack:
+            for other in neighbors[stack.pop()]:
+                if other in found:
+                    continue
+                if forward:
+                    if other == target:
+                        raise CycleDetectedError(
+                            f"Circular dependency detected: adding edge {self._cells[target]}→{self._cells[start]} "
+                            f"would create a cycle (path exists {self._cells[start]}→{self._cells[target]})"
+                        )
+                    if position[other] > bound:
+                        continue
+                elif position[other] < bound:
+                    continue
+                found.add(other)
+                stack.append(other)
+        return found
 
     def update_cell(self, cell_id: str, reads: Set[str], writes: Set[str]) -> None:
         """
@@ -63,93 +200,423 @@ class DependencyGraph:
         Raises:
             CycleDetectedError: If this update would create a circular dependency
         """
-        # Compute what edges we would add BEFORE mutating anything
-        new_parent_edges = []  # Edges where other cells write what we read
-        new_child_edges = []   # Edges where other cells read what we write
+        is_new = cell_id not in self._index
+        old_reads = self._cell_reads.get(cell_id, set())
+        old_writes = self._cell_writes.get(cell_id, set())
 
-        for var in reads:
-            writer = self._var_writers.get(var)
-            if writer and writer != cell_id:
-                new_parent_edges.append((writer, cell_id))
+        self._add_node(cell_id)
+        self._set_variables(cell_id, reads, writes)
+        delta = self._resolve_cell(cell_id, old_reads, old_writes, reads, writes)
 
-        for var in writes:
-            for other_cell in list(self._graph.nodes()):
-                if other_cell == cell_id:
-                    continue
-                other_reads = self._cell_reads.get(other_cell, set())
-                if var in other_reads:
-                    new_child_edges.append((cell_id, other_cell))
-
-        # Check each edge incrementally BEFORE adding anything
-        # We need to simulate adding edges to detect cycles that arise from the combination
-        all_new_edges = new_parent_edges + new_child_edges
-        temp_edges = []  # Track edges we've "virtually" added for cycle checking
-
-        for from_cell, to_cell in all_new_edges:
-            # Check if this edge would create a cycle considering previously checked edges
-            if self._would_edge_create_cycle(from_cell, to_cell):
-                raise CycleDetectedError(
-                    f"Circular dependency detected: adding edge {from_cell}→{to_cell} "
-                    f"would create a cycle (path exists {to_cell}→{from_cell})"
-                )
-
-            # Temporarily add this edge to the graph so subsequent checks see it
-            if not self._graph.has_node(from_cell):
-                self._graph.add_node(from_cell)
-            if not self._graph.has_node(to_cell):
-                self._graph.add_node(to_cell)
-            self._graph.add_edge(from_cell, to_cell)
-            temp_edges.append((from_cell, to_cell))
-
-        # If we get here, all edges are safe. Remove the temporary edges we added
-        for from_cell, to_cell in temp_edges:
-            if self._graph.has_edge(from_cell, to_cell):
-                self._graph.remove_edge(from_cell, to_cell)
-
-        # All edges are safe - now mutate the graph
-
-        # Remove old node and edges
-        if self._graph.has_node(cell_id):
-            self._graph.remove_node(cell_id)
-
-        # Clear old variable mappings
-        if cell_id in self._cell_writes:
-            old_writes = self._cell_writes[cell_id]
-            for var in old_writes:
-                if self._var_writers.get(var) == cell_id:
-                    del self._var_writers[var]
-
-        # Register new writes and reads
+        # On a cycle the edges are already restored; put the variables back
+        try:
+            self._apply_delta(delta, first=cell_id)
+        except CycleDetectedError:
+            if is_new:
+                self._clear_variables(cell_id)
+            else:
+                self._set_variables(cell_id, old_reads, old_writes)
+            self._resolve_cell(cell_id, reads, writes, old_reads, old_writes)
+            if is_new:
+                # Its rank stays, so a fixed version comes back at the same position
+                self._remove_node(cell_id)
+            raise
+
+    def set_cell_order(self, cell_ids: List[str]) -> None:
+        """
+        Set the notebook order, which decides which definition a reader sees
+        when several cells write the same variable.
+
+        Cells not registered yet take their position from here when they
+        are; registered cells missing from cell_ids keep their relative
+        order after the listed ones.
+
+        Raises:
+            CycleDetectedError: If resolving reads in the new order would
+                create a circular dependency (order unchanged)
+        """
+        old_rank = dict(self._rank)
+        unlisted = sorted(set(self._index) - set(cell_ids), key=self._rank.__getitem__)
+        self._rank = {cell_id: rank for rank, cell_id in enumerate(list(dict.fromkeys(cell_ids)) + unlisted)}
+        self._next_rank = len(self._rank)
+
+        # Only variables with several definitions depend on the order
+        shadowed = [var for var, writers in self._var_writers.items() if len(writers) > 1]
+        delta: dict[Edge, int] = {}
+        for var in shadowed:
+            self._resolve_variable(var, None, delta)
+        try:
+            self._apply_delta(delta)
+        except CycleDetectedError:
+            self._rank = old_rank
+            self._next_rank = max(old_rank.values(), default=-1) + 1
+            for var in shadowed:
+                self._resolve_variable(var, None, {})
+            raise
+
+    def _resolve_cell(
+        self, cell_id: str, old_reads: Set[str], old_writes: Set[str], reads: Set[str], writes: Set[str]
+    ) -> dict[Edge, int]:
+        """Re-resolve the variables a cell's update touches; returns the edge changes."""
+        delta: dict[Edge, int] = {}
+        # A changed set of definitions can change what any reader sees...
+        redefined = old_writes ^ writes
+        for var in redefined:
+            self._resolve_variable(var, None, delta)
+        # ...otherwise only this cell's own reads change
+        for var in (old_reads | reads) - redefined:
+            self._resolve_variable(var, [cell_id], delta)
+        return delta
+
+    def _resolve_variable(self, var: str, readers: Optional[List[str]], delta: dict[Edge, int]) -> None:
+        """
+        Recompute the edges var induces, for the given readers only or for
+        all of them (and between its writers), counting changes into delta.
+        """
+        writers = self._var_writers.get(var, set())
+        chain = sorted(writers, key=self._rank.__getitem__)
+        contributions = self._var_edges.setdefault(var, {})
+        if readers is None:
+            keys = [None, *set(contributions).union(self._var_readers.get(var, ())) - {None}]
+        else:
+            keys = readers
+
+        for key in keys:
+            if key is None:
+                new = frozenset(zip(chain, chain[1:]))
+            elif key in self._var_readers.get(var, ()):
+                new = self._reader_edges(key, chain, writers)
+            else:
+                new = frozenset()
+            old = contributions.get(key, frozenset())
+            if new == old:
+                continue
+            for edge in old - new:
+                self._count_edge(edge, -1, delta)
+            for edge in new - old:
+                self._count_edge(edge, 1, delta)
+            if new:
+                contributions[key] = new
+            else:
+                del contributions[key]
+
+        if not contributions:
+            del self._var_edges[var]
+
+    def _reader_edges(self, reader: str, chain: List[str], writers: Set[str]) -> FrozenSet[Edge]:
+        """Edges for one reader: from the definition it sees, and on to the next definition."""
+        others = [writer for writer in chain if writer != reader]
+        rank = self._rank[reader]
+        above = [i for i, writer in enumerate(others) if self._rank[writer] < rank]
+        if above:
+            source = above[-1]
+        elif others and reader not in writers:
+            source = 0  # Only defined below
+        else:
+            return frozenset()
+
+        edges = {(others[source], reader)}
+        if reader not in writers and source + 1 < len(others):
+            # The next definition mustn't replace the value before it's read
+            edges.add((reader, others[source + 1]))
+        return frozenset(edges)
+
+    def _count_edge(self, edge: Edge, step: int, delta: dict[Edge, int]) -> None:
+        count = self._edge_count.get(edge, 0) + step
+        if count:
+            self._edge_count[edge] = count
+        else:
+            del self._edge_count[edge]
+        if count == 0 or (count == 1 and step == 1):
+            delta[edge] = delta.get(edge, 0) + step
+
+    def _apply_delta(self, delta: dict[Edge, int], first: Optional[str] = None) -> None:
+        """
+        Add and remove edges, keeping the order topological. On a cycle the
+        graph is left as it was.
+
+        Args:
+            first: Add this cell's outgoing edges first: they usually agree
+                with its current position, so a cycle is then found without
+                reordering anything
+        """
+        rank = self._rank
+        removed = [self._edge_index(edge) for edge, step in delta.items() if step < 0]
+        additions = sorted(
+            (edge for edge, step in delta.items() if step > 0),
+            key=lambda edge: (edge[0] != first, rank[edge[0]], rank[edge[1]]),
+        )
+        self._remove_edges(removed)
+        added = []
+        try:
+            for edge in additions:
+                parent, child = self._edge_index(edge)
+                self._add_edge(parent, child)
+                added.append((parent, child))
+        except CycleDetectedError:
+            self._remove_edges(added)
+            for parent, child in removed:
+                self._add_edge(parent, child)
+            raise
+
+    def _edge_index(self, edge: Edge) -> Tuple[int, int]:
+        return self._index[edge[0]], self._index[edge[1]]
+
+    def update_cells(
+        self, cells: dict[str, Tuple[Set[str], Set[str]]]
+    ) -> dict[str, CycleDetectedError]:
+        """
+        Register many cells in one pass (e.g. when a notebook is opened).
+
+        Equivalent to calling update_cell for each cell in order, but instead of
+        checking every candidate edge for cycles it applies all updates and
+        checks acyclicity once. Only if that finds a cycle does it fall back to
+        per-cell updates to work out which cells must be rejected.
+
+        Args:
+            cells: cell_id → (reads, writes), in registration order
+
+        Returns:
+            cell_id → CycleDetectedError for every cell that was rejected
+        """
+        if any(cell_id in self._cell_reads for cell_id in cells):
+            # Re-registration removes edges, so an acyclic end state doesn't
+            # prove every intermediate state was acyclic
+            return self._update_cells_one_by_one(cells)
+
+        snapshot = (
+            dict(self._index),
+            list(self._cells),
+            [set(children) for children in self._children],
+            [set(parents) for parents in self._parents],
+            list(self._position),
+            list(self._free),
+            self._next_position,
+            dict(self._cell_writes),
+            dict(self._cell_reads),
+            {var: set(writers) for var, writers in self._var_writers.items()},
+            {var: set(readers) for var, readers in self._var_readers.items()},
+            dict(self._rank),
+            self._next_rank,
+            {var: dict(contributions) for var, contributions in self._var_edges.items()},
+            dict(self._edge_count),
+        )
+        self._ancestor_cache.clear()
+        self._descendant_cache.clear()
+
+        touched: Set[str] = set()
+        for cell_id, (reads, writes) in cells.items():
+            self._add_node(cell_id)
+            self._set_variables(cell_id, reads, writes)
+            touched |= reads | writes
+
+        delta: dict[Edge, int] = {}
+        for var in touched:
+            self._resolve_variable(var, None, delta)
+        for edge, step in delta.items():
+            parent, child = self._edge_index(edge)
+            if step > 0:
+                self._children[parent].add(child)
+                self._parents[child].add(parent)
+            elif step < 0:
+                self._children[parent].discard(child)
+                self._parents[child].discard(parent)
+
+        order = self._topological_sort()
+        if order is None:
+            # Some cell closes a cycle - restore and redo one by one so that
+            # exactly the cells update_cell would reject are rejected
+            (self._index, self._cells, self._children, self._parents, self._position,
+             self._free, self._next_position, self._cell_writes, self._cell_reads,
+             self._var_writers, self._var_readers, self._rank, self._next_rank,
+             self._var_edges, self._edge_count) = snapshot
+            self._sorted = None
+            return self._update_cells_one_by_one(cells)
+
+        for position, index in enumerate(order):
+            self._position[index] = position
+        self._next_position = len(order)
+        self._sorted = None
+        return {}
+
+    def _topological_sort(self) -> Optional[List[int]]:
+        """
+        Indices of all cells in a topological order (Kahn), independent cells
+        in notebook order, or None if there's a cycle.
+        """
+        rank = self._rank
+        in_degree = {index: len(self._parents[index]) for index in self._index.values()}
+        ready = [(rank[cell_id], index) for cell_id, index in self._index.items() if not in_degree[index]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, index = heapq.heappop(ready)
+            order.append(index)
+            for child in self._children[index]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    heapq.heappush(ready, (rank[self._cells[child]], child))
+        return order if len(order) == len(in_degree) else None
+
+    def _update_cells_one_by_one(
+        self, cells: dict[str, Tuple[Set[str], Set[str]]]
+    ) -> dict[str, CycleDetectedError]:
+        errors: dict[str, CycleDetectedError] = {}
+        for cell_id, (reads, writes) in cells.items():
+            try:
+                self.update_cell(cell_id, reads, writes)
+            except CycleDetectedError as e:
+                errors[cell_id] = e
+        return errors
+
+    def _set_variables(self, cell_id: str, reads: Set[str], writes: Set[str]) -> None:
+        """Replace a cell's variable mappings (edges are handled by the caller)."""
+        self._clear_variables(cell_id)
         self._cell_writes[cell_id] = writes
         self._cell_reads[cell_id] = reads
         for var in writes:
-            self._var_writers[var] = cell_id
-
-        # Add node
-        self._graph.add_node(cell_id)
-
-        # Add all edges (we know they're safe)
-        for from_cell, to_cell in new_parent_edges:
-            self._graph.add_edge(from_cell, to_cell)
+            self._var_writers.setdefault(var, set()).add(cell_id)
+        for var in reads:
+            self._var_readers.setdefault(var, set()).add(cell_id)
+
+    def _clear_variables(self, cell_id: str) -> None:
+        for cells, variables in ((self._var_writers, self._cell_writes), (self._var_readers, self._cell_reads)):
+            for var in variables.pop(cell_id, ()):
+                others = cells.get(var)
+                if others is not None:
+                    others.discard(cell_id)
+                    if not others:
+                        del cells[var]
+
+    def remove_cell(self, cell_id: str) -> dict[str, CycleDetectedError]:
+        """
+        Remove a cell from the graph.
 
-        for from_cell, to_cell in new_child_edges:
-            self._graph.add_edge(from_cell, to_cell)
+        Readers of a variable the cell defined move on to another definition.
+        In the rare case where that closes a cycle, the reading cell is
+        removed as well.
 
-    def remove_cell(self, cell_id: str) -> None:
-        """Remove a cell from the graph."""
-        if self._graph.has_node(cell_id):
-            self._graph.remove_node(cell_id)
+        Returns:
+            cell_id → CycleDetectedError for every other cell that was removed
+        """
+        if cell_id not in self._index:
+            return {}
+        old_reads = self._cell_reads.get(cell_id, set())
+        old_writes = self._cell_writes.get(cell_id, set())
+        self._clear_variables(cell_id)
+        delta = self._resolve_cell(cell_id, old_reads, old_writes, set(), set())
+        self._remove_node(cell_id)
+        self._rank.pop(cell_id, None)
+
+        # Edges of the removed cell went with it; add the rest one at a time
+        failed: dict[str, CycleDetectedError] = {}
+        for edge, step in delta.items():
+            if cell_id in edge or edge[1] in failed or edge[1] not in self._index:
+                continue
+            parent, child = self._edge_index(edge)
+            if step < 0:
+                self._remove_edges([(parent, child)])
+                continue
+            try:
+                self._add_edge(parent, child)
+            except CycleDetectedError as e:
+                failed[edge[1]] = e
+
+        errors = dict(failed)
+        for other in failed:
+            errors.update(self.remove_cell(other))
+        return errors
+
+    def has_cell(self, cell_id: str) -> bool:
+        """Whether a cell is in the graph."""
+        return cell_id in self._index
+
+    def ancestors(self, cell_id: str) -> Set[str]:
+        """Cells that cell_id depends on, directly or transitively."""
+        return set(self._ordered_closure(cell_id, self._parents, self._ancestor_cache))
+
+    def descendants(self, cell_id: str) -> Set[str]:
+        """Cells that depend on cell_id, directly or transitively."""
+        return set(self._ordered_closure(cell_id, self._children, self._descendant_cache))
+
+    def _ordered_closure(self, cell_id: str, neighbors: List[Set[int]], cache: dict) -> List[str]:
+        """Cells reachable from cell_id via neighbors, in topological order."""
+        index = self._index.get(cell_id)
+        if index is None:
+            return []
+        return [self._cells[other] for other in self._closure(index, neighbors, cache).ordered]
+
+    def _closure(self, index: int, neighbors: List[Set[int]], cache: dict) -> _Closure:
+        closure = cache.get(index)
+        if closure is not None:
+            return closure
+
+        found: Set[int] = set()
+        stack = [index]
+        while stack:
+            for other in neighbors[stack.pop()]:
+                if other in found:
+                    continue
+                found.add(other)
+                known = cache.get(other)
+                if known is not None:
+                    # Everything reachable from other is already known
+                    found |= known.members
+                else:
+                    stack.append(other)
+
+        # The order stays valid until an edge between two members changes,
+        # which also invalidates this entry
+        closure = _Closure(frozenset(found), tuple(sorted(found, key=self._position.__getitem__)))
+        if len(cache) >= CLOSURE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[index] = closure
+        return closure
+
+    def topological_order(self, cells: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Cells in an order where every cell comes after the cells it depends on.
 
-        # Clean up variable mappings
-        if cell_id in self._cell_writes:
-            old_writes = self._cell_writes[cell_id]
-            for var in old_writes:
-                if self._var_writers.get(var) == cell_id:
-                    del self._var_writers[var]
-            del self._cell_writes[cell_id]
+        Args:
+            cells: Only order these cells (default: every cell in the graph)
+        """
+        if self._sorted is None:
+            self._sorted = sorted(self._index, key=lambda cell_id: self._position[self._index[cell_id]])
+        if cells is None:
+            return list(self._sorted)
+        # Positions are global, so they order any subset too
+        return sorted(
+            (cell_id for cell_id in set(cells) if cell_id in self._index),
+            key=lambda cell_id: self._position[self._index[cell_id]],
+        )
+
+    def edges(self, cells: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """
+        Dependency edges (parent, child).
 
-        if cell_id in self._cell_reads:
-            del self._cell_reads[cell_id]
+        Args:
+            cells: Only edges between these cells (default: every edge)
+        """
+        if cells is None:
+            indices = list(self._index.values())
+        else:
+            indices = [self._index[cell_id] for cell_id in set(cells) if cell_id in self._index]
+        wanted = set(indices)
+        return [
+            (self._cells[parent], self._cells[child])
+            for parent in indices
+            for child in self._children[parent]
+            if child in wanted
+        ]
+
+    def to_networkx(self):
+        """Copy of the graph as a networkx.DiGraph (requires networkx)."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self._index)
+        graph.add_edges_from(self.edges())
+        return graph
 
     def get_execution_order(self, changed_cell_id: str) -> List[str]:
         """
@@ -163,26 +630,11 @@ class DependencyGraph:
         Returns:
             List of cell IDs in the order they should be executed
         """
-        if not self._graph.has_node(changed_cell_id):
-            return [changed_cell_id]
+        return [changed_cell_id] + self._ordered_closure(changed_cell_id, self._children, self._descendant_cache)
 
-        # Get all cells affected by this change (the cell itself + descendants)
-        affected = {changed_cell_id}
-        try:
-            affected |= nx.descendants(self._graph, changed_cell_id)
-        except nx.NetworkXError:
-            # Node doesn't exist or graph issue
-            pass
-
-        # Create subgraph and sort topologically
-        subgraph = self._graph.subgraph(affected)
-        try:
-            return list(nx.topological_sort(subgraph))
-        except nx.NetworkXError:
-            # Should not happen if DAG is valid, but return changed cell only as fallback
-            return [changed_cell_id]
-
-    def get_execution_order_with_ancestors(self, cell_id: str) -> List[str]:
+    def get_execution_order_with_ancestors(
+        self, cell_id: str, include_ancestor: Optional[Callable[[str], bool]] = None
+    ) -> List[str]:
         """
         Get the list of cells to execute when a cell is run (including stale ancestors).
 
@@ -195,28 +647,25 @@ class DependencyGraph:
 
         Args:
             cell_id: The cell to execute
+            include_ancestor: Only include ancestors for which this returns True
+                (e.g. those that haven't run yet); default all
 
         Returns:
             List of cell IDs in the order they should be executed
         """
-        if not self._graph.has_node(cell_id):
-            return [cell_id]
+        ancestors = self._ordered_closure(cell_id, self._parents, self._ancestor_cache)
+        if include_ancestor is not None:
+            ancestors = [ancestor for ancestor in ancestors if include_ancestor(ancestor)]
+        # No descendant can be an ancestor, so the concatenation is topological
+        return ancestors + self.get_execution_order(cell_id)
 
-        # Get ancestors (cells this cell depends on) + self + descendants (cells that depend on this)
-        affected = {cell_id}
-        try:
-            affected |= nx.ancestors(self._graph, cell_id)  # Add parents
-            affected |= nx.descendants(self._graph, cell_id)  # Add children
-        except nx.NetworkXError:
-            pass
-
-        # Create subgraph and sort topologically
-        # This ensures parents run before children
-        subgraph = self._graph.subgraph(affected)
-        try:
-            return list(nx.topological_sort(subgraph))
-        except nx.NetworkXError:
-            return [cell_id]
+    def readers_of(self, var: str) -> Set[str]:
+        """Cells that read a variable."""
+        return set(self._var_readers.get(var, ()))
+
+    def writers_of(self, var: str) -> Set[str]:
+        """Cells that write a variable."""
+        return set(self._var_writers.get(var, ()))
 
     def _get_cell_reads(self, cell_id: str) -> Set[str]:
         """Get the set of variables a cell reads."""
@@ -233,3 +682,4 @@ class DependencyGraph:
             'reads': self._get_cell_reads(cell_id),
             'writes': self._cell_writes.get(cell_id, set())
         }
+
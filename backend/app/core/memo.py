@@ -0,0 +1,157 @@
+"""On-disk memoization of Python cell results."""
+import hashlib
+import importlib
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+from .executor import Output
+from .fingerprint import is_stable
+
+# Where memoized cell results are kept (shared by all kernels)
+MEMO_DIR = Path(os.environ.get("KERNEL_MEMO_DIR", Path(__file__).parent.parent.parent / ".memo"))
+# Least recently used results are evicted beyond this many bytes on disk
+MEMO_MAX_BYTES = int(os.environ.get("KERNEL_MEMO_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+_ENTRY_FILE = "entry.pkl"
+
+
+class MemoEntry(NamedTuple):
+    values: Dict[str, Any]
+    outputs: List[Output]
+    stdout: str
+
+
+class MemoCache:
+    """
+    Results of `# memo` cells, stored on disk so they survive kernel restarts.
+
+    An entry is keyed on the cell's code and the fingerprints of the
+    variables it reads, and holds the values of the variables it writes
+    plus its outputs. Each entry is a directory: DataFrames are written as
+    Parquet when pyarrow is installed, everything else is pickled.
+    """
+
+    def __init__(self, directory: Path = MEMO_DIR, max_bytes: int = MEMO_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def key(self, code: str, inputs: Dict[str, Hashable]) -> Optional[str]:
+        """
+        Memo key for a cell run, or None if an input has no stable fingerprint
+        (e.g. a function or object compared by identity, which can't be
+        recognised after a restart).
+        """
+        if not all(is_stable(fp) for fp in inputs.values()):
+            return None
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(code.encode())
+        hasher.update(repr(sorted(inputs.items())).encode())
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> Optional[MemoEntry]:
+        """The stored entry for key, or None on a miss or an unreadable entry."""
+        path = self.directory / key
+        try:
+            with open(path / _ENTRY_FILE, 'rb') as f:
+                stored = pickle.load(f)
+            values = dict(stored['values'])
+            for name in stored['parquet']:
+                import pandas as pd
+                values[name] = pd.read_parquet(path / f"{name}.parquet")
+            for name, module_name in stored['modules'].items():
+                values[name] = importlib.import_module(module_name)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[Memo] Dropping unreadable entry {key}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(path)
+        return MemoEntry(values, [Output(**output) for output in stored['outputs']], stored['stdout'])
+
+    def store(self, key: str, values: Dict[str, Any], outputs: List[Output], stdout: str) -> bool:
+        """
+        Save a cell's results, then evict old entries over max_bytes.
+
+        Returns:
+            False if the values can't be stored (e.g. unpicklable objects)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.directory, prefix=".staging-"))
+        try:
+            plain: Dict[str, Any] = {}
+            parquet: List[str] = []
+            modules: Dict[str, str] = {}
+            for name, value in values.items():
+                if isinstance(value, types.ModuleType):
+                    modules[name] = value.__name__
+                elif _write_parquet(value, staging / f"{name}.parquet"):
+                    parquet.append(name)
+                else:
+                    plain[name] = value
+
+            with open(staging / _ENTRY_FILE, 'wb') as f:
+                pickle.dump({
+                    'values': plain,
+                    'parquet': parquet,
+                    'modules': modules,
+                    'outputs': [output.model_dump() for output in outputs],
+                    'stdout': stdout,
+                    'stored_at': time.time(),
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            target = self.directory / key
+            shutil.rmtree(target, ignore_errors=True)
+            # Rename is atomic, so readers never see a half-written entry
+            os.replace(staging, target)
+        except Exception as e:
+            print(f"[Memo] Not storing {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+
+        self._evict()
+        return True
+
+    def clear(self) -> None:
+        """Remove every stored entry."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for path in self.directory.iterdir():
+            if not path.is_dir() or path.name.startswith('.'):
+                continue
+            size = sum(f.stat().st_size for f in path.iterdir())
+            entries.append((path.stat().st_mtime, size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def _write_parquet(value: Any, path: Path) -> bool:
+    """Write a DataFrame as Parquet if possible (pyarrow installed, supported columns)."""
+    if type(value).__module__.split('.')[0] != 'pandas' or type(value).__name__ != 'DataFrame':
+        return False
+    try:
+        value.to_parquet(path)
+    except ImportError:
+        return False  # No Parquet engine installed
+    except Exception:
+        # e.g. non-string column names; pickle handles those
+        path.unlink(missing_ok=True)
+        return False
+    return True
@@ -0,0 +1,161 @@
+"""Result cache for SQL cells."""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+# Cached results expire after this many seconds (0 disables the cache)
+SQL_CACHE_TTL = float(os.environ.get("SQL_CACHE_TTL", "300"))
+# Least recently used results are evicted beyond this many (estimated) bytes
+SQL_CACHE_MAX_BYTES = int(os.environ.get("SQL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Values sampled per column when estimating a result's size
+_SIZE_SAMPLE = 100
+
+
+class CacheKey(NamedTuple):
+    connection_string: str
+    sql: str
+    params: tuple
+    options: tuple
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    size: int
+    stored_at: float
+
+
+class QueryCache:
+    """
+    LRU cache of query results, bounded by total size and entry age.
+
+    Thread-safe: the kernel clears it from its main thread while SQL cells
+    read and fill it on the kernel event loop.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = SQL_CACHE_MAX_BYTES,
+        ttl: float = SQL_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """The entry for key if it's still fresh (and mark it recently used)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._clock() - entry.stored_at >= self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, value: Any, size: int) -> None:
+        """Store a result, evicting the least recently used ones to make room."""
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, size, self._clock())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def age(self, entry: CacheEntry) -> float:
+        """Seconds since entry was stored."""
+        return self._clock() - entry.stored_at
+
+    def invalidate(self, connection_string: Optional[str] = None) -> int:
+        """
+        Drop cached results, all of them or only those for one connection.
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if connection_string is None or key.connection_string == connection_string
+            ]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def _remove(self, key: CacheKey) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+
+def make_key(connection_string: str, sql: str, params: list, *options: Hashable) -> Optional[CacheKey]:
+    """
+    Cache key for a parameterized query, or None if a parameter can't be hashed.
+
+    Parameters are keyed with their type, so True and 1 (equal and with
+    the same hash in Python, but bound differently) don't share an entry.
+    """
+    try:
+        frozen = tuple(_freeze(value) for value in params)
+        key = CacheKey(connection_string, _normalize_sql(sql), frozen, options)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _normalize_sql(sql: str) -> str:
+    """Drop whitespace and semicolons that don't change the query."""
+    return sql.strip().rstrip(';').rstrip()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    return (type(value).__name__, value)
+
+
+def estimate_size(columns: list) -> int:
+    """
+    Approximate memory held by a result's columns.
+
+    NumPy arrays report their buffer size; lists are estimated from a
+    sample of their values so large results aren't walked value by value.
+    """
+    total = 0
+    for column in columns:
+        values = getattr(column, 'values', column)  # pgcopy.CopyColumn
+        dtype = getattr(values, 'dtype', None)
+        if dtype is not None and dtype != object:
+            total += values.nbytes
+            continue
+        count = len(values)
+        if not count:
+            continue
+        step = max(1, count // _SIZE_SAMPLE)
+        sample = values[::step]
+        per_value = sum(sys.getsizeof(value) for value in sample) / len(sample)
+        total += int(count * (per_value + 8))  # plus the pointer to each value
+    return total
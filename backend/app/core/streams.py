@@ -0,0 +1,203 @@
+"""Live stdout/stderr capture for executing cells."""
+import io
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Optional
+
+# Minimum time between two chunks sent for the same stream
+STREAM_FLUSH_INTERVAL = float(os.environ.get("KERNEL_STREAM_FLUSH_MS", "50")) / 1000
+
+# A chunk is sent as soon as this many characters are pending
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Characters of output retained per cell (older output is dropped)
+STREAM_BUFFER_LIMIT = int(os.environ.get("KERNEL_STREAM_BUFFER_LIMIT", str(1024 * 1024)))
+
+
+class StreamCapture(io.TextIOBase):
+    """
+    Text stream that forwards writes as rate-limited chunks.
+
+    Pending text is sent to `on_chunk` at most once per flush_interval (a
+    timer picks up text written just after a send), immediately once
+    chunk_size characters are pending, and on flush(). The most recent
+    buffer_limit characters are kept in a ring buffer for getvalue().
+    """
+
+    def __init__(
+        self,
+        on_chunk: Optional[Callable[[str], None]] = None,
+        flush_interval: float = STREAM_FLUSH_INTERVAL,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        buffer_limit: int = STREAM_BUFFER_LIMIT,
+    ):
+        self._on_chunk = on_chunk
+        self._flush_interval = flush_interval
+        self._chunk_size = chunk_size
+        self._buffer_limit = buffer_limit
+
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self._last_sent = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+        self._retained: Deque[str] = deque()
+        self._retained_size = 0
+        self.truncated = False
+
+        self._lock = threading.RLock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if not text:
+            return 0
+
+        with self._lock:
+            self._retain(text)
+            if self._on_chunk is None:
+                return len(text)
+
+            self._pending.append(text)
+            self._pending_size += len(text)
+
+            if (
+                self._pending_size >= self._chunk_size
+                or time.monotonic() - self._last_sent >= self._flush_interval
+            ):
+                self._send_pending()
+            elif self._timer is None:
+                delay = self._flush_interval - (time.monotonic() - self._last_sent)
+                self._timer = threading.Timer(max(delay, 0.0), self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(text)
+
+    def flush(self) -> None:
+        """Send everything pending now."""
+        with self._lock:
+            self._send_pending()
+
+    def close(self) -> None:
+        """Send anything pending and stop the timer."""
+        with self._lock:
+            self._send_pending()
+        super().close()
+
+    def getvalue(self) -> str:
+        """Retained output (the last buffer_limit characters)."""
+        with self._lock:
+            return ''.join(self._retained)
+
+    def _send_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        text = ''.join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self._last_sent = time.monotonic()
+
+        for start in range(0, len(text), self._chunk_size):
+            self._on_chunk(text[start:start + self._chunk_size])
+
+    def _retain(self, text: str) -> None:
+        if len(text) >= self._buffer_limit:
+            self._retained.clear()
+            self._retained.append(text[-self._buffer_limit:])
+            self._retained_size = self._buffer_limit
+            self.truncated = True
+            return
+
+        self._retained.append(text)
+        self._retained_size += len(text)
+        while self._retained_size > self._buffer_limit:
+            excess = self._retained_size - self._buffer_limit
+            oldest = self._retained[0]
+            if len(oldest) <= excess:
+                self._retained.popleft()
+                self._retained_size -= len(oldest)
+            else:
+                self._retained[0] = oldest[excess:]
+                self._retained_size -= excess
+            self.truncated = True
+
+
+class _ThreadRoutedStream(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr that writes to the calling thread's
+    capture stream, or to the original stream if the thread isn't capturing.
+    """
+
+    def __init__(self, original, local: threading.local, attr: str):
+        self._original = original
+        self._local = local
+        self._attr = attr
+
+    def _target(self):
+        return getattr(self._local, self._attr, None) or self._original
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def fileno(self) -> int:
+        return self._original.fileno()
+
+    @property
+    def encoding(self):
+        return getattr(self._original, 'encoding', 'utf-8')
+
+
+_local = threading.local()
+_install_lock = threading.Lock()
+
+
+def _install_routing() -> None:
+    """Route sys.stdout/sys.stderr through per-thread targets (idempotent)."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadRoutedStream):
+            sys.stdout = _ThreadRoutedStream(sys.stdout, _local, 'stdout')
+        if not isinstance(sys.stderr, _ThreadRoutedStream):
+            sys.stderr = _ThreadRoutedStream(sys.stderr, _local, 'stderr')
+
+
+@contextmanager
+def capture_output(stdout: StreamCapture, stderr: Optional[StreamCapture] = None):
+    """
+    Capture the current thread's stdout (and optionally stderr).
+
+    Unlike contextlib.redirect_stdout this only affects the calling thread,
+    so cells running on other threads keep their own streams. Pending
+    output is flushed when the block exits.
+    """
+    _install_routing()
+    previous = (getattr(_local, 'stdout', None), getattr(_local, 'stderr', None))
+    _local.stdout = stdout
+    if stderr is not None:
+        _local.stderr = stderr
+    try:
+        yield
+    finally:
+        _local.stdout, _local.stderr = previous
+        stdout.flush()
+        if stderr is not None:
+            stderr.flush()
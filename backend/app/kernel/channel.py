@@ -0,0 +1,234 @@
+"""Kernel → coordinator output channel over a pipe."""
+import asyncio
+import os
+import pickle
+import struct
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Optional
+
+# Bytes read from the pipe per readiness callback
+_READ_CHUNK = 1 << 16
+
+# Longest a notification may sit in the kernel's batch buffer
+NOTIFICATION_FLUSH_INTERVAL = float(os.environ.get("KERNEL_NOTIFICATION_FLUSH_MS", "20")) / 1000
+
+# Buffered notifications that force a flush regardless of age
+NOTIFICATION_MAX_BATCH = 256
+
+_EOF = object()
+
+
+class OutputChannel:
+    """
+    Kernel side of the output channel.
+
+    Messages are pickled and written as length-prefixed frames. Writes are
+    serialized with a lock so any kernel thread may send.
+    """
+
+    def __init__(self, conn: Connection):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def put(self, message: dict) -> None:
+        """Send one message to the coordinator."""
+        payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.send_bytes(payload)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class NotificationBatcher:
+    """
+    Coalesces kernel notifications into batch frames.
+
+    Notifications are buffered and written as one `notification_batch` frame
+    when flush() is called (the kernel flushes when a cell starts running and
+    when a request is done), when the buffer reaches max_batch, or when the
+    oldest buffered notification is older than flush_interval.
+    """
+
+    def __init__(
+        self,
+        channel: OutputChannel,
+        flush_interval: float = NOTIFICATION_FLUSH_INTERVAL,
+        max_batch: int = NOTIFICATION_MAX_BATCH,
+    ):
+        self._channel = channel
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._buffer: list[dict] = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+
+        self._timer = threading.Thread(
+            target=self._flush_periodically,
+            name="notification-flusher",
+            daemon=True,
+        )
+        self._timer.start()
+
+    def add(self, notification: dict) -> None:
+        """Buffer a notification."""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(notification)
+            if len(self._buffer) >= self._max_batch:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write out everything buffered so far."""
+        with self._lock:
+            self._flush_locked()
+
+    def send(self, message: dict) -> None:
+        """Write a non-notification message, after anything buffered before it."""
+        with self._lock:
+            self._flush_locked()
+            self._channel.put(message)
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        if len(self._buffer) == 1:
+            self._channel.put(self._buffer[0])
+        else:
+            self._channel.put({
+                'type': 'notification_batch',
+                'notifications': self._buffer,
+            })
+        self._buffer = []
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self._flush_interval)
+            with self._lock:
+                if self._buffer and time.monotonic() - self._oldest >= self._flush_interval:
+                    self._flush_locked()
+
+
+class OutputReader:
+    """
+    Coordinator side of the output channel.
+
+    The pipe is registered with the event loop via add_reader, so messages
+    are decoded as soon as they arrive without tying up an executor thread.
+    The kernel process sentinel is watched too, so a dead kernel is noticed
+    immediately even if the pipe's write end is still open somewhere else.
+    """
+
+    def __init__(self, conn: Connection, sentinel: Optional[int] = None):
+        self._conn = conn
+        self._fd = conn.fileno()
+        self._sentinel = sentinel
+        self._buffer = bytearray()
+        self._messages: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._finished = False
+        self._closed = False
+
+    def attach(self) -> None:
+        """Start delivering messages on the running event loop."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._messages = asyncio.Queue()
+        os.set_blocking(self._fd, False)
+        self._loop.add_reader(self._fd, self._on_readable)
+        if self._sentinel is not None:
+            self._loop.add_reader(self._sentinel, self._on_kernel_exit)
+
+    async def get(self) -> dict:
+        """
+        Wait for the next message.
+
+        Raises:
+            EOFError: If the kernel exited (or the channel was closed)
+        """
+        if self._messages is None:
+            self.attach()
+        message = await self._messages.get()
+        if message is _EOF:
+            # Keep the EOF marker for any later callers
+            self._messages.put_nowait(_EOF)
+            raise EOFError("Kernel output channel closed")
+        return message
+
+    def close(self) -> None:
+        """Stop watching the pipe and close it."""
+        self._detach()
+        if not self._closed:
+            self._closed = True
+            self._conn.close()
+
+    def _on_readable(self) -> None:
+        try:
+            chunk = os.read(self._fd, _READ_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+
+        if not chunk:
+            self._finish()
+            return
+
+        self._buffer.extend(chunk)
+        self._decode_frames()
+
+    def _on_kernel_exit(self) -> None:
+        # Deliver whatever the kernel wrote before it exited, then signal EOF
+        while True:
+            try:
+                chunk = os.read(self._fd, _READ_CHUNK)
+            except (BlockingIOError, OSError):
+                break
+            if not chunk:
+                break
+            self._buffer.extend(chunk)
+        self._decode_frames()
+        self._finish()
+
+    def _decode_frames(self) -> None:
+        """Unpickle every complete frame in the buffer."""
+        # Frame layout (multiprocessing.Connection.send_bytes): 4-byte signed
+        # big-endian length, or -1 followed by an 8-byte length for huge payloads
+        buffer = self._buffer
+        offset = 0
+        while True:
+            if len(buffer) - offset < 4:
+                break
+            size, = struct.unpack_from("!i", buffer, offset)
+            header = 4
+            if size == -1:
+                if len(buffer) - offset < 12:
+                    break
+                size, = struct.unpack_from("!Q", buffer, offset + 4)
+                header = 12
+            end = offset + header + size
+            if len(buffer) < end:
+                break
+            self._messages.put_nowait(pickle.loads(buffer[offset + header:end]))
+            offset = end
+        if offset:
+            del buffer[:offset]
+
+    def _finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self._detach()
+        if self._messages is not None:
+            self._messages.put_nowait(_EOF)
+
+    def _detach(self) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.remove_reader(self._fd)
+        if self._sentinel is not None:
+            self._loop.remove_reader(self._sentinel)
@@ -0,0 +1,74 @@
+"""Long-lived asyncio event loop for the kernel's async work (SQL)."""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Coroutine, Optional
+
+
+class KernelEventLoop:
+    """
+    An asyncio loop running forever on a dedicated thread.
+
+    Coroutines are submitted from any thread with run() (blocking) or
+    submit() (returns a concurrent.futures.Future), so several SQL cells can
+    be in flight at once and loop-bound state such as connections outlives
+    a single cell.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop (started on first use)."""
+        self.start()
+        return self._loop
+
+    def start(self) -> None:
+        """Start the loop thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run_forever,
+                args=(ready,),
+                name="kernel-event-loop",
+                daemon=True,
+            )
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the loop and wait for its result."""
+        return self.submit(coro).result()
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run a plain function on the loop thread and wait for its result."""
+        async def invoke():
+            return fn(*args)
+        return self.run(invoke())
+
+    def stop(self) -> None:
+        """Stop the loop and wait for its thread to exit."""
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = None
+        if thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+    def _run_forever(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
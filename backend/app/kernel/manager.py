@@ -1,17 +1,21 @@
 """Kernel manager for process lifecycle and IPC."""
-import asyncio
+import multiprocessing
 from multiprocessing import Process, Queue
 from typing import Optional
-from .types import ExecuteRequest, ExecutionResult
+from .channel import OutputReader
 from .process import kernel_main
+from .types import InterruptRequest
 
 
 class KernelManager:
     """Manages kernel process lifecycle and IPC."""
 
-    def __init__(self):
+    def __init__(self, context=None):
+        # Multiprocessing context (e.g. the kernel pool's fork server);
+        # defaults to the platform start method
+        self._context = context or multiprocessing
         self.input_queue: Optional[Queue] = None
-        self.output_queue: Optional[Queue] = None
+        self.output_reader: Optional[OutputReader] = None
         self.process: Optional[Process] = None
         self._running = False
 
@@ -20,13 +24,19 @@ class KernelManager:
         if self._running:
             return
 
-        self.input_queue = Queue()
-        self.output_queue = Queue()
-        self.process = Process(
+        self.input_queue = self._context.Queue()
+        # Kernel → coordinator messages go over a pipe the event loop can watch
+        reader_conn, writer_conn = self._context.Pipe(duplex=False)
+        self.process = self._context.Process(
             target=kernel_main,
-            args=(self.input_queue, self.output_queue)
+            args=(self.input_queue, writer_conn)
         )
         self.process.start()
+
+        # Only the kernel may hold the write end, so its exit closes the pipe
+        writer_conn.close()
+        self.output_reader = OutputReader(reader_conn, sentinel=self.process.sentinel)
+
         self._running = True
         print(f"[KernelManager] Started kernel process (PID: {self.process.pid})")
 
@@ -42,27 +52,18 @@ class KernelManager:
         if self.process.is_alive():
             self.process.terminate()
 
+        self.output_reader.close()
         self._running = False
         print("[KernelManager] Stopped kernel process")
 
-    async def execute(self, request: ExecuteRequest) -> ExecutionResult:
+    def interrupt(self):
         """
-        Send execution request to kernel and wait for result.
+        Interrupt the running cascade (the kernel and its namespace stay).
 
-        Returns:
-            ExecutionResult with outputs, errors, and metadata
+        Handled by the kernel's control loop, which doesn't wait for cells.
         """
-        if not self._running:
-            raise RuntimeError("Kernel not running")
-
-        # Send request
-        self.input_queue.put(request.model_dump())
-
-        # Wait for result (with timeout)
-        loop = asyncio.get_event_loop()
-        result_data = await loop.run_in_executor(None, self.output_queue.get)
-
-        return ExecutionResult(**result_data)
+        if self._running:
+            self.input_queue.put(InterruptRequest().model_dump())
 
     def restart(self):
         """Restart the kernel process."""
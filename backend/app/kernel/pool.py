@@ -0,0 +1,195 @@
+"""Pool of pre-started kernels for instant session start."""
+import atexit
+import multiprocessing
+import multiprocessing.util  # noqa: F401 - see atexit registration below
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+from .manager import KernelManager
+
+# Number of idle kernels kept warm (0 disables the pool)
+KERNEL_POOL_SIZE = int(os.environ.get("KERNEL_POOL_SIZE", "2"))
+
+# Imported once by the fork server (zygote) so every kernel forked from it
+# starts with the heavy libraries already loaded. Missing optional libraries
+# are skipped by the fork server.
+KERNEL_PRELOAD_MODULES = [
+    "app.kernel.process",
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "matplotlib.pyplot",
+    "plotly.graph_objects",
+    "asyncpg",
+]
+
+# How often the replenisher re-checks idle kernels even when nothing happened
+_REPLENISH_INTERVAL = 5.0
+
+_context = None
+
+
+def get_kernel_context():
+    """
+    Multiprocessing context used to start kernels.
+
+    Uses a fork server with KERNEL_PRELOAD_MODULES preloaded where available,
+    and falls back to spawn on platforms without fork server support.
+    """
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            _context = multiprocessing.get_context("forkserver")
+            _context.set_forkserver_preload(KERNEL_PRELOAD_MODULES)
+        else:
+            _context = multiprocessing.get_context("spawn")
+    return _context
+
+
+class KernelPool:
+    """
+    Keeps a number of started, idle kernels ready to be checked out.
+
+    Kernels are single-use: a checked-out kernel belongs to its coordinator
+    and is stopped with it. A background thread tops the pool back up after
+    every checkout.
+    """
+
+    def __init__(self, size: int = KERNEL_POOL_SIZE):
+        self.size = size
+        self._idle: Deque[KernelManager] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.started = 0
+
+    def start(self) -> None:
+        """Start the background replenisher (idempotent)."""
+        with self._lock:
+            if self._thread is not None or self._closed or self.size <= 0:
+                return
+            self._thread = threading.Thread(
+                target=self._replenish_loop,
+                name="kernel-pool-replenisher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def checkout(self) -> KernelManager:
+        """
+        Get a running kernel.
+
+        Returns a warm kernel from the pool if one is available, otherwise
+        starts a cold one. Either way the pool is replenished in the background.
+        """
+        self.start()
+
+        kernel = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.process is not None and candidate.process.is_alive():
+                    kernel = candidate
+                    break
+            if kernel is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if kernel is None:
+            kernel = self._start_kernel()
+
+        self._wakeup.set()
+        return kernel
+
+    def stats(self) -> dict:
+        """Pool metrics."""
+        with self._lock:
+            checkouts = self.hits + self.misses
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / checkouts if checkouts else 0.0,
+                "kernels_started": self.started,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the replenisher and all idle kernels."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        self._wakeup.set()
+
+        for kernel in idle:
+            self._discard(kernel)
+
+    def _start_kernel(self) -> KernelManager:
+        kernel = KernelManager(context=get_kernel_context())
+        kernel.start()
+        with self._lock:
+            self.started += 1
+        return kernel
+
+    @staticmethod
+    def _discard(kernel: KernelManager) -> None:
+        """
+        Stop an idle kernel.
+
+        Idle kernels hold no user state, so they are terminated directly
+        instead of going through the queue-based shutdown (which needs a
+        feeder thread and so can't run at interpreter exit).
+        """
+        if kernel.process is not None and kernel.process.is_alive():
+            kernel.process.terminate()
+            kernel.process.join(timeout=1)
+        kernel._running = False
+
+    def _replenish_loop(self) -> None:
+        """Keep the pool filled to `size` healthy idle kernels."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                # Drop kernels that died while idle
+                alive = [k for k in self._idle if k.process and k.process.is_alive()]
+                self._idle = deque(alive)
+                missing = self.size - len(self._idle)
+
+            for _ in range(missing):
+                try:
+                    kernel = self._start_kernel()
+                except Exception as e:
+                    print(f"[KernelPool] Failed to start kernel: {e}")
+                    time.sleep(1)
+                    break
+
+                with self._lock:
+                    if self._closed:
+                        closed = True
+                    else:
+                        closed = False
+                        self._idle.append(kernel)
+                if closed:
+                    self._discard(kernel)
+                    return
+
+            self._wakeup.wait(timeout=_REPLENISH_INTERVAL)
+            self._wakeup.clear()
+
+
+kernel_pool = KernelPool()
+
+# multiprocessing.util registers an exit hook that joins all non-daemon
+# children; it's imported above so this hook is registered later and runs
+# first (atexit is LIFO), otherwise idle kernels would block interpreter exit.
+atexit.register(kernel_pool.shutdown)
@@ -1,314 +1,863 @@
 """Kernel process implementation."""
-import asyncio
+import os
+import queue
+import signal
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future
 from multiprocessing import Queue
-from typing import Dict
-from .types import ExecuteRequest
-from ..core.ast_parser import extract_python_dependencies, extract_sql_dependencies
+from multiprocessing.connection import Connection
+from typing import Dict, Hashable, Optional, Set, Tuple
+from .channel import NotificationBatcher, OutputChannel
+from .loop import KernelEventLoop
+from .scheduler import CascadeScheduler, MainThreadExecutor, clear_interrupt, interrupt_thread
+from .types import (
+    CellChannel,
+    CellNotification,
+    CellOutput,
+    ExecuteRequest,
+    FetchRowsRequest,
+    HeartbeatRequest,
+    HeartbeatResult,
+    RegisterCellRequest,
+    RegisterCellResult,
+    RegisterCellsRequest,
+    RegisterCellsResult,
+    SetCellOrderRequest,
+    SetDatabaseConfigRequest,
+    TablePage,
+    VariableLookupRequest,
+    VariableLookupResult,
+)
+from ..core.ast_parser import (
+    extract_sql_dependencies,
+    extract_sql_result_name,
+    is_memoized,
+)
+from ..core.code_cache import CodeCache
+from ..core.fingerprint import fingerprint
 from ..core.graph import DependencyGraph, CycleDetectedError
-from ..core.executor import PythonExecutor, SQLExecutor
+from ..core.executor import ExecutionResult, PythonExecutor, SQLExecutor
+from ..core.memo import MemoCache
 
 
-def kernel_main(input_queue: Queue, output_queue: Queue):
+# Rows of a table output sent with the cell result; the rest are kept in the
+# kernel and sent on request (FetchRowsRequest)
+TABLE_PAGE_SIZE = int(os.environ.get("KERNEL_TABLE_PAGE_SIZE", "500"))
+# Rows of a table output kept for those requests. Pages come from this copy
+# (the query's cursor is closed once the result is read), so it's bounded.
+TABLE_KEEP_ROWS = int(os.environ.get("KERNEL_TABLE_KEEP_ROWS", "10000"))
+
+
+def kernel_main(input_queue: Queue, output_conn: Connection):
     """
     Main loop for kernel process.
 
     Runs in a separate process and handles execution requests.
     """
-    # Initialize kernel state
-    python_executor = PythonExecutor()
-    sql_executor = SQLExecutor()
-    graph = DependencyGraph()
-    cell_registry: Dict[str, tuple[str, str]] = {}  # cell_id → (code, cell_type)
-    has_run: Dict[str, bool] = {}  # cell_id → has executed successfully
-
-    print("[Kernel] Started")
-
-    while True:
-        # Wait for request (blocking)
-        request_data = input_queue.get()
-
-        # Check for shutdown
-        if request_data.get('type') == 'shutdown':
-            print("[Kernel] Shutting down")
-            break
-
-        # Check for register_cell request
-        if request_data.get('type') == 'register_cell':
-            try:
-                from .types import RegisterCellRequest, CellNotification, CellOutput, CellChannel
-                register_req = RegisterCellRequest(**request_data)
-
-                # Extract dependencies
-                if register_req.cell_type == 'python':
-                    reads, writes = extract_python_dependencies(register_req.code)
-                else:  # sql
-                    reads = extract_sql_dependencies(register_req.code)
-                    writes = set()
-
-                # Update graph - REJECT if cycle detected
-                try:
-                    graph.update_cell(register_req.cell_id, reads, writes)
-
-                    # Store cell code for future execution only if registration succeeds
-                    cell_registry[register_req.cell_id] = (register_req.code, register_req.cell_type)
-
-                    # Invalidate has_run for this cell
-                    has_run[register_req.cell_id] = False
-
-                    # Invalidate all descendants (they depend on this cell's output)
-                    import networkx as nx
-                    try:
-                        if graph._graph.has_node(register_req.cell_id):
-                            for descendant in nx.descendants(graph._graph, register_req.cell_id):
-                                has_run[descendant] = False
-                    except nx.NetworkXError:
-                        pass  # No descendants or graph issue
-
-                    # Send metadata notification
-                    output_queue.put(CellNotification(
-                        cell_id=register_req.cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.METADATA,
-                            mimetype="application/json",
-                            data={"reads": list(reads), "writes": list(writes)}
-                        )
-                    ).model_dump())
-
-                    # Send status notification
-                    output_queue.put(CellNotification(
-                        cell_id=register_req.cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.STATUS,
-                            mimetype="application/json",
-                            data={"status": "idle"}
-                        )
-                    ).model_dump())
-
-                except CycleDetectedError as e:
-                    # Send error notification
-                    output_queue.put(CellNotification(
-                        cell_id=register_req.cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.ERROR,
-                            mimetype="application/json",
-                            data={
-                                "error_type": "CycleDetectedError",
-                                "message": str(e)
-                            }
-                        )
-                    ).model_dump())
-
-                    # Send blocked status
-                    output_queue.put(CellNotification(
-                        cell_id=register_req.cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.STATUS,
-                            mimetype="application/json",
-                            data={"status": "blocked"}
-                        )
-                    ).model_dump())
+    Kernel(NotificationBatcher(OutputChannel(output_conn))).serve(input_queue)
 
-                continue
-            except Exception as e:
-                print(f"[Kernel] Invalid register request: {e}")
-                continue
 
-        # Handle database configuration
-        if request_data.get('type') == 'set_database_config':
-            try:
-                from .types import SetDatabaseConfigRequest, CellNotification, CellOutput, CellChannel
-
-                config_req = SetDatabaseConfigRequest(**request_data)
+def _extract_dependencies(code: str, cell_type: str, code_cache: CodeCache) -> tuple[Set[str], Set[str]]:
+    """Get (reads, writes) for a cell."""
+    if cell_type == 'python':
+        return code_cache.dependencies(code)
+    # SQL cells read template variables and may bind their result (`-- as name`)
+    result_name = extract_sql_result_name(code)
+    return extract_sql_dependencies(code), {result_name} if result_name else set()
 
-                # Configure SQL executor
-                sql_executor.set_connection_string(config_req.connection_string)
 
-                print(f"[Kernel] Database configured: {config_req.connection_string}")
+class _PythonRun:
+    """A Python cell executing on some thread, as seen by interrupt()."""
 
-                # Send status notification (use special "__system__" cell_id for non-cell messages)
-                output_queue.put(CellNotification(
-                    cell_id="__system__",
-                    output=CellOutput(
-                        channel=CellChannel.STATUS,
-                        mimetype="application/json",
-                        data={"status": "db_configured"}
-                    )
-                ).model_dump())
+    __slots__ = ('thread_id', 'in_output', 'pending', 'interrupted')
 
-            except Exception as e:
-                # Send error notification
-                output_queue.put(CellNotification(
-                    cell_id="__system__",
-                    output=CellOutput(
-                        channel=CellChannel.ERROR,
-                        mimetype="application/json",
-                        data={
-                            "error_type": "DatabaseConfigError",
-                            "message": str(e)
-                        }
-                    )
-                ).model_dump())
-
-            continue
-
-        # Handle execute request (make explicit instead of fallthrough)
-        if request_data.get('type') == 'execute' or 'cell_id' in request_data:
-            try:
-                from .types import CellNotification, CellOutput, CellChannel
-                request = ExecuteRequest(**request_data)
-            except Exception as e:
-                print(f"[Kernel] Invalid execute request: {e}")
-                continue
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.in_output = 0        # > 0 while its output is being queued
+        self.pending = False      # Interrupt held back until the output is queued
+        self.interrupted = False  # KeyboardInterrupt scheduled with interrupt_thread
 
-            # Verify cell is registered
-            if request.cell_id not in cell_registry:
-                # Check if cell exists in graph but failed registration (blocked due to cycle)
-                # If so, silently skip to avoid duplicate error messages
-                if graph._graph.has_node(request.cell_id):
-                    # Cell is in graph but blocked - error already sent during registration
-                    continue
-
-                # Cell doesn't exist at all - this is unexpected, send error
-                error_msg = (
-                    f"Cell {request.cell_id} not registered. "
-                    "Cells must be registered via RegisterCellRequest before execution."
-                )
-                output_queue.put(CellNotification(
-                    cell_id=request.cell_id,
-                    output=CellOutput(
-                        channel=CellChannel.ERROR,
-                        mimetype="application/json",
-                        data={
-                            "error_type": "CellNotRegistered",
-                            "message": error_msg
-                        }
-                    )
-                ).model_dump())
-                continue
 
-            # Get execution order with only STALE ancestors
-            # (ancestors that haven't been executed yet or have changed since last execution)
-            import networkx as nx
+def _log_pool_warm_up(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"[Kernel] Could not connect to database: {future.exception()}")
 
-            if graph._graph.has_node(request.cell_id):
-                # Get all ancestors
-                all_ancestors = set(nx.ancestors(graph._graph, request.cell_id))
 
-                # Filter to only stale ancestors (not yet run)
-                stale_ancestors = {a for a in all_ancestors if not has_run.get(a, False)}
+class Kernel:
+    """
+    Kernel state and request handlers.
 
-                # Get descendants (for reactive cascade)
-                descendants = set(nx.descendants(graph._graph, request.cell_id))
+    Lives inside the kernel process; every result is reported as a
+    notification on the output channel, coalesced into batch frames.
+    """
 
-                # Combine: stale ancestors + self + descendants
-                affected = stale_ancestors | {request.cell_id} | descendants
+    def __init__(self, output: NotificationBatcher):
+        self.output = output
+        # One parse/compile per distinct Python source, shared by dependency
+        # extraction and execution
+        self.code_cache = CodeCache()
+        self.python_executor = PythonExecutor(self.code_cache)
+        self.sql_executor = SQLExecutor()
+        self.graph = DependencyGraph()
+        self.cell_registry: Dict[str, tuple[str, str]] = {}  # cell_id → (code, cell_type)
+        self.has_run: Dict[str, bool] = {}  # cell_id → has executed successfully
+        self.tables: Dict[str, dict] = {}  # cell_id → full table behind a paged output
+        self.fingerprints: Dict[str, Hashable] = {}  # variable → fingerprint of its last written value
+        self.last_inputs: Dict[str, tuple] = {}  # cell_id → (code, input fingerprints) of its last successful run
+        self.last_writes: Dict[str, dict] = {}  # cell_id → fingerprints of what its last successful run wrote
+        self.memo = MemoCache()  # Stored results of `# memo` cells
+        self.scheduler = CascadeScheduler()
+        self.loop = KernelEventLoop()  # Shared by all SQL cells
+        self.backlog: deque = deque()  # Requests read ahead of the one being handled
+        # Cascades run one at a time on the execution thread, so this loop
+        # can keep handling registrations and other control requests. Each
+        # is planned when it's requested (see _plan_request) and carries the
+        # number of interrupts before it.
+        self.executions: "queue.Queue[Optional[Tuple[tuple, int]]]" = queue.Queue()
+        # Guards the graph and per-cell state shared by both threads (not
+        # held while a cell's code runs)
+        self.state_lock = threading.RLock()
+        # Cells executing right now, for interrupt()
+        self._interrupt_lock = threading.Lock()
+        self._python_threads: Dict[str, _PythonRun] = {}  # cell_id → thread running it
+        self._sql_queries: Dict[str, Future] = {}  # cell_id → in-flight query
+        self._interrupts = 0  # interrupt() calls so far; runs requested before the last are dropped
+        # Set by serve(): the main thread, whose cells are interrupted with
+        # SIGINT, and the cell running on it
+        self._signal_thread: Optional[int] = None
+        self._signal_run: Optional[_PythonRun] = None
+
+    def serve(self, input_queue: Queue):
+        """
+        Run the kernel from the process's main thread: requests are handled
+        on a control thread (see run()) while Python cells run here, so
+        interrupt() can reach them with SIGINT even inside blocking calls.
+        """
+        main_thread_cells = MainThreadExecutor()
+        self.scheduler.python_executor = main_thread_cells
+        self._signal_thread = threading.get_ident()
+        signal.signal(signal.SIGINT, self._on_sigint)
+
+        def control():
+            try:
+                self.run(input_queue)
+            finally:
+                main_thread_cells.shutdown()
+
+        control_thread = threading.Thread(target=control, name="kernel-control")
+        control_thread.start()
+        main_thread_cells.run_until_shutdown()
+        control_thread.join()
+
+    def _on_sigint(self, signum, frame):
+        """Interrupt the cell running on the main thread, once its output is queued."""
+        run = self._signal_run
+        if run is None:
+            return
+        if run.in_output:
+            run.pending = True
+            return
+        raise KeyboardInterrupt
+
+    def run(self, input_queue: Queue):
+        """
+        Process requests until a shutdown request arrives.
+
+        This loop is the control channel: execute requests are handed to the
+        execution thread, so registrations, configuration, heartbeats and
+        interrupts are answered even while a long cascade runs.
+        """
+        print("[Kernel] Started")
+        execution_thread = threading.Thread(target=self._execution_loop, name="kernel-execution", daemon=True)
+        execution_thread.start()
+
+        while True:
+            # Wait for request (blocking)
+            request_data = self._next_request(input_queue)
+            request_type = request_data.get('type')
+
+            # Check for shutdown (after the cascades already requested)
+            if request_type == 'shutdown':
+                print("[Kernel] Shutting down")
+                self.executions.put(None)
+                execution_thread.join()
+                self.scheduler.shutdown()
+                self._close_sql_pool()
+                self.loop.stop()
+                break
+
+            if request_type == 'interrupt':
+                self.interrupt()
+            elif request_type == 'heartbeat':
+                self.handle_heartbeat(request_data)
+            # Handle execute request (make explicit instead of fallthrough)
+            elif request_type == 'execute' or (request_type is None and 'cell_id' in request_data):
+                # Registrations queued behind it don't change what it runs
+                with self.state_lock:
+                    planned = self._plan_request(request_data)
+                    if planned is not None:
+                        self.executions.put((planned, self._interrupts))
+            else:
+                with self.state_lock:
+                    self._handle_control(request_type, request_data)
+
+            # Everything a request produced goes out before the next (blocking) get
+            self.output.flush()
+
+    def _handle_control(self, request_type: str, request_data: dict):
+        if request_type == 'register_cell':
+            self.handle_register_cell(request_data)
+        elif request_type == 'register_cells':
+            self.handle_register_cells(request_data)
+        elif request_type == 'set_database_config':
+            self.handle_set_database_config(request_data)
+        elif request_type == 'fetch_rows':
+            self.handle_fetch_rows(request_data)
+        elif request_type == 'clear_sql_cache':
+            self.handle_clear_sql_cache()
+        elif request_type == 'set_cell_order':
+            self.handle_set_cell_order(request_data)
+        elif request_type == 'variable_lookup':
+            self.handle_variable_lookup(request_data)
+
+    def _execution_loop(self):
+        """Run requested cascades one at a time, until a None sentinel."""
+        while True:
+            item = self.executions.get()
+            if item is None:
+                return
+            planned, interrupts = item
+            try:
+                self._run_cascade(planned, interrupts)
+            except Exception as e:
+                print(f"[Kernel] Execution failed: {e}")
+            self.output.flush()
+
+    def handle_heartbeat(self, request_data: dict):
+        """Report that the kernel is alive and what it's running."""
+        try:
+            heartbeat_req = HeartbeatRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid heartbeat request: {e}")
+            return
+
+        with self._interrupt_lock:
+            running = sorted({*self._python_threads, *self._sql_queries})
+        self.output.send(HeartbeatResult(
+            request_id=heartbeat_req.request_id,
+            running=running,
+            queued=self.executions.qsize(),
+        ).model_dump())
+
+    def handle_variable_lookup(self, request_data: dict):
+        """Report which cells read and which define a variable."""
+        try:
+            lookup_req = VariableLookupRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid variable lookup request: {e}")
+            return
+
+        graph = self.graph
+        self.output.send(VariableLookupResult(
+            request_id=lookup_req.request_id,
+            variable=lookup_req.variable,
+            readers=graph.topological_order(graph.readers_of(lookup_req.variable)),
+            writers=graph.topological_order(graph.writers_of(lookup_req.variable)),
+        ).model_dump())
+
+    def interrupt(self):
+        """
+        Abandon the running cascade, keeping the namespace.
+
+        Running Python cells get a KeyboardInterrupt (a SIGINT on the main
+        thread, which also breaks blocking calls; an asynchronous exception
+        elsewhere), in-flight SQL queries are cancelled (asyncpg cancels
+        them on the server too), and cells that haven't started, including
+        runs still queued behind the cascade, are reported blocked.
+        """
+        with self._interrupt_lock:
+            self._interrupts += 1
+            self.scheduler.cancel()
+            for run in self._python_threads.values():
+                self._deliver_interrupt(run)
+            for query in self._sql_queries.values():
+                query.cancel()
+
+    def _deliver_interrupt(self, run: _PythonRun):
+        """Raise KeyboardInterrupt in a running cell's thread (with _interrupt_lock held)."""
+        if run.in_output:
+            run.pending = True
+        elif run.thread_id == self._signal_thread:
+            signal.pthread_kill(run.thread_id, signal.SIGINT)
+        else:
+            run.interrupted = True
+            interrupt_thread(run.thread_id)
+
+    def _next_request(self, input_queue: Queue) -> dict:
+        """
+        Take the next request, reading ahead whatever else is already queued.
+
+        A cell registration followed by another for the same cell, with only
+        registrations in between, is dropped: the later code replaces it anyway.
+        """
+        if not self.backlog:
+            self.backlog.append(input_queue.get())
+        while True:
+            try:
+                self.backlog.append(input_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        request_data = self.backlog.popleft()
+        while request_data.get('type') == 'register_cell' and self._is_superseded(request_data):
+            request_data = self.backlog.popleft()
+        return request_data
+
+    def _is_superseded(self, register_data: dict) -> bool:
+        for later in self.backlog:
+            if later.get('type') != 'register_cell':
+                return False
+            if later.get('cell_id') == register_data.get('cell_id'):
+                return True
+        return False
+
+    def _notify(self, cell_id: str, channel: CellChannel, data, mimetype: str = "application/json"):
+        """Queue a CellNotification for the coordinator."""
+        self.output.add(CellNotification(
+            cell_id=cell_id,
+            output=CellOutput(
+                channel=channel,
+                mimetype=mimetype,
+                data=data
+            )
+        ).model_dump())
+
+    def _invalidate(self, cell_id: str):
+        """Mark a cell and everything downstream of it as not run."""
+        self.has_run[cell_id] = False
+
+        # Invalidate all descendants (they depend on this cell's output)
+        for descendant in self.graph.descendants(cell_id):
+            self.has_run[descendant] = False
+
+    def handle_register_cell(self, request_data: dict):
+        """Register (or re-register) a cell in the dependency graph."""
+        try:
+            register_req = RegisterCellRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid register request: {e}")
+            return
+
+        reads, writes = _extract_dependencies(register_req.code, register_req.cell_type, self.code_cache)
+
+        # Update graph - REJECT if cycle detected
+        try:
+            self.graph.update_cell(register_req.cell_id, reads, writes)
+        except CycleDetectedError as e:
+            # Send error notification, then blocked status
+            self._notify(register_req.cell_id, CellChannel.ERROR, {
+                "error_type": "CycleDetectedError",
+                "message": str(e)
+            })
+            self._notify(register_req.cell_id, CellChannel.STATUS, {"status": "blocked"})
+            return
+
+        # Store cell code for future execution only if registration succeeds
+        self.cell_registry[register_req.cell_id] = (register_req.code, register_req.cell_type)
+        self._invalidate(register_req.cell_id)
+
+        # Send metadata notification, then status notification
+        self._notify(register_req.cell_id, CellChannel.METADATA, {
+            "reads": list(reads),
+            "writes": list(writes)
+        })
+        self._notify(register_req.cell_id, CellChannel.STATUS, {"status": "idle"})
+
+    def handle_register_cells(self, request_data: dict):
+        """
+        Register a batch of cells, building the graph in one pass.
+
+        Replies with a single RegisterCellsResult carrying every cell's
+        reads/writes (or cycle error) instead of per-cell notifications.
+        """
+        try:
+            register_req = RegisterCellsRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid register request: {e}")
+            return
+
+        dependencies: Dict[str, tuple[Set[str], Set[str]]] = {}
+        for cell in register_req.cells:
+            dependencies[cell.cell_id] = _extract_dependencies(cell.code, cell.cell_type, self.code_cache)
+
+        errors = self.graph.update_cells(dependencies)
+
+        results = []
+        for cell in register_req.cells:
+            reads, writes = dependencies[cell.cell_id]
+            error = errors.get(cell.cell_id)
+            if error is not None:
+                results.append(RegisterCellResult(
+                    cell_id=cell.cell_id,
+                    status="error",
+                    error=str(error)
+                ))
+                continue
 
-                # Topological sort
-                subgraph = graph._graph.subgraph(affected)
+            self.cell_registry[cell.cell_id] = (cell.code, cell.cell_type)
+            self._invalidate(cell.cell_id)
+            results.append(RegisterCellResult(
+                cell_id=cell.cell_id,
+                status="success",
+                reads=list(reads),
+                writes=list(writes)
+            ))
+
+        self.output.send(RegisterCellsResult(
+            request_id=register_req.request_id,
+            results=results
+        ).model_dump())
+
+    def handle_set_database_config(self, request_data: dict):
+        """Configure the SQL executor's connection string."""
+        try:
+            config_req = SetDatabaseConfigRequest(**request_data)
+
+            # Configure SQL executor (on the loop thread, which owns its pool)
+            self.loop.call(self.sql_executor.set_connection_string, config_req.connection_string)
+
+            # Open the pool in the background so the first query doesn't pay
+            # for connecting; if this fails, queries retry and report the error
+            self.loop.submit(self.sql_executor.connect()).add_done_callback(_log_pool_warm_up)
+
+            print(f"[Kernel] Database configured: {config_req.connection_string}")
+
+            # Send status notification (use special "__system__" cell_id for non-cell messages)
+            self._notify("__system__", CellChannel.STATUS, {"status": "db_configured"})
+
+        except Exception as e:
+            self._notify("__system__", CellChannel.ERROR, {
+                "error_type": "DatabaseConfigError",
+                "message": str(e)
+            })
+
+    def handle_fetch_rows(self, request_data: dict):
+        """Send a page of a cell's table output."""
+        try:
+            request = FetchRowsRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid fetch rows request: {e}")
+            return
+
+        table = self.tables.get(request.cell_id)
+        if table is None:
+            return
+
+        rows = table['rows']
+        self.output.send(TablePage(
+            cell_id=request.cell_id,
+            offset=request.offset,
+            rows=rows[request.offset:request.offset + request.limit],
+            total_rows=len(rows)
+        ).model_dump())
+
+    def handle_set_cell_order(self, request_data: dict):
+        """Drop deleted cells and re-resolve shadowed variables for the new order."""
+        try:
+            order_req = SetCellOrderRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid cell order request: {e}")
+            return
+
+        listed = set(order_req.cell_ids)
+        for cell_id in [c for c in self.cell_registry if c not in listed]:
+            self._forget_cell(cell_id)
+            for other_id, error in self.graph.remove_cell(cell_id).items():
+                # Its reads now resolve to a definition that closes a cycle
+                self._forget_cell(other_id)
+                self._notify(other_id, CellChannel.ERROR, {
+                    "error_type": "CycleDetectedError",
+                    "message": str(error)
+                })
+                self._notify(other_id, CellChannel.STATUS, {"status": "blocked"})
+
+        try:
+            self.graph.set_cell_order(order_req.cell_ids)
+        except CycleDetectedError as e:
+            print(f"[Kernel] Keeping previous cell order: {e}")
+
+    def _forget_cell(self, cell_id: str):
+        for state in (self.cell_registry, self.has_run, self.tables, self.last_inputs, self.last_writes):
+            state.pop(cell_id, None)
+
+    def handle_clear_sql_cache(self):
+        """Drop cached SQL results so the next run of each SQL cell queries the database."""
+        dropped = self.sql_executor.invalidate_cache()
+        print(f"[Kernel] Cleared {dropped} cached SQL result(s)")
+
+    def _execute_python(
+        self, cell_id: str, code: str, inputs: Dict[str, Hashable], writes: Set[str]
+    ) -> ExecutionResult:
+        """
+        Run a Python cell, streaming its output.
+
+        `# memo` cells are restored from the memo cache instead when it has
+        results for the same code and input values, and stored in it after
+        a successful run.
+        """
+        memo_key = None
+        if is_memoized(code):
+            # Names the cell both reads and writes (`x += 1`) are keyed on
+            # their value before it runs, like any other input
+            memo_key = self.memo.key(code, inputs)
+        if memo_key is not None:
+            entry = self.memo.load(memo_key)
+            if entry is not None:
+                self.python_executor.globals_dict.update(entry.values)
+                stdout = "[memo] Restored from cache\n" + entry.stdout
+                self._notify(cell_id, CellChannel.STDOUT, stdout, mimetype="text/plain")
+                return ExecutionResult(status='success', stdout=stdout, outputs=entry.outputs)
+
+        run = _PythonRun(threading.get_ident())
+        with self._interrupt_lock:
+            if self.scheduler.cancelled:
+                return ExecutionResult(status='error', error='KeyboardInterrupt')
+            self._python_threads[cell_id] = run
+            if run.thread_id == self._signal_thread:
+                self._signal_run = run
+        try:
+            result = self.python_executor.execute(
+                code,
+                on_stdout=lambda text: self._send_output(run, cell_id, CellChannel.STDOUT, text),
+                on_stderr=lambda text: self._send_output(run, cell_id, CellChannel.STDERR, text),
+            )
+        except KeyboardInterrupt:
+            # Interrupted outside the cell's own code
+            result = ExecutionResult(status='error', error='KeyboardInterrupt')
+        finally:
+            # An interrupt arriving as the cell finishes is withdrawn (or, if
+            # already raised, swallowed) so it can't hit this thread later
+            while True:
                 try:
-                    cells_to_run = list(nx.topological_sort(subgraph))
-                except nx.NetworkXError:
-                    cells_to_run = [request.cell_id]
+                    with self._interrupt_lock:
+                        self._python_threads.pop(cell_id, None)
+                        if self._signal_run is run:
+                            self._signal_run = None
+                        clear_interrupt(run.thread_id)
+                    break
+                except KeyboardInterrupt:
+                    pass
+
+        if memo_key is not None and result.status == 'success':
+            namespace = self.python_executor.globals_dict
+            values = {name: namespace[name] for name in writes if name in namespace}
+            self.memo.store(memo_key, values, result.outputs, result.stdout)
+        return result
+
+    def _mutated_inputs(self, inputs: Dict[str, Hashable], writes: Set[str]) -> Set[str]:
+        """
+        Variables a cell read whose values it changed in place (e.g.
+        `lst.append(1)`, `df.sort_values('v', inplace=True)`), found by
+        fingerprinting them again after the run.
+        """
+        namespace = self.python_executor.globals_dict
+        return {
+            name for name, fp in inputs.items()
+            if name not in writes and name in namespace and fingerprint(namespace[name]) != fp
+        }
+
+    def _send_output(self, run: _PythonRun, cell_id: str, channel: CellChannel, text: str):
+        """
+        Queue stdout/stderr of a running cell.
+
+        Interrupts are held back until it's queued (a KeyboardInterrupt
+        inside the batcher could leave a frame half-written on the pipe),
+        then raised in the cell's code: here if this is the cell's thread,
+        otherwise (output flushed by the stream's timer) re-sent to it.
+        """
+        own_thread = threading.get_ident() == run.thread_id
+        with self._interrupt_lock:
+            run.in_output += 1
+            if own_thread and run.interrupted:
+                # Not raised yet: withdraw it and raise it afterwards instead
+                clear_interrupt(run.thread_id)
+                run.interrupted = False
+                run.pending = True
+        try:
+            self._notify(cell_id, channel, text, mimetype="text/plain")
+        finally:
+            with self._interrupt_lock:
+                run.in_output -= 1
+                interrupted = run.pending and not run.in_output
+                if interrupted:
+                    run.pending = False
+                    if not own_thread and self._python_threads.get(cell_id) is run:
+                        self._deliver_interrupt(run)
+        if interrupted and own_thread:
+            raise KeyboardInterrupt
+
+    def _record_writes(self, writes: Set[str]) -> None:
+        """Fingerprint the current values of a cell's written variables."""
+        namespace = self.python_executor.globals_dict
+        for name in writes:
+            self.fingerprints[name] = fingerprint(namespace[name]) if name in namespace else None
+
+    def _execute_sql(self, cell_id: str, code: str, use_cache: bool) -> ExecutionResult:
+        """
+        Run a SQL cell on the kernel's persistent loop; other SQL cells of
+        the cascade can be in flight at the same time.
+
+        Only cells re-run by the cascade (use_cache) may be answered from
+        the result cache; the cell the user ran always queries the database.
+        """
+        query = self.loop.submit(
+            self.sql_executor.execute(code, self.python_executor.globals_dict, use_cache=use_cache)
+        )
+        with self._interrupt_lock:
+            if self.scheduler.cancelled:
+                query.cancel()
+            self._sql_queries[cell_id] = query
+        try:
+            return query.result()
+        except CancelledError:
+            return ExecutionResult(status='error', error='Query cancelled (interrupted)')
+        finally:
+            with self._interrupt_lock:
+                self._sql_queries.pop(cell_id, None)
+
+    def _page_table(self, cell_id: str, data):
+        """
+        Cut a large table output down to its first page.
+
+        Up to TABLE_KEEP_ROWS rows are kept for handle_fetch_rows (not for
+        cells deleted while they ran); the output carries total_rows so
+        clients know more rows are available.
+        """
+        if not (isinstance(data, dict) and data.get('type') == 'table'):
+            return data
+        rows = data.get('rows', [])
+        if len(rows) <= TABLE_PAGE_SIZE:
+            return data
+
+        kept = rows[:TABLE_KEEP_ROWS]
+        if len(kept) < len(rows):
+            data = {**data, 'rows': kept, 'truncated': f"Only the first {len(kept)} rows are kept for paging"}
+        if cell_id in self.cell_registry:
+            self.tables[cell_id] = data
+        return {**data, 'rows': rows[:TABLE_PAGE_SIZE], 'total_rows': len(kept)}
+
+    def _close_sql_pool(self):
+        try:
+            self.loop.submit(self.sql_executor.close()).result(timeout=5)
+        except Exception as e:
+            print(f"[Kernel] Error closing database pool: {e}")
+
+    def handle_execute(self, request_data: dict):
+        """Run a cell plus its stale ancestors and all descendants."""
+        with self.state_lock:
+            planned = self._plan_request(request_data)
+        if planned is not None:
+            self._run_cascade(planned)
+
+    def _plan_request(self, request_data: dict) -> Optional[tuple]:
+        """
+        Plan an execute request against the current graph (with state_lock
+        held): (cell_id, _plan_cascade's plan, code registered now), or None
+        if there's nothing to run.
+        """
+        try:
+            request = ExecuteRequest(**request_data)
+        except Exception as e:
+            print(f"[Kernel] Invalid execute request: {e}")
+            return None
+
+        plan = self._plan_cascade(request.cell_id)
+        if plan is None:
+            return None
+        registry = {cell_id: self.cell_registry[cell_id] for cell_id in plan[0]}
+        return request.cell_id, plan, registry
+
+    def _run_cascade(self, planned: tuple, interrupts: Optional[int] = None):
+        """
+        Run a cascade planned by _plan_request.
+
+        Cells run the code they had when the run was requested, even if
+        edited since. A run requested before the last interrupt (interrupts
+        is the count when it was requested) is reported blocked instead.
+        """
+        cell_id, (cells_to_run, edges, descendants, python_cells), registry = planned
+
+        with self._interrupt_lock:
+            interrupted = interrupts is not None and interrupts != self._interrupts
+            if not interrupted:
+                # Interrupts from here on stop this cascade
+                self.scheduler.reset()
+        if interrupted:
+            self._notify(cell_id, CellChannel.STATUS, {"status": "blocked"})
+            return
+
+        # Stale ancestors a run queued before this one has brought up to date
+        with self.state_lock:
+            done = {
+                c for c in cells_to_run
+                if c != cell_id and c not in descendants and self.has_run.get(c, False)
+            }
+        if done:
+            cells_to_run = [c for c in cells_to_run if c not in done]
+            edges = [(parent, child) for parent, child in edges if parent not in done and child not in done]
+
+        # Run independent branches concurrently, each cell once its parents
+        # are done, while registrations and other control requests keep
+        # being handled
+        not_run = self.scheduler.run(
+            cells_to_run,
+            edges,
+            # Descendants whose inputs come out unchanged are skipped
+            lambda c: self._run_cell(c, registry[c], skippable=descendants),
+            is_python=python_cells.__contains__,
+        )
+
+        # Interrupted: the rest of the cascade waits for the next run
+        with self.state_lock:
+            for c in not_run:
+                self.has_run[c] = False
+        for c in not_run:
+            self._notify(c, CellChannel.STATUS, {"status": "blocked"})
+
+    def _plan_cascade(self, cell_id: str) -> Optional[tuple]:
+        """
+        (cells to run in order, edges between them, descendants, Python
+        cells) for running cell_id, or None if it can't run.
+        """
+        # Verify cell is registered
+        if cell_id not in self.cell_registry:
+            # Check if cell exists in graph but failed registration (blocked due to cycle)
+            # If so, silently skip to avoid duplicate error messages
+            if self.graph.has_cell(cell_id):
+                # Cell is in graph but blocked - error already sent during registration
+                return None
+
+            # Cell doesn't exist at all - this is unexpected, send error
+            error_msg = (
+                f"Cell {cell_id} not registered. "
+                "Cells must be registered via RegisterCellRequest before execution."
+            )
+            self._notify(cell_id, CellChannel.ERROR, {
+                "error_type": "CellNotRegistered",
+                "message": error_msg
+            })
+            return None
+
+        # Get execution order with only STALE ancestors
+        # (ancestors that haven't been executed yet or have changed since last execution)
+        graph = self.graph
+        if graph.has_cell(cell_id):
+            # Stale ancestors (not yet run) + self + descendants (for reactive
+            # cascade), in topological order
+            cells_to_run = graph.get_execution_order_with_ancestors(
+                cell_id,
+                include_ancestor=lambda a: not self.has_run.get(a, False),
+            )
+            descendants = graph.descendants(cell_id)
+            edges = graph.edges(cells_to_run)
+        else:
+            # Cell not registered yet in graph, just run it
+            cells_to_run = [cell_id]
+            edges = []
+            descendants = set()
+
+        # Cells that haven't been registered yet (shouldn't happen) are skipped
+        cells_to_run = [c for c in cells_to_run if c in self.cell_registry]
+        python_cells = {c for c in cells_to_run if self.cell_registry[c][1] == 'python'}
+        return cells_to_run, edges, descendants, python_cells
+
+    def _run_cell(
+        self, cell_id: str, registered: Optional[Tuple[str, str]] = None, skippable: Set[str] = frozenset()
+    ):
+        """
+        Execute a single registered cell and stream its results.
+
+        registered is the (code, type) to run, if not the cell's current
+        registration (e.g. it was edited after the run was requested).
+
+        A cell in skippable isn't executed if its code and the values of
+        everything it reads are the same as at its last successful run, and
+        no other definition has replaced what it wrote since; its previous
+        outputs stay, and it's reported with status "skipped". Cells with
+        side effects beyond their writes (e.g. `df['c'] = ...` on another
+        cell's DataFrame) always run.
+        """
+        with self.state_lock:
+            if cell_id not in self.cell_registry:
+                # Deleted while the cascade was running
+                return
+            cell_code, cell_type = registered or self.cell_registry[cell_id]
+            cell_reads, cell_writes = _extract_dependencies(cell_code, cell_type, self.code_cache)
+            analysis = self.code_cache.analyze(cell_code) if cell_type == 'python' else None
+            inputs = (cell_code, {name: self.fingerprints.get(name) for name in cell_reads})
+
+            if (
+                cell_id in skippable
+                and not (analysis is not None and analysis.has_side_effects)
+                and self.last_inputs.get(cell_id) == inputs
+                and all(self.fingerprints.get(name) == fp for name, fp in self.last_writes.get(cell_id, {}).items())
+            ):
+                self.has_run[cell_id] = True
+                self._notify(cell_id, CellChannel.STATUS, {"status": "skipped"})
+                return
+
+            self.tables.pop(cell_id, None)
+
+        # Send status: running (flushed now, together with the previous
+        # cell's results, so clients see it before execution starts)
+        self._notify(cell_id, CellChannel.STATUS, {"status": "running"})
+        self.output.flush()
+
+        # Execute (Python output is streamed to clients while the cell runs)
+        if cell_type == 'python':
+            exec_result = self._execute_python(cell_id, cell_code, inputs[1], cell_writes)
+        else:
+            exec_result = self._execute_sql(cell_id, cell_code, use_cache=cell_id in skippable)
+
+        # Send SQL log output (Python stdout was already streamed)
+        if cell_type != 'python' and exec_result.stdout:
+            self._notify(cell_id, CellChannel.STDOUT, exec_result.stdout, mimetype="text/plain")
+
+        status = "success" if exec_result.status == "success" else "error"
+        with self.state_lock:
+            # Send outputs (plots, tables, etc.); large tables go out one page at a time
+            for output in exec_result.outputs:
+                data = self._page_table(cell_id, output.data)
+                self._notify(cell_id, CellChannel.OUTPUT, data, mimetype=output.mime_type)
+
+            # Send status: success or error
+            self._notify(cell_id, CellChannel.STATUS, {"status": status})
+
+            # Mark cell as successfully run if execution succeeded (values it
+            # modified in place changed too), unless it was edited meanwhile
+            mutated = self._mutated_inputs(inputs[1], cell_writes) if cell_type == 'python' else set()
+            mutated |= analysis.mutates if analysis is not None else set()
+            self._record_writes(cell_writes | mutated)
+            if status == "success":
+                if self.cell_registry.get(cell_id) == (cell_code, cell_type):
+                    self.has_run[cell_id] = True
+                self.last_writes[cell_id] = {name: self.fingerprints[name] for name in cell_writes}
+            if status == "success" and not mutated:
+                self.last_inputs[cell_id] = inputs
             else:
-                # Cell not registered yet in graph, just run it
-                cells_to_run = [request.cell_id]
-
-
-            # Execute all affected cells in topological order
-            for cell_id in cells_to_run:
-                if cell_id not in cell_registry:
-                    # Cell hasn't been registered yet (shouldn't happen)
-                    continue
-
-                cell_code, cell_type = cell_registry[cell_id]
-
-                # Send status: running
-                output_queue.put(CellNotification(
-                    cell_id=cell_id,
-                    output=CellOutput(
-                        channel=CellChannel.STATUS,
-                        mimetype="application/json",
-                        data={"status": "running"}
-                    )
-                ).model_dump())
-
-                # Execute
-                if cell_type == 'python':
-                    exec_result = python_executor.execute(cell_code)
-                    cell_reads, cell_writes = extract_python_dependencies(cell_code)
-                else:
-                    # SQL execution (async)
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        exec_result = loop.run_until_complete(
-                            sql_executor.execute(cell_code, python_executor.globals_dict)
-                        )
-                    finally:
-                        loop.close()
-                    cell_reads = extract_sql_dependencies(cell_code)
-                    cell_writes = set()
-
-                # Send stdout (if any)
-                if exec_result.stdout:
-                    output_queue.put(CellNotification(
-                        cell_id=cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.STDOUT,
-                            mimetype="text/plain",
-                            data=exec_result.stdout
-                        )
-                    ).model_dump())
-
-                # Send outputs (plots, tables, etc.)
-                for output in exec_result.outputs:
-                    output_queue.put(CellNotification(
-                        cell_id=cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.OUTPUT,
-                            mimetype=output.mime_type,
-                            data=output.data
-                        )
-                    ).model_dump())
-
-                # Send status: success or error
-                status = "success" if exec_result.status == "success" else "error"
-                output_queue.put(CellNotification(
-                    cell_id=cell_id,
-                    output=CellOutput(
-                        channel=CellChannel.STATUS,
-                        mimetype="application/json",
-                        data={"status": status}
-                    )
-                ).model_dump())
-
-                # Mark cell as successfully run if execution succeeded
-                if status == "success":
-                    has_run[cell_id] = True
-
-                # Send error details (if any)
-                if exec_result.error:
-                    output_queue.put(CellNotification(
-                        cell_id=cell_id,
-                        output=CellOutput(
-                            channel=CellChannel.ERROR,
-                            mimetype="application/json",
-                            data={
-                                "error_type": "RuntimeError",
-                                "message": exec_result.error
-                            }
-                        )
-                    ).model_dump())
-
-                # Send metadata (dependency info)
-                output_queue.put(CellNotification(
-                    cell_id=cell_id,
-                    output=CellOutput(
-                        channel=CellChannel.METADATA,
-                        mimetype="application/json",
-                        data={
-                            "reads": list(cell_reads),
-                            "writes": list(cell_writes)
-                        }
-                    )
-                ).model_dump())
+                # Its inputs only match what it left behind, so it must run next time
+                self.last_inputs.pop(cell_id, None)
+
+        # Send error details (if any)
+        if exec_result.error:
+            self._notify(cell_id, CellChannel.ERROR, {
+                "error_type": "RuntimeError",
+                "message": exec_result.error
+            })
+
+        # Send metadata (dependency info)
+        self._notify(cell_id, CellChannel.METADATA, {
+            "reads": list(cell_reads),
+            "writes": list(cell_writes)
+        })
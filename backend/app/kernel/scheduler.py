@@ -0,0 +1,185 @@
+"""Concurrent execution of independent cells in a cascade."""
+import ctypes
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Cells of one cascade that may run at the same time
+MAX_PARALLEL_CELLS = int(os.environ.get("KERNEL_MAX_PARALLEL_CELLS", "4"))
+
+# Python cells share one namespace (and global library state such as pyplot),
+# so by default they run one at a time; SQL cells always run concurrently
+PARALLEL_PYTHON = os.environ.get("KERNEL_PARALLEL_PYTHON", "0") == "1"
+
+
+def interrupt_thread(thread_id: int) -> None:
+    """
+    Raise KeyboardInterrupt in another thread.
+
+    It's raised when the thread next executes Python bytecode, so a
+    blocking C call (e.g. time.sleep) is only interrupted when it returns;
+    only a signal to the main thread can cut one short (see
+    MainThreadExecutor).
+    """
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(KeyboardInterrupt))
+
+
+def clear_interrupt(thread_id: int) -> None:
+    """Withdraw an interrupt_thread() that hasn't been raised yet."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+
+
+class MainThreadExecutor(Executor):
+    """
+    Executor whose work runs on the thread that calls run_until_shutdown()
+    (the kernel process's main thread).
+
+    Signal handlers run on the main thread, and a signal sent to it breaks
+    blocking calls such as time.sleep, so cells run here can be interrupted
+    with SIGINT wherever they are.
+    """
+
+    def __init__(self):
+        self._work: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        self._work.put((future, fn, args, kwargs))
+        return future
+
+    def run_until_shutdown(self) -> None:
+        """Run submitted work until shutdown() is called."""
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._work.put(None)
+
+
+class CascadeScheduler:
+    """
+    Runs a set of cells as soon as the cells they depend on have finished.
+
+    Cells whose dependencies are done form a ready set; ready cells are
+    started in the given (topological) order on a thread pool, up to
+    max_workers at a time. Python cells are additionally limited to one at
+    a time unless parallel_python is set; they run on python_executor if
+    one is set (e.g. a MainThreadExecutor), otherwise on the pool.
+
+    cancel() (from any thread) stops the current or next run from starting
+    more cells, until reset(); the cells already running are left to finish.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MAX_PARALLEL_CELLS,
+        parallel_python: bool = PARALLEL_PYTHON,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.parallel_python = parallel_python
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="cell",
+        )
+        self._cancelled = threading.Event()
+        self.python_executor: Optional[Executor] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the current run has been cancelled."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Start no more cells of the current run (or of the next, if none is running)."""
+        self._cancelled.set()
+
+    def reset(self) -> None:
+        """Let runs start cells again after cancel()."""
+        self._cancelled.clear()
+
+    def run(
+        self,
+        order: List[str],
+        edges: Iterable[Tuple[str, str]],
+        run_cell: Callable[[str], None],
+        is_python: Callable[[str], bool],
+    ) -> List[str]:
+        """
+        Run every cell in `order`, respecting `edges`, and wait for all of them.
+
+        Args:
+            order: Cells to run, topologically sorted (also the start priority)
+            edges: (parent, child) dependencies; edges to cells outside `order` are ignored
+            run_cell: Executes one cell (called on a worker thread)
+            is_python: Whether a cell is a Python cell
+
+        Returns:
+            Cells that weren't started because the run was cancelled
+        """
+        priority = {cell_id: i for i, cell_id in enumerate(order)}
+        waiting_on: Dict[str, int] = {cell_id: 0 for cell_id in order}
+        children: Dict[str, List[str]] = {cell_id: [] for cell_id in order}
+        for parent, child in edges:
+            if parent in priority and child in priority:
+                waiting_on[child] += 1
+                children[parent].append(child)
+
+        ready = [cell_id for cell_id in order if waiting_on[cell_id] == 0]
+        running: Dict[Future, str] = {}
+        started = set()
+        python_running = 0
+
+        while ready or running:
+            if self._cancelled.is_set():
+                ready = []
+            ready.sort(key=priority.__getitem__)
+            deferred = []
+            for cell_id in ready:
+                python = is_python(cell_id)
+                if len(running) >= self.max_workers or (
+                    python and python_running and not self.parallel_python
+                ):
+                    deferred.append(cell_id)
+                    continue
+                executor = self._executor
+                if python and self.python_executor is not None and not self.parallel_python:
+                    executor = self.python_executor
+                running[executor.submit(run_cell, cell_id)] = cell_id
+                started.add(cell_id)
+                if python:
+                    python_running += 1
+            ready = deferred
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell_id = running.pop(future)
+                if is_python(cell_id):
+                    python_running -= 1
+
+                exc = future.exception()
+                if exc is not None:
+                    print(f"[Kernel] Cell {cell_id} failed unexpectedly: {exc}")
+                    traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+                # Dependents run even if this cell failed (same as a serial cascade)
+                for child in children[cell_id]:
+                    waiting_on[child] -= 1
+                    if waiting_on[child] == 0:
+                        ready.append(child)
+
+        return [cell_id for cell_id in order if cell_id not in started]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
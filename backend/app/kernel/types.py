@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field
 from enum import Enum
 
 CellType = Literal["python", "sql"]
-CellStatus = Literal["idle", "running", "success", "error", "blocked"]
+CellStatus = Literal["idle", "running", "success", "error", "blocked", "skipped"]
 
 
 class CellChannel(str, Enum):
@@ -13,7 +13,7 @@ class CellChannel(str, Enum):
     OUTPUT = "output"           # Cell's final output (rich display)
     STDOUT = "stdout"           # Print statements
     STDERR = "stderr"           # Error output
-    STATUS = "status"           # Cell status changes (idle/running/success/error/blocked)
+    STATUS = "status"           # Cell status changes (idle/running/success/error/blocked/skipped)
     ERROR = "error"             # Error details (tracebacks, cycle errors)
     METADATA = "metadata"       # Dependency metadata (reads/writes)
 
@@ -36,6 +36,12 @@ class CellNotification(BaseModel):
     output: CellOutput
 
 
+class NotificationBatch(BaseModel):
+    """Several CellNotifications coalesced into one kernel → coordinator frame."""
+    type: Literal["notification_batch"] = "notification_batch"
+    notifications: list[CellNotification]
+
+
 class Output(BaseModel):
     """Rich output from code execution."""
     mime_type: str
@@ -61,6 +67,20 @@ class RegisterCellResult(BaseModel):
     writes: list[str] = Field(default_factory=list)
 
 
+class RegisterCellsRequest(BaseModel):
+    """Request to register many cells at once (e.g. when a notebook is opened)."""
+    type: Literal["register_cells"] = "register_cells"
+    request_id: str
+    cells: list[RegisterCellRequest]
+
+
+class RegisterCellsResult(BaseModel):
+    """Single acknowledgement for a RegisterCellsRequest, one result per cell."""
+    type: Literal["register_cells_result"] = "register_cells_result"
+    request_id: str
+    results: list[RegisterCellResult]
+
+
 class ExecuteRequest(BaseModel):
     """Request to execute a cell."""
     cell_id: str
@@ -80,6 +100,69 @@ class ExecutionResult(BaseModel):
     metadata: dict[str, Any] | None = None
 
 
+class FetchRowsRequest(BaseModel):
+    """Request for more rows of a cell's paged table output."""
+    type: Literal["fetch_rows"] = "fetch_rows"
+    cell_id: str
+    offset: int = Field(ge=0)
+    limit: int = Field(gt=0)
+
+
+class SetCellOrderRequest(BaseModel):
+    """Request to update the notebook's cell order (cells left out were deleted)."""
+    type: Literal["set_cell_order"] = "set_cell_order"
+    cell_ids: list[str]
+
+
+class ClearSQLCacheRequest(BaseModel):
+    """Request to drop all cached SQL query results."""
+    type: Literal["clear_sql_cache"] = "clear_sql_cache"
+
+
+class InterruptRequest(BaseModel):
+    """Request to stop the running cascade, keeping the namespace."""
+    type: Literal["interrupt"] = "interrupt"
+
+
+class HeartbeatRequest(BaseModel):
+    """Liveness check, answered even while cells are running."""
+    type: Literal["heartbeat"] = "heartbeat"
+    request_id: str
+
+
+class HeartbeatResult(BaseModel):
+    """Acknowledgement of a HeartbeatRequest."""
+    type: Literal["heartbeat_result"] = "heartbeat_result"
+    request_id: str
+    running: list[str]  # Cells executing right now
+    queued: int  # Run requests waiting for the current cascade
+
+
+class VariableLookupRequest(BaseModel):
+    """Request for the cells that read and write a variable, answered even while cells are running."""
+    type: Literal["variable_lookup"] = "variable_lookup"
+    request_id: str
+    variable: str
+
+
+class VariableLookupResult(BaseModel):
+    """Acknowledgement of a VariableLookupRequest."""
+    type: Literal["variable_lookup_result"] = "variable_lookup_result"
+    request_id: str
+    variable: str
+    readers: list[str]  # Cells that read the variable, in execution order
+    writers: list[str]  # Cells that define it, in execution order
+
+
+class TablePage(BaseModel):
+    """Rows [offset, offset + len(rows)) of a cell's table output."""
+    type: Literal["table_page"] = "table_page"
+    cell_id: str
+    offset: int
+    rows: list[list[Any]]
+    total_rows: int
+
+
 class ShutdownRequest(BaseModel):
     """Request to shut down the kernel."""
     type: Literal["shutdown"] = "shutdown"
@@ -3,7 +3,7 @@ from pydantic import BaseModel, Field
 
 # Cell Types
 CellType = Literal["python", "sql"]
-CellStatus = Literal["idle", "running", "success", "error", "blocked"]
+CellStatus = Literal["idle", "running", "success", "error", "blocked", "skipped"]
 
 # Output Models
 class TableData(BaseModel):
@@ -11,6 +11,7 @@ class TableData(BaseModel):
     columns: list[str]
     rows: list[list[str | int | float | bool | None]]
     truncated: Optional[str] = None
+    total_rows: Optional[int] = None  # Set when only the first page of rows is included
 
 class OutputResponse(BaseModel):
     mime_type: str
@@ -1,19 +1,49 @@
 """Coordinates notebook execution and WebSocket broadcasting."""
 import asyncio
-import queue
-from typing import Optional, List
+import contextlib
+from typing import Dict, Optional, List
+from uuid import uuid4
 from ..file_storage import NotebookFileStorage
 from ..models import NotebookResponse
 from ..kernel.manager import KernelManager
+from ..kernel.pool import kernel_pool
 from ..kernel.types import (
+    CellChannel,
+    CellNotification,
+    ClearSQLCacheRequest,
     ExecuteRequest,
     ExecutionResult,
+    FetchRowsRequest,
+    HeartbeatRequest,
+    HeartbeatResult,
+    NotificationBatch,
     RegisterCellRequest,
     RegisterCellResult,
+    RegisterCellsRequest,
+    RegisterCellsResult,
+    SetCellOrderRequest,
     SetDatabaseConfigRequest,
     SetDatabaseConfigResult,
+    TablePage,
+    VariableLookupRequest,
+    VariableLookupResult,
 )
 
+# Upper bound on waiting for the kernel to acknowledge notebook registration
+REGISTER_TIMEOUT_SECONDS = 60.0
+
+# How long heartbeat() and variable_lookup() wait for the kernel to answer
+HEARTBEAT_TIMEOUT_SECONDS = 5.0
+
+# Edits to a cell within this window of each other are saved and registered once
+CELL_UPDATE_DEBOUNCE_SECONDS = 0.1
+
+# Kernel acknowledgements routed to the request waiting for them (by request_id)
+_CONTROL_RESULTS = {
+    'heartbeat_result': HeartbeatResult,
+    'variable_lookup_result': VariableLookupResult,
+}
+
 
 class NotebookCoordinator:
     """
@@ -23,9 +53,8 @@ class NotebookCoordinator:
     """
 
     def __init__(self, broadcaster):
-        # Use kernel instead of in-process execution
-        self.kernel = KernelManager()
-        self.kernel.start()
+        # Check out a warm kernel (falls back to a cold start if the pool is empty)
+        self.kernel: KernelManager = kernel_pool.checkout()
 
         self.broadcaster = broadcaster
         self.notebook_id: Optional[str] = None
@@ -35,54 +64,115 @@ class NotebookCoordinator:
         self._running = True
         self._output_task: Optional[asyncio.Task] = None
 
+        # Requests awaiting a kernel acknowledgement (request_id → future)
+        self._pending_acks: Dict[str, asyncio.Future] = {}
+
+        # Cells with edits not yet saved and registered (cell_id → timer)
+        self._pending_updates: Dict[str, asyncio.TimerHandle] = {}
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the coordinator is running with a live kernel process."""
+        return (
+            self._running
+            and self.kernel is not None
+            and self.kernel.process is not None
+            and self.kernel.process.is_alive()
+        )
+
     async def _start_background_task(self):
         """Start background output processing task."""
-        self._output_task = asyncio.create_task(self._process_output_queue())
+        self._output_task = asyncio.create_task(self._process_kernel_output())
 
-    async def _process_output_queue(self):
+    async def _process_kernel_output(self):
         """
         Background task that continuously processes ALL kernel outputs.
-        This is the ONLY place that reads from output_queue.
+        This is the ONLY place that reads from the kernel's output channel.
+
+        The channel is watched by the event loop itself, so messages arrive
+        without polling and kernel death is seen as soon as the process exits.
 
         The coordinator is STATELESS for execution results - it just routes
         messages from kernel to clients. All execution state (status, outputs,
         errors) lives only in the frontend.
         """
-        loop = asyncio.get_event_loop()
+        reader = self.kernel.output_reader
+        reader.attach()
 
         while self._running:
             try:
-                # Read from output queue with timeout (1 second)
-                msg = await loop.run_in_executor(
-                    None,
-                    lambda: self.kernel.output_queue.get(timeout=1)
-                )
+                msg = await reader.get()
+            except EOFError:
+                if self._running:
+                    print("[Coordinator] Kernel died!")
+                    await self._handle_kernel_death()
+                break
 
-                # All messages are CellNotification
-                from ..kernel.types import CellNotification
+            try:
+                # Acknowledgements are routed to whoever is waiting for them
+                if msg.get('type') == 'register_cells_result':
+                    await self._handle_register_cells_result(RegisterCellsResult(**msg))
+                    continue
+                if msg.get('type') in _CONTROL_RESULTS:
+                    result = _CONTROL_RESULTS[msg['type']](**msg)
+                    future = self._pending_acks.pop(result.request_id, None)
+                    if future is not None and not future.done():
+                        future.set_result(result)
+                    continue
+
+                # Requested pages of a table output
+                if msg.get('type') == 'table_page':
+                    page = TablePage(**msg)
+                    await self.broadcaster.broadcast({
+                        'type': 'cell_table_page',
+                        'cellId': page.cell_id,
+                        'offset': page.offset,
+                        'rows': page.rows,
+                        'totalRows': page.total_rows
+                    })
+                    continue
+
+                # Coalesced notifications go out as one client frame
+                if msg.get('type') == 'notification_batch':
+                    batch = NotificationBatch(**msg)
+                    await self._broadcast_messages([
+                        self._notification_message(notification)
+                        for notification in batch.notifications
+                    ])
+                    continue
+
+                # All other messages are a single CellNotification
                 notification = CellNotification(**msg)
 
                 # Just broadcast - don't update state!
                 # Clients maintain their own execution state from the stream
-                await self._broadcast_notification(notification)
+                await self._broadcast_messages([self._notification_message(notification)])
 
-            except queue.Empty:
-                # Check if kernel is alive
-                if not self.kernel.process.is_alive():
-                    print("[Coordinator] Kernel died!")
-                    await self._handle_kernel_death()
-                    break
-                continue
             except Exception as e:
                 print(f"[Coordinator] Error processing output: {e}")
                 import traceback
                 traceback.print_exc()
                 continue
 
-    async def _broadcast_notification(self, notification):
-        """Broadcast notification to WebSocket clients."""
-        from ..kernel.types import CellChannel
+    async def _broadcast_messages(self, messages: List[Optional[dict]]):
+        """
+        Broadcast client messages, wrapping several in a single `batch` frame.
+
+        None entries (notifications with no client-side counterpart) are dropped.
+        """
+        messages = [m for m in messages if m is not None]
+        if not messages:
+            return
+        if len(messages) == 1:
+            await self.broadcaster.broadcast(messages[0])
+        else:
+            await self.broadcaster.broadcast({
+                'type': 'batch',
+                'messages': messages
+            })
 
+    def _notification_message(self, notification: CellNotification) -> Optional[dict]:
+        """Translate a kernel notification into a WebSocket message."""
         channel = notification.output.channel
         cell_id = notification.cell_id
         data = notification.output.data
@@ -90,62 +180,117 @@ class NotebookCoordinator:
         # Handle system messages
         if cell_id == "__system__":
             if channel == CellChannel.STATUS and data.get("status") == "db_configured":
-                await self.broadcaster.broadcast({
+                return {
                     'type': 'db_connection_updated',
                     'connectionString': self.notebook.db_conn_string if self.notebook else '',
                     'status': 'success'
-                })
+                }
             elif channel == CellChannel.ERROR:
-                await self.broadcaster.broadcast({
+                return {
                     'type': 'db_connection_updated',
                     'connectionString': self.notebook.db_conn_string if self.notebook else '',
                     'status': 'error',
                     'error': data.get("message")
-                })
-            return
+                }
+            return None
 
-        # Broadcast cell-specific messages
+        # Cell-specific messages
         if channel == CellChannel.STATUS:
-            await self.broadcaster.broadcast({
+            return {
                 'type': 'cell_status',
                 'cellId': cell_id,
                 'status': data.get("status")
-            })
+            }
         elif channel == CellChannel.STDOUT:
-            await self.broadcaster.broadcast({
+            return {
                 'type': 'cell_stdout',
                 'cellId': cell_id,
                 'data': data
-            })
+            }
+        elif channel == CellChannel.STDERR:
+            return {
+                'type': 'cell_stderr',
+                'cellId': cell_id,
+                'data': data
+            }
         elif channel == CellChannel.OUTPUT:
-            await self.broadcaster.broadcast({
+            return {
                 'type': 'cell_output',
                 'cellId': cell_id,
                 'output': {
                     'mime_type': notification.output.mimetype,
                     'data': data
                 }
-            })
+            }
         elif channel == CellChannel.ERROR:
-            await self.broadcaster.broadcast({
+            return {
                 'type': 'cell_error',
                 'cellId': cell_id,
                 'error': data.get("message")
-            })
+            }
         elif channel == CellChannel.METADATA:
-            await self.broadcaster.broadcast({
+            return {
                 'type': 'cell_updated',
                 'cellId': cell_id,
                 'cell': {
                     'reads': data.get("reads", []),
                     'writes': data.get("writes", [])
                 }
-            })
+            }
+        return None
+
+    async def _handle_register_cells_result(self, result: RegisterCellsResult):
+        """Broadcast per-cell registration outcomes and resolve the waiter."""
+        messages = []
+        for cell_result in result.results:
+            messages.extend(self._register_result_messages(cell_result))
+        await self._broadcast_messages(messages)
+
+        future = self._pending_acks.pop(result.request_id, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def _register_result_messages(self, result: RegisterCellResult) -> List[dict]:
+        """Same messages clients get from a single-cell registration."""
+        if result.status == "success":
+            return [
+                {
+                    'type': 'cell_updated',
+                    'cellId': result.cell_id,
+                    'cell': {
+                        'reads': result.reads,
+                        'writes': result.writes
+                    }
+                },
+                {
+                    'type': 'cell_status',
+                    'cellId': result.cell_id,
+                    'status': 'idle'
+                },
+            ]
+        return [
+            {
+                'type': 'cell_error',
+                'cellId': result.cell_id,
+                'error': result.error
+            },
+            {
+                'type': 'cell_status',
+                'cellId': result.cell_id,
+                'status': 'blocked'
+            },
+        ]
 
     async def _handle_kernel_death(self):
         """Handle kernel process death."""
         self._running = False
 
+        # Nobody will acknowledge outstanding requests now
+        for future in self._pending_acks.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Kernel process died"))
+        self._pending_acks.clear()
+
         # Broadcast error to all clients
         await self.broadcaster.broadcast({
             'type': 'kernel_error',
@@ -163,25 +308,41 @@ class NotebookCoordinator:
         # Start background task BEFORE registering cells
         await self._start_background_task()
 
-        # Register all cells with the kernel to build dependency graph
-        for cell in self.notebook.cells:
-            register_req = RegisterCellRequest(
-                cell_id=cell.id,
-                code=cell.code,
-                cell_type=cell.type
-            )
-            self.kernel.input_queue.put(register_req.model_dump())
-            # Do NOT wait for response - background task handles it
+        # Register all cells in one batch and wait for the kernel's single ack,
+        # so the dependency graph is complete before anything else is sent
+        register_req = RegisterCellsRequest(
+            request_id=str(uuid4()),
+            cells=[
+                RegisterCellRequest(cell_id=cell.id, code=cell.code, cell_type=cell.type)
+                for cell in self.notebook.cells
+            ]
+        )
+        future = asyncio.get_running_loop().create_future()
+        self._pending_acks[register_req.request_id] = future
+        self.kernel.input_queue.put(register_req.model_dump())
 
-        # Wait a bit for registration to complete
-        await asyncio.sleep(0.5)
+        try:
+            await asyncio.wait_for(future, timeout=REGISTER_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self._pending_acks.pop(register_req.request_id, None)
+            print(f"[Coordinator] Timed out waiting for registration of notebook {notebook_id}")
+
+        # Cells rejected by the batch (e.g. for a cycle) keep their notebook
+        # position for when they're fixed
+        self._send_cell_order()
 
         # Configure database if connection string exists
         if self.notebook.db_conn_string:
             await self._configure_database(self.notebook.db_conn_string)
 
     async def handle_cell_update(self, cell_id: str, new_code: str):
-        """Handle a cell code update - returns immediately."""
+        """
+        Handle a cell code update - returns immediately.
+
+        Saving and registering wait until the cell's edits pause for
+        CELL_UPDATE_DEBOUNCE_SECONDS, so typing costs one graph update per
+        pause; the latest code wins.
+        """
         if not self.notebook:
             return
 
@@ -192,18 +353,38 @@ class NotebookCoordinator:
 
         # Optimistic update
         cell.code = new_code
-        NotebookFileStorage.serialize_notebook(self.notebook)
 
-        # Send to kernel
-        register_req = RegisterCellRequest(
-            cell_id=cell_id,
-            code=cell.code,
-            cell_type=cell.type
+        pending = self._pending_updates.pop(cell_id, None)
+        if pending is not None:
+            pending.cancel()
+        self._pending_updates[cell_id] = asyncio.get_running_loop().call_later(
+            CELL_UPDATE_DEBOUNCE_SECONDS, self._flush_cell_updates, [cell_id]
         )
-        self.kernel.input_queue.put(register_req.model_dump())
 
         # Return immediately - background task handles responses
 
+    def _flush_cell_updates(self, cell_ids: Optional[List[str]] = None) -> None:
+        """Save and register pending cell edits now (all of them by default)."""
+        if cell_ids is None:
+            cell_ids = list(self._pending_updates)
+        cell_ids = [cell_id for cell_id in cell_ids if cell_id in self._pending_updates]
+        if not cell_ids:
+            return
+        for cell_id in cell_ids:
+            self._pending_updates.pop(cell_id).cancel()
+
+        NotebookFileStorage.serialize_notebook(self.notebook)
+
+        # Send to kernel
+        for cell in self.notebook.cells:
+            if cell.id in cell_ids:
+                register_req = RegisterCellRequest(
+                    cell_id=cell.id,
+                    code=cell.code,
+                    cell_type=cell.type
+                )
+                self.kernel.input_queue.put(register_req.model_dump())
+
     async def handle_db_connection_update(self, connection_string: str):
         """Handle database connection string update - returns immediately."""
         if not self.notebook:
@@ -228,6 +409,9 @@ class NotebookCoordinator:
         if not cell:
             return
 
+        # Run what's in the editors (the cell or its ancestors may have pending edits)
+        self._flush_cell_updates()
+
         # Send to kernel
         request = ExecuteRequest(
             cell_id=cell_id,
@@ -238,6 +422,64 @@ class NotebookCoordinator:
 
         # Return immediately - background task handles responses
 
+    async def handle_interrupt(self):
+        """Interrupt the running cascade - returns immediately."""
+        self.kernel.interrupt()
+
+        # Interrupted cells report error, the rest of the cascade blocked
+
+    async def heartbeat(self, timeout: float = HEARTBEAT_TIMEOUT_SECONDS) -> Optional[HeartbeatResult]:
+        """
+        Ask the kernel what it's running (answered even during a long
+        cascade), or None if it doesn't answer within timeout.
+        """
+        return await self._control_request(HeartbeatRequest(request_id=str(uuid4())), timeout)
+
+    async def variable_lookup(
+        self, variable: str, timeout: float = HEARTBEAT_TIMEOUT_SECONDS
+    ) -> Optional[VariableLookupResult]:
+        """
+        Ask the kernel which cells read and which define a variable (answered
+        even during a long cascade), or None if it doesn't answer within timeout.
+        """
+        request = VariableLookupRequest(request_id=str(uuid4()), variable=variable)
+        return await self._control_request(request, timeout)
+
+    async def _control_request(self, request, timeout: float):
+        """Send a request the kernel acknowledges and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_acks[request.request_id] = future
+        self.kernel.input_queue.put(request.model_dump())
+
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._pending_acks.pop(request.request_id, None)
+            return None
+
+    async def handle_fetch_rows(self, cell_id: str, offset: int, limit: int):
+        """Request more rows of a cell's table output - returns immediately."""
+        if not self.notebook:
+            return
+
+        request = FetchRowsRequest(cell_id=cell_id, offset=offset, limit=limit)
+        self.kernel.input_queue.put(request.model_dump())
+
+        # Return immediately - background task broadcasts the page
+
+    async def handle_clear_sql_cache(self):
+        """Drop the kernel's cached SQL results - returns immediately."""
+        self.kernel.input_queue.put(ClearSQLCacheRequest().model_dump())
+
+    def _send_cell_order(self) -> None:
+        """
+        Tell the kernel the notebook's cell order, which decides which cells
+        see which definition of a reused variable name (deleted cells are
+        dropped from its graph).
+        """
+        request = SetCellOrderRequest(cell_ids=[cell.id for cell in self.notebook.cells])
+        self.kernel.input_queue.put(request.model_dump())
+
     async def _configure_database(self, connection_string: str) -> None:
         """
         Send database connection string to kernel - returns immediately.
@@ -286,6 +528,7 @@ class NotebookCoordinator:
 
         # Save to file
         NotebookFileStorage.serialize_notebook(self.notebook)
+        self._send_cell_order()
 
         # Broadcast cell creation
         await self.broadcaster.broadcast({
@@ -303,8 +546,12 @@ class NotebookCoordinator:
         # Find and remove cell
         for i, cell in enumerate(self.notebook.cells):
             if cell.id == cell_id:
+                pending = self._pending_updates.pop(cell_id, None)
+                if pending is not None:
+                    pending.cancel()
                 self.notebook.cells.pop(i)
                 NotebookFileStorage.serialize_notebook(self.notebook)
+                self._send_cell_order()
 
                 # Broadcast cell deletion
                 await self.broadcaster.broadcast({
@@ -313,13 +560,22 @@ class NotebookCoordinator:
                 })
                 return
 
-    def shutdown(self):
+    async def shutdown(self):
         """Stop the background task and kernel process."""
         self._running = False
 
-        # Wait for background task to finish
+        # Keep edits that hadn't been saved yet
+        if self._pending_updates:
+            for pending in self._pending_updates.values():
+                pending.cancel()
+            self._pending_updates.clear()
+            NotebookFileStorage.serialize_notebook(self.notebook)
+
+        # Wait for background task to finish before its reader is closed
         if self._output_task and not self._output_task.done():
             self._output_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._output_task
 
         # Stop kernel
         if self.kernel:
@@ -0,0 +1,169 @@
+"""Notebook-scoped sessions shared by every connection to the same notebook."""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Set
+from .coordinator import NotebookCoordinator
+
+# How long a session with no connections keeps its kernel alive.
+# Covers page reloads and brief network drops without re-executing the notebook.
+IDLE_GRACE_SECONDS = 30.0
+
+
+class NotebookSession:
+    """
+    One coordinator (and therefore one kernel) per notebook.
+
+    The session is the coordinator's broadcaster: messages fan out only to the
+    connections attached to this notebook, not to every open WebSocket.
+    """
+
+    def __init__(self, notebook_id: str, send: Callable[[str, dict], Awaitable[None]]):
+        self.notebook_id = notebook_id
+        self.connections: Set[str] = set()
+        self.coordinator: Optional[NotebookCoordinator] = None
+
+        self._send = send
+        self._ready = asyncio.Event()
+        self._load_error: Optional[BaseException] = None
+        self._teardown_task: Optional[asyncio.Task] = None
+
+    @property
+    def ref_count(self) -> int:
+        """Number of connections currently attached."""
+        return len(self.connections)
+
+    async def broadcast(self, message: dict):
+        """Send message to every connection attached to this notebook."""
+        for connection_id in list(self.connections):
+            try:
+                await self._send(connection_id, message)
+            except Exception as e:
+                # One dead socket must not starve the other viewers
+                print(f"[Session] Failed to send to {connection_id}: {e}")
+
+    async def wait_ready(self) -> None:
+        """Wait until the notebook is loaded; re-raise if loading failed."""
+        await self._ready.wait()
+        if self._load_error is not None:
+            raise self._load_error
+
+    def schedule_teardown(self, delay: float, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run callback after delay unless a connection re-attaches first."""
+        self.cancel_teardown()
+        self._teardown_task = asyncio.create_task(self._teardown_after(delay, callback))
+
+    async def _teardown_after(self, delay: float, callback: Callable[[], Awaitable[None]]) -> None:
+        await asyncio.sleep(delay)
+        # Past cancelling: the teardown itself calls cancel_teardown()
+        self._teardown_task = None
+        await callback()
+
+    def cancel_teardown(self) -> None:
+        """Cancel a pending idle teardown."""
+        if self._teardown_task is not None:
+            self._teardown_task.cancel()
+            self._teardown_task = None
+
+    async def shutdown(self) -> None:
+        """Stop the coordinator and its kernel."""
+        self.cancel_teardown()
+        if self.coordinator:
+            coordinator, self.coordinator = self.coordinator, None
+            await coordinator.shutdown()
+
+
+class SessionRegistry:
+    """
+    Maps notebook_id → NotebookSession with reference counting.
+
+    The first connection to a notebook starts its coordinator and kernel; later
+    connections attach to the same one. When the last connection leaves, the
+    session is kept for an idle grace period before the kernel is stopped.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], Awaitable[None]],
+        coordinator_factory: Callable[..., NotebookCoordinator] = NotebookCoordinator,
+        idle_grace: float = IDLE_GRACE_SECONDS,
+    ):
+        self.sessions: Dict[str, NotebookSession] = {}
+        self._send = send
+        self._coordinator_factory = coordinator_factory
+        self._idle_grace = idle_grace
+
+    async def acquire(self, notebook_id: str, connection_id: str) -> NotebookCoordinator:
+        """Attach a connection to the notebook's session, creating it if needed."""
+        session = self.sessions.get(notebook_id)
+
+        # A session whose kernel died can't be shared - start a fresh one
+        if session is not None and session._ready.is_set() and not self._is_usable(session):
+            print(f"[Sessions] Replacing dead session for notebook {notebook_id}")
+            await self._discard(notebook_id, session)
+            session = None
+
+        if session is None:
+            session = NotebookSession(notebook_id, self._send)
+            session.connections.add(connection_id)
+            self.sessions[notebook_id] = session
+            try:
+                session.coordinator = self._coordinator_factory(broadcaster=session)
+                await session.coordinator.load_notebook(notebook_id)
+            except BaseException as e:
+                session._load_error = e
+                await self._discard(notebook_id, session)
+                raise
+            finally:
+                session._ready.set()
+            print(f"[Sessions] Started session for notebook {notebook_id}")
+        else:
+            session.cancel_teardown()
+            session.connections.add(connection_id)
+            try:
+                await session.wait_ready()
+            except BaseException:
+                session.connections.discard(connection_id)
+                raise
+
+        return session.coordinator
+
+    async def release(self, notebook_id: str, connection_id: str) -> None:
+        """Detach a connection; schedule teardown if it was the last one."""
+        session = self.sessions.get(notebook_id)
+        if session is None:
+            return
+
+        session.connections.discard(connection_id)
+        if session.connections:
+            return
+
+        if self._idle_grace <= 0:
+            await self._discard(notebook_id, session)
+        else:
+            session.schedule_teardown(
+                self._idle_grace,
+                lambda: self._teardown_if_idle(notebook_id, session)
+            )
+
+    def get(self, notebook_id: str) -> Optional[NotebookSession]:
+        """Get the live session for a notebook, if any."""
+        return self.sessions.get(notebook_id)
+
+    async def shutdown(self) -> None:
+        """Stop every session (server shutdown)."""
+        for notebook_id, session in list(self.sessions.items()):
+            await self._discard(notebook_id, session)
+
+    async def _teardown_if_idle(self, notebook_id: str, session: NotebookSession) -> None:
+        """Idle timer callback - only tears down if nobody re-attached."""
+        if self.sessions.get(notebook_id) is session and not session.connections:
+            print(f"[Sessions] Idle grace expired for notebook {notebook_id}")
+            await self._discard(notebook_id, session)
+
+    async def _discard(self, notebook_id: str, session: NotebookSession) -> None:
+        if self.sessions.get(notebook_id) is session:
+            del self.sessions[notebook_id]
+        await session.shutdown()
+
+    @staticmethod
+    def _is_usable(session: NotebookSession) -> bool:
+        return session.coordinator is not None and session.coordinator.is_alive
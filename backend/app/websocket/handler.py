@@ -1,6 +1,7 @@
 from fastapi import WebSocket, WebSocketDisconnect
 from typing import Dict
 from ..orchestration.coordinator import NotebookCoordinator
+from ..orchestration.session import SessionRegistry
 
 
 class ConnectionManager:
@@ -9,24 +10,33 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.coordinators: Dict[str, NotebookCoordinator] = {}
+        self.connection_notebooks: Dict[str, str] = {}  # connection_id → notebook_id
+
+        # All connections to the same notebook share one coordinator/kernel
+        self.sessions = SessionRegistry(send=self.send_message)
 
     async def connect(self, websocket: WebSocket, connection_id: str, notebook_id: str):
         await websocket.accept()
         self.active_connections[connection_id] = websocket
 
-        # Create coordinator for this connection
-        coordinator = NotebookCoordinator(broadcaster=self)
-        await coordinator.load_notebook(notebook_id)
+        try:
+            coordinator = await self.sessions.acquire(notebook_id, connection_id)
+        except Exception:
+            del self.active_connections[connection_id]
+            raise
+
         self.coordinators[connection_id] = coordinator
+        self.connection_notebooks[connection_id] = notebook_id
 
-    def disconnect(self, connection_id: str):
+    async def disconnect(self, connection_id: str):
         if connection_id in self.active_connections:
             del self.active_connections[connection_id]
-        if connection_id in self.coordinators:
-            # Stop kernel process before removing coordinator
-            coordinator = self.coordinators[connection_id]
-            coordinator.shutdown()
-            del self.coordinators[connection_id]
+        self.coordinators.pop(connection_id, None)
+
+        notebook_id = self.connection_notebooks.pop(connection_id, None)
+        if notebook_id is not None:
+            # Kernel is stopped by the registry once the last viewer leaves
+            await self.sessions.release(notebook_id, connection_id)
 
     async def send_message(self, connection_id: str, message: dict):
         if connection_id in self.active_connections:
@@ -38,6 +48,10 @@ class ConnectionManager:
         for websocket in self.active_connections.values():
             await websocket.send_json(message)
 
+    async def shutdown(self):
+        """Stop all notebook sessions."""
+        await self.sessions.shutdown()
+
 
 manager = ConnectionManager()
 
@@ -54,10 +68,10 @@ async def handle_websocket(websocket: WebSocket, connection_id: str, notebook_id
             await handle_message(connection_id, coordinator, message)
 
     except WebSocketDisconnect:
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(connection_id)
+        await manager.disconnect(connection_id)
 
 
 async def handle_message(connection_id: str, coordinator: NotebookCoordinator, message: dict):
@@ -80,6 +94,40 @@ async def handle_message(connection_id: str, coordinator: NotebookCoordinator, m
         if cell_id:
             await coordinator.handle_run_cell(cell_id)
 
+    elif msg_type == "interrupt":
+        await coordinator.handle_interrupt()
+
+    elif msg_type == "heartbeat":
+        # Answered to the asking connection only
+        result = await coordinator.heartbeat()
+        await manager.send_message(connection_id, {
+            "type": "heartbeat",
+            "alive": result is not None,
+            "running": result.running if result else [],
+            "queued": result.queued if result else 0,
+        })
+
+    elif msg_type == "variable_lookup":
+        variable = message.get("variable")
+        if variable:
+            result = await coordinator.variable_lookup(variable)
+            await manager.send_message(connection_id, {
+                "type": "variable_lookup",
+                "variable": variable,
+                "readers": result.readers if result else [],
+                "writers": result.writers if result else [],
+            })
+
+    elif msg_type == "fetch_rows":
+        cell_id = message.get("cellId")
+        offset = message.get("offset")
+        limit = message.get("limit")
+        if cell_id and isinstance(offset, int) and isinstance(limit, int) and offset >= 0 and limit > 0:
+            await coordinator.handle_fetch_rows(cell_id, offset, limit)
+
+    elif msg_type == "clear_sql_cache":
+        await coordinator.handle_clear_sql_cache()
+
     elif msg_type == "create_cell":
         cell_type = message.get("cellType")
         after_cell_id = message.get("afterCellId")
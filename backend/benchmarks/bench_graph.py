@@ -0,0 +1,95 @@
+"""Time DependencyGraph edits as notebooks grow.
+
+Builds notebooks where every cell reads the previous cell's variable and a
+few random earlier ones, then times re-registering random cells (with new reads, as when a
+cell is edited), edits that are rejected because they'd close a cycle, and
+computing execution orders (ancestors + cell + descendants), both right
+after an edit and when re-running a cell with nothing edited in between:
+
+    uv run python benchmarks/bench_graph.py
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.graph import CycleDetectedError, DependencyGraph  # noqa: E402
+
+
+def random_reads(rng: random.Random, index: int, fan_in: int) -> set:
+    if index == 0:
+        return set()
+    return {f"v{index - 1}"} | {f"v{rng.randrange(index)}" for _ in range(fan_in - 1)}
+
+
+def build(cells: int, fan_in: int, rng: random.Random) -> DependencyGraph:
+    graph = DependencyGraph()
+    graph.update_cells({
+        f"c{i}": (random_reads(rng, i, fan_in), {f"v{i}"})
+        for i in range(cells)
+    })
+    return graph
+
+
+def bench(cells: int, fan_in: int, edits: int, rng: random.Random) -> None:
+    start = time.perf_counter()
+    graph = build(cells, fan_in, rng)
+    build_time = time.perf_counter() - start
+
+    targets = [rng.randrange(1, cells) for _ in range(edits)]
+    start = time.perf_counter()
+    for i in targets:
+        graph.update_cell(f"c{i}", random_reads(rng, i, fan_in), {f"v{i}"})
+    edit_time = (time.perf_counter() - start) / edits
+
+    # Early cells reading the last cell's variable close a cycle
+    targets = [rng.randrange(cells // 10) for _ in range(edits)]
+    start = time.perf_counter()
+    for i in targets:
+        try:
+            graph.update_cell(f"c{i}", {f"v{cells - 1}"}, {f"v{i}"})
+        except CycleDetectedError:
+            pass
+        else:
+            raise AssertionError(f"c{i} should have closed a cycle")
+    cycle_time = (time.perf_counter() - start) / edits
+
+    # Run a few cells repeatedly, with an edit somewhere after each run
+    hot = [rng.randrange(cells) for _ in range(10)]
+    start = time.perf_counter()
+    for n in range(edits):
+        graph.get_execution_order_with_ancestors(f"c{hot[n % len(hot)]}")
+        i = rng.randrange(1, cells)
+        graph.update_cell(f"c{i}", random_reads(rng, i, fan_in), {f"v{i}"})
+    order_time = (time.perf_counter() - start) / edits - edit_time
+
+    start = time.perf_counter()
+    for n in range(edits):
+        graph.get_execution_order_with_ancestors(f"c{hot[n % len(hot)]}")
+    rerun_time = (time.perf_counter() - start) / edits
+
+    print(
+        f"{cells:>6,} cells: build {build_time * 1000:8.1f} ms"
+        f"   edit {edit_time * 1e6:8.1f} µs   rejected edit {cycle_time * 1e6:8.1f} µs"
+        f"   execution order {order_time * 1e6:8.1f} µs (rerun {rerun_time * 1e6:6.1f} µs)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 5000])
+    parser.add_argument('--fan-in', type=int, default=3, help="variables read per cell")
+    parser.add_argument('--edits', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for cells in args.sizes:
+        bench(cells, args.fan_in, args.edits, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from uuid import uuid4
 from app.api import notebooks, cells
-from app.websocket.handler import handle_websocket
+from app.websocket.handler import handle_websocket, manager
+from app.kernel.pool import kernel_pool
 
 # Ensure notebooks directory exists
 NOTEBOOKS_DIR = Path(__file__).parent / "notebooks"
 NOTEBOOKS_DIR.mkdir(exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm kernels in the background so the first notebook opens instantly
+    kernel_pool.start()
+    yield
+    # Stop kernels kept alive by idle notebook sessions
+    await manager.shutdown()
+    kernel_pool.shutdown()
+
 app = FastAPI(
     title="Reactive Notebook API",
     version="0.1.0",
     description="File-based reactive notebook backend",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -37,3 +49,8 @@ async def websocket_endpoint(websocket: WebSocket, notebook_id: str):
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics/kernel-pool")
+async def kernel_pool_metrics():
+    """Warm kernel pool size and hit rate."""
+    return kernel_pool.stats()
@@ -0,0 +1,39 @@
+"""Shared fixtures for the backend tests."""
+import pytest
+
+from app.kernel.process import Kernel
+
+
+class RecordingOutput:
+    """Stands in for the kernel's NotificationBatcher."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+
+    def add(self, message: dict):
+        self.messages.append(message)
+
+    send = add
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def new_kernel():
+    """
+    Create in-process Kernels whose notifications are recorded in
+    kernel.output.messages; their threads are stopped after the test.
+    """
+    kernels: list[Kernel] = []
+
+    def create() -> Kernel:
+        kernel = Kernel(RecordingOutput())
+        kernels.append(kernel)
+        return kernel
+
+    yield create
+
+    for kernel in kernels:
+        kernel.scheduler.shutdown()
+        kernel.loop.stop()
@@ -1,6 +1,11 @@
 """Tests for AST dependency extraction."""
 import pytest
-from app.core.ast_parser import extract_python_dependencies, extract_sql_dependencies
+from app.core.ast_parser import (
+    analyze_python,
+    extract_python_dependencies,
+    extract_sql_dependencies,
+    extract_sql_result_name,
+)
 
 
 def test_simple_assignment():
@@ -77,3 +82,33 @@ def test_sql_no_templates():
     sql = "SELECT * FROM users LIMIT 10"
     deps = extract_sql_dependencies(sql)
     assert deps == set()
+
+
+def test_sql_result_name():
+    sql = "-- as df_users\nSELECT * FROM users WHERE id = {user_id}"
+    assert extract_sql_result_name(sql) == 'df_users'
+    assert extract_sql_dependencies(sql) == {'user_id'}
+
+
+def test_sql_result_name_absent():
+    assert extract_sql_result_name("SELECT 1 -- as df") is None
+    assert extract_sql_result_name("-- a comment\nSELECT 1") is None
+
+
+def test_cell_analysis():
+    """One pass yields dependencies, the display split and side effects."""
+    analysis = analyze_python("import numpy as np\nfrom os import path\ndf['total'] = np.sum(values)\ndf.head()")
+
+    assert analysis.reads == {'df', 'values'}
+    assert analysis.writes == {'np', 'path'}
+    assert analysis.statements is not None and analysis.expression is not None
+    assert analysis.mutates == {'df'}
+    assert analysis.has_side_effects
+
+
+def test_side_effect_flags():
+    # Modifying a value the cell created itself is not a side effect
+    assert not analyze_python("df = {}\ndf['a'] = 1\ndf.a = 2").has_side_effects
+    assert analyze_python("from math import *").star_import
+    assert analyze_python("def bump():\n    global n\n    n += 1").global_writes
+    assert analyze_python("x").statements is None
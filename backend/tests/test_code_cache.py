@@ -0,0 +1,62 @@
+"""Tests for the compiled-code cache."""
+import pytest
+
+from app.core.ast_parser import extract_python_dependencies
+from app.core.code_cache import CodeCache
+from app.core.executor import PythonExecutor
+
+
+def test_unchanged_source_is_compiled_once():
+    """A repeat lookup returns the same code objects."""
+    cache = CodeCache()
+
+    first = cache.get("y = x + 1\ny * 2")
+    second = cache.get("y = x + 1\ny * 2")
+
+    assert first is second
+    assert first.statements is not None and first.expression is not None
+    assert first.reads == {'x'} and first.writes == {'y'}
+
+
+def test_least_recently_used_sources_evicted():
+    cache = CodeCache(max_entries=2)
+
+    cache.get("a = 1")
+    cache.get("b = 1")
+    cache.get("a = 1")  # "b = 1" is now least recently used
+    cache.get("c = 1")
+
+    assert "b = 1" not in cache
+    assert "a = 1" in cache and "c = 1" in cache
+
+
+def test_syntax_errors_not_cached():
+    cache = CodeCache()
+
+    with pytest.raises(SyntaxError):
+        cache.get("x = (")
+    assert len(cache) == 0
+    assert cache.dependencies("x = (") == (set(), set())
+
+
+def test_dependencies_match_parser():
+    """Including code that parses but doesn't compile."""
+    cache = CodeCache()
+
+    for code in ["import math\nr = math.sqrt(n)", "total = sum(v for v in values)", "return x"]:
+        assert cache.dependencies(code) == extract_python_dependencies(code)
+
+
+def test_executor_reuses_cached_code():
+    """Re-running a cell executes the cached code against current globals."""
+    cache = CodeCache()
+    executor = PythonExecutor(cache)
+    code = "x = x + 1\nx"
+
+    executor.globals_dict['x'] = 1
+    executor.execute(code)
+    compiled = cache.get(code)
+    result = executor.execute(code)
+
+    assert cache.get(code) is compiled
+    assert result.outputs[0].data == '3'
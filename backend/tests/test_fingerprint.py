@@ -0,0 +1,54 @@
+"""Tests for value fingerprints."""
+import pytest
+
+from app.core.fingerprint import fingerprint
+
+
+def test_scalars_compare_by_value():
+    """Equal scalars of the same type have equal fingerprints."""
+    assert fingerprint(10) == fingerprint(5 + 5)
+    assert fingerprint('abc') == fingerprint(''.join(['a', 'b', 'c']))
+    assert fingerprint(1) != fingerprint(True)
+    assert fingerprint(1) != fingerprint(1.0)
+
+
+def test_containers_compare_by_content():
+    """Builtin containers are hashed through their items."""
+    assert fingerprint({'a': [1, 2], 'b': (3,)}) == fingerprint({'a': [1, 2], 'b': (3,)})
+    assert fingerprint([1, 2]) != fingerprint([2, 1])
+    assert fingerprint([1, 2]) != fingerprint((1, 2))
+    assert fingerprint({1, 2, 3}) == fingerprint({3, 2, 1})
+
+
+def test_numpy_arrays_compare_by_content():
+    """Arrays with the same dtype, shape and data are unchanged."""
+    np = pytest.importorskip('numpy')
+
+    assert fingerprint(np.arange(6)) == fingerprint(np.arange(6))
+    assert fingerprint(np.arange(6)) != fingerprint(np.arange(6).reshape(2, 3))
+    assert fingerprint(np.arange(6)) != fingerprint(np.arange(6, dtype=np.float64))
+    assert fingerprint(np.arange(6)[::2]) == fingerprint(np.array([0, 2, 4]))
+
+
+def test_dataframes_compare_by_content():
+    """DataFrames are hashed by values, index, columns and dtypes."""
+    pd = pytest.importorskip('pandas')
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(df.assign(a=[1, 3]))
+    assert fingerprint(df) != fingerprint(df.rename(columns={'b': 'c'}))
+    assert fingerprint(df) != fingerprint(df.set_index(pd.Index([5, 6])))
+
+
+def test_other_objects_compare_by_identity():
+    """Objects that can't be hashed by content are unchanged only if they're the same object."""
+    def f():
+        pass
+
+    def g():
+        pass
+
+    assert fingerprint(f) == fingerprint(f)
+    assert fingerprint(f) != fingerprint(g)
+    assert fingerprint([f]) != fingerprint([f])
@@ -1,4 +1,6 @@
 """Tests for dependency graph."""
+import random
+
 import pytest
 from app.core.graph import DependencyGraph, CycleDetectedError
 
@@ -60,12 +62,23 @@ def test_variable_shadowing():
     graph.update_cell('c1', reads=set(), writes={'x'})
     graph.update_cell('c2', reads={'x'}, writes={'y'})
 
-    # c3 also writes 'x', shadowing c1's definition
+    # c3 also writes 'x', shadowing c1's definition for cells below it
     graph.update_cell('c3', reads=set(), writes={'x'})
+    graph.update_cell('c4', reads={'x'}, writes=set())
+
+    # c2 still sees c1's x; c4 sees c3's
+    assert graph.writers_of('x') == {'c1', 'c3'}
+    assert graph.get_execution_order('c3') == ['c3', 'c4']
+    # Re-running c1 re-runs c3 afterwards so the later definition is kept
+    assert graph.get_execution_order('c1') == ['c1', 'c2', 'c3', 'c4']
 
-    # Now c2 should depend on c3 (latest writer of 'x')
-    order = graph.get_execution_order('c3')
-    assert 'c2' in order
+
+def test_bulk_registration_keeps_notebook_order():
+    """Independent cells are ordered as in the notebook, not by set iteration order."""
+    for cells in (['a', 'b', 'c', 'd'], ['d', 'c', 'b', 'a']):
+        graph = DependencyGraph()
+        graph.update_cells({'root': (set(), {'x'}), **{cell_id: ({'x'}, set()) for cell_id in cells}})
+        assert graph.get_execution_order('root') == ['root', *cells]
 
 
 def test_remove_cell():
@@ -79,3 +92,305 @@ def test_remove_cell():
     # c2 should now have no dependencies
     order = graph.get_execution_order('c2')
     assert order == ['c2']
+
+
+def test_update_cells_matches_sequential_updates():
+    """Bulk registration builds the same graph as one-by-one registration."""
+    cells = {
+        'a': (set(), {'x'}),
+        'b': ({'x'}, {'y'}),
+        'c': ({'x'}, {'z'}),
+        'd': ({'y', 'z'}, {'result'}),
+    }
+
+    bulk = DependencyGraph()
+    errors = bulk.update_cells(cells)
+
+    sequential = DependencyGraph()
+    for cell_id, (reads, writes) in cells.items():
+        sequential.update_cell(cell_id, reads, writes)
+
+    assert errors == {}
+    assert set(bulk.edges()) == set(sequential.edges())
+    assert bulk.get_execution_order('a')[0] == 'a'
+    assert bulk.get_execution_order('a')[-1] == 'd'
+
+
+def test_update_cells_rejects_only_cycle_closing_cells():
+    """Bulk registration rejects the same cells update_cell would."""
+    graph = DependencyGraph()
+    errors = graph.update_cells({
+        'c1': ({'y'}, {'x'}),
+        'c2': ({'x'}, {'y'}),   # closes c1 → c2 → c1
+        'c3': ({'x'}, {'z'}),
+    })
+
+    assert set(errors) == {'c2'}
+    assert isinstance(errors['c2'], CycleDetectedError)
+    assert graph.get_cell_dependencies('c3')['reads'] == {'x'}
+    assert 'c3' in graph.get_execution_order('c1')
+
+
+def assert_order_is_topological(graph: DependencyGraph):
+    position = {cell_id: i for i, cell_id in enumerate(graph.topological_order())}
+    for from_cell, to_cell in graph.edges():
+        assert position[from_cell] < position[to_cell]
+
+
+def test_edits_reorder_cells():
+    """Making an earlier cell depend on a later one moves it after that cell."""
+    graph = DependencyGraph()
+    graph.update_cell('c1', reads={'y'}, writes={'z'})
+    graph.update_cell('c2', reads=set(), writes={'x'})
+    graph.update_cell('c3', reads={'x'}, writes={'y'})
+    assert_order_is_topological(graph)
+
+    graph.update_cell('c2', reads=set(), writes={'x', 'w'})
+    graph.update_cell('c3', reads={'w'}, writes={'y'})
+    assert_order_is_topological(graph)
+    assert graph.get_execution_order('c2') == ['c2', 'c3', 'c1']
+
+
+def test_rejected_update_leaves_graph_unchanged():
+    """A cycle-closing edit keeps the cell's previous edges and variables."""
+    graph = DependencyGraph()
+    graph.update_cell('c1', reads=set(), writes={'x'})
+    graph.update_cell('c2', reads={'x'}, writes={'y'})
+    graph.update_cell('c3', reads={'y'}, writes={'z'})
+    edges = set(graph.edges())
+
+    with pytest.raises(CycleDetectedError):
+        graph.update_cell('c1', reads={'z'}, writes={'x'})
+    # A definition of x above c1 would have to run before it
+    graph.set_cell_order(['c4', 'c1', 'c2', 'c3'])
+    with pytest.raises(CycleDetectedError):
+        graph.update_cell('c4', reads={'z'}, writes={'x'})
+
+    assert set(graph.edges()) == edges
+    assert graph.get_cell_dependencies('c1')['reads'] == set()
+    assert not graph.has_cell('c4')
+    assert_order_is_topological(graph)
+
+
+def test_readers_index_follows_edits():
+    """A new writer finds existing readers, but not ones that were edited away."""
+    graph = DependencyGraph()
+    graph.update_cell('c1', reads={'x'}, writes=set())
+    graph.update_cell('c2', reads={'x'}, writes=set())
+    graph.update_cell('c2', reads=set(), writes=set())
+    graph.remove_cell('c1')
+    graph.update_cell('c3', reads={'x'}, writes=set())
+    graph.update_cell('c4', reads=set(), writes={'x'})
+
+    assert graph.get_execution_order('c4') == ['c4', 'c3']
+    assert_order_is_topological(graph)
+
+
+def test_readers_and_writers_of():
+    """Variable lookups stay consistent through edits and removals."""
+    graph = DependencyGraph()
+    graph.update_cell('c1', reads=set(), writes={'x'})
+    graph.update_cell('c2', reads={'x'}, writes={'y'})
+    graph.update_cell('c3', reads={'x', 'y'}, writes=set())
+
+    assert graph.readers_of('x') == {'c2', 'c3'}
+    assert graph.writers_of('x') == {'c1'}
+
+    graph.update_cell('c3', reads={'y'}, writes=set())
+    graph.remove_cell('c1')
+
+    assert graph.readers_of('x') == {'c2'}
+    assert graph.writers_of('x') == set()
+    assert graph.readers_of('y') == {'c3'}
+    assert graph.readers_of('missing') == set()
+
+    with pytest.raises(CycleDetectedError):
+        graph.update_cell('c3', reads={'y'}, writes={'x'})
+    assert graph.writers_of('x') == set()
+
+
+def test_traversal_api():
+    """Ancestors, descendants and edges between a subset of cells."""
+    graph = DependencyGraph()
+    graph.update_cell('a', reads=set(), writes={'x'})
+    graph.update_cell('b', reads={'x'}, writes={'y'})
+    graph.update_cell('c', reads={'y'}, writes={'z'})
+    graph.update_cell('d', reads=set(), writes={'w'})
+
+    assert graph.ancestors('c') == {'a', 'b'}
+    assert graph.descendants('a') == {'b', 'c'}
+    assert graph.descendants('d') == set()
+    assert graph.ancestors('missing') == set()
+    assert set(graph.edges({'a', 'b', 'd'})) == {('a', 'b')}
+    assert graph.topological_order({'c', 'a'}) == ['a', 'c']
+
+
+def test_to_networkx():
+    """The graph can be exported for analysis with NetworkX."""
+    nx = pytest.importorskip("networkx")
+    graph = DependencyGraph()
+    graph.update_cell('a', reads=set(), writes={'x'})
+    graph.update_cell('b', reads={'x'}, writes=set())
+    graph.update_cell('c', reads=set(), writes=set())
+
+    exported = graph.to_networkx()
+
+    assert isinstance(exported, nx.DiGraph)
+    assert set(exported.nodes()) == {'a', 'b', 'c'}
+    assert set(exported.edges()) == {('a', 'b')}
+
+
+def test_cached_orders_match_fresh_graph():
+    """Execution orders stay correct through random edits, cycles and removals."""
+    rng = random.Random(0)
+    graph = DependencyGraph()
+    for step in range(300):
+        cell = f"c{rng.randrange(20)}"
+        if rng.random() < 0.1:
+            graph.remove_cell(cell)
+        else:
+            reads = {f"v{rng.randrange(20)}" for _ in range(rng.randrange(3))}
+            try:
+                graph.update_cell(cell, reads=reads, writes={f"v{cell[1:]}"})
+            except CycleDetectedError:
+                pass
+
+        target = f"c{rng.randrange(20)}"
+        if not graph.has_cell(target):
+            continue
+        order = graph.get_execution_order_with_ancestors(target)
+        children: dict = {}
+        for from_cell, to_cell in graph.edges():
+            children.setdefault(from_cell, set()).add(to_cell)
+        reached, stack = set(), [target]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in reached:
+                    reached.add(child)
+                    stack.append(child)
+
+        assert graph.get_execution_order(target) == [target] + [c for c in order if c in reached]
+        assert set(graph.get_execution_order(target)) == reached | {target}
+        position = {cell_id: i for i, cell_id in enumerate(order)}
+        assert all(position[a] < position[b] for a, b in graph.edges(order))
+
+
+def test_unrelated_edit_keeps_cached_closures():
+    """Editing one branch doesn't invalidate another branch's cached order."""
+    graph = DependencyGraph()
+    graph.update_cell('a', reads=set(), writes={'x'})
+    graph.update_cell('b', reads={'x'}, writes=set())
+    graph.update_cell('p', reads=set(), writes={'y'})
+    graph.update_cell('q', reads={'y'}, writes=set())
+    graph.get_execution_order('a')
+    graph.get_execution_order('p')
+
+    graph.update_cell('q', reads={'y'}, writes={'z'})
+    graph.update_cell('r', reads={'z'}, writes=set())
+
+    assert graph._index['a'] in graph._descendant_cache
+    assert graph._index['p'] not in graph._descendant_cache
+    assert graph.get_execution_order('p') == ['p', 'q', 'r']
+
+
+def test_readers_see_nearest_definition_above():
+    """Each reader depends on the closest definition above it, or the first below."""
+    graph = DependencyGraph()
+    graph.set_cell_order(['r0', 'w1', 'r1', 'w2', 'r2'])
+    graph.update_cell('r2', reads={'df'}, writes=set())
+    graph.update_cell('w2', reads={'df'}, writes={'df'})   # df = df.dropna()
+    graph.update_cell('r1', reads={'df'}, writes=set())
+    graph.update_cell('r0', reads={'df'}, writes=set())
+    graph.update_cell('w1', reads=set(), writes={'df'})
+
+    assert set(graph.edges()) == {
+        ('w1', 'r0'), ('r0', 'w2'),   # r0 has no definition above it
+        ('w1', 'r1'), ('r1', 'w2'),
+        ('w1', 'w2'),
+        ('w2', 'r2'),
+    }
+    assert graph.get_execution_order('w2') == ['w2', 'r2']
+    order = graph.get_execution_order_with_ancestors('r2')
+    assert order[0] == 'w1' and set(order[1:3]) == {'r0', 'r1'} and order[3:] == ['w2', 'r2']
+
+
+def test_removing_a_definition_reroutes_readers():
+    """Readers of a removed definition fall back to the previous one."""
+    graph = DependencyGraph()
+    graph.update_cell('c1', reads=set(), writes={'x'})
+    graph.update_cell('c2', reads=set(), writes={'x'})
+    graph.update_cell('c3', reads={'x'}, writes=set())
+    assert graph.get_execution_order('c1') == ['c1', 'c2', 'c3']
+    assert graph.get_execution_order('c2') == ['c2', 'c3']
+
+    assert graph.remove_cell('c2') == {}
+
+    assert set(graph.edges()) == {('c1', 'c3')}
+    graph.update_cell('c2', reads=set(), writes={'y'})
+    assert graph.get_execution_order('c2') == ['c2']
+
+
+def test_reordering_cells_changes_resolution():
+    """Moving a definition changes which readers see it."""
+    graph = DependencyGraph()
+    graph.update_cell('a', reads=set(), writes={'x'})
+    graph.update_cell('b', reads={'x'}, writes=set())
+    graph.update_cell('c', reads=set(), writes={'x'})
+    assert graph.get_execution_order('c') == ['c']
+
+    graph.set_cell_order(['c', 'a', 'b'])
+
+    assert graph.get_execution_order('c') == ['c', 'a', 'b']
+    assert graph.get_execution_order('a') == ['a', 'b']
+
+
+def test_rejected_cell_keeps_its_position():
+    """A new cell rejected for a cycle resolves reads from its own position once fixed."""
+    graph = DependencyGraph()
+    graph.set_cell_order(['c1', 'c2', 'c3', 'c4'])
+    graph.update_cell('c1', reads=set(), writes={'x'})
+    graph.update_cell('c3', reads=set(), writes={'x'})
+    graph.update_cell('c4', reads={'y'}, writes={'q'})
+
+    with pytest.raises(CycleDetectedError):
+        graph.update_cell('c2', reads={'x', 'q'}, writes={'y'})
+    graph.update_cell('c2', reads={'x'}, writes={'y'})
+
+    assert graph.ancestors('c2') == {'c1'}
+    assert graph.get_execution_order('c3') == ['c3']
+
+
+def test_incremental_edges_match_rebuild():
+    """Edits, removals and reorders give the same edges as building from scratch."""
+    rng = random.Random(1)
+    graph = DependencyGraph()
+    cells = [f"c{i}" for i in range(15)]
+    for step in range(400):
+        cell = rng.choice(cells)
+        action = rng.random()
+        if action < 0.1:
+            graph.remove_cell(cell)
+        elif action < 0.15:
+            rng.shuffle(cells)
+            try:
+                graph.set_cell_order(cells)
+            except CycleDetectedError:
+                pass
+        else:
+            reads = {f"v{rng.randrange(8)}" for _ in range(rng.randrange(3))}
+            writes = {f"v{rng.randrange(8)}" for _ in range(rng.randrange(3))}
+            try:
+                graph.update_cell(cell, reads=reads, writes=writes)
+            except CycleDetectedError:
+                pass
+
+        registered = sorted((c for c in cells if graph.has_cell(c)), key=graph._rank.__getitem__)
+        rebuilt = DependencyGraph()
+        rebuilt.set_cell_order(registered)
+        errors = rebuilt.update_cells({
+            c: (graph.get_cell_dependencies(c)['reads'], graph.get_cell_dependencies(c)['writes'])
+            for c in registered
+        })
+        assert errors == {}
+        assert set(graph.edges()) == set(rebuilt.edges())
+        assert_order_is_topological(graph)
@@ -0,0 +1,109 @@
+"""Tests for how the kernel reads its request queue."""
+import queue
+
+from app.kernel import process
+from app.kernel.process import Kernel
+from app.kernel.types import ExecuteRequest, RegisterCellRequest, SetCellOrderRequest
+
+
+def register(cell_id: str, code: str) -> dict:
+    return RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python').model_dump()
+
+
+def run_requests(kernel: Kernel, *requests: dict) -> Kernel:
+    """Queue the requests (then shutdown) and run the kernel over them."""
+    input_queue = queue.Queue()
+    for request in requests:
+        input_queue.put(request)
+    input_queue.put({'type': 'shutdown'})
+    kernel.run(input_queue)
+    return kernel
+
+
+def registered_writes(kernel: Kernel, cell_id: str) -> list[list[str]]:
+    return [
+        m['output']['data']['writes'] for m in kernel.output.messages
+        if m.get('cell_id') == cell_id and m['output']['channel'] == 'metadata'
+    ]
+
+
+def test_superseded_registrations_dropped(new_kernel):
+    """Only the last of a run of registrations for a cell is processed."""
+    kernel = run_requests(
+        new_kernel(),
+        register('c1', 'a = 1'),
+        register('c2', 'b = 1'),
+        register('c1', 'c = 1'),
+        register('c1', 'd = 1'),
+    )
+
+    assert registered_writes(kernel, 'c1') == [['d']]
+    assert registered_writes(kernel, 'c2') == [['b']]
+    assert kernel.cell_registry['c1'] == ('d = 1', 'python')
+
+
+def test_registration_before_execute_kept(new_kernel):
+    """A registration followed by a request that may use it is processed."""
+    kernel = run_requests(
+        new_kernel(),
+        register('c1', 'a = 1'),
+        ExecuteRequest(cell_id='c1', code='a = 1', cell_type='python').model_dump(),
+        register('c1', 'a = 2'),
+    )
+
+    assert registered_writes(kernel, 'c1') == [['a'], ['a'], ['a']]
+    assert kernel.python_executor.globals_dict['a'] == 1
+
+
+def test_cascade_planned_when_requested(new_kernel):
+    """Dependencies registered after an execute request don't change its cascade."""
+    kernel = run_requests(
+        new_kernel(),
+        register('c1', 'a = 1'),
+        register('c2', 'b = a'),
+        ExecuteRequest(cell_id='c1', code='a = 1', cell_type='python').model_dump(),
+        register('c2', 'b = 5'),
+        register('c3', 'c = a'),
+    )
+
+    namespace = kernel.python_executor.globals_dict
+    assert namespace['b'] == 1
+    assert 'c' not in namespace
+    assert not kernel.has_run['c2']
+
+
+def test_paged_tables_bounded_and_dropped_with_cell(new_kernel, monkeypatch):
+    """Only TABLE_KEEP_ROWS rows are kept for paging, and deleting the cell drops them."""
+    monkeypatch.setattr(process, 'TABLE_PAGE_SIZE', 10)
+    monkeypatch.setattr(process, 'TABLE_KEEP_ROWS', 50)
+    code = 'import pandas as pd\npd.DataFrame({"n": range(200)})'
+    kernel = run_requests(
+        new_kernel(),
+        register('c1', code),
+        ExecuteRequest(cell_id='c1', code=code, cell_type='python').model_dump(),
+    )
+
+    table = next(m['output']['data'] for m in kernel.output.messages if m['output']['channel'] == 'output')
+    assert len(table['rows']) == 10
+    assert table['total_rows'] == 50
+    assert table['truncated']
+    assert len(kernel.tables['c1']['rows']) == 50
+
+    kernel.handle_set_cell_order(SetCellOrderRequest(cell_ids=[]).model_dump())
+    assert kernel.tables == {}
+
+
+def test_ancestor_run_by_earlier_request_not_repeated(new_kernel):
+    """A stale ancestor brought up to date by the previous run isn't run again."""
+    kernel = run_requests(
+        new_kernel(),
+        register('c1', 'a = 1'),
+        register('c2', 'b = a'),
+        ExecuteRequest(cell_id='c1', code='a = 1', cell_type='python').model_dump(),
+        ExecuteRequest(cell_id='c2', code='b = a', cell_type='python').model_dump(),
+    )
+
+    running = [m['cell_id'] for m in kernel.output.messages
+               if m['output']['channel'] == 'status' and m['output']['data']['status'] == 'running']
+    assert running.count('c1') == 1
+    assert running.count('c2') == 2
@@ -0,0 +1,177 @@
+"""
+Tests for the kernel → coordinator output channel.
+
+Validates that:
+- Messages written by the kernel side arrive in order on the event loop
+- Frames larger than one pipe read are reassembled
+- Kernel death is reported immediately (no polling timeout)
+- Shutdown waits for the output task before closing the channel
+- Notifications are coalesced into batch frames
+"""
+
+import pytest
+import asyncio
+import multiprocessing
+from app.kernel.channel import NotificationBatcher, OutputChannel, OutputReader
+from app.orchestration.coordinator import NotebookCoordinator
+from app.models import NotebookResponse, CellResponse
+from app.file_storage import NotebookFileStorage
+
+
+class MockBroadcaster:
+    """Mock broadcaster that captures all messages for verification."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+
+    async def broadcast(self, message: dict):
+        """Capture broadcasted message (batch frames are unpacked)."""
+        if message.get('type') == 'batch':
+            self.messages.extend(message['messages'])
+        else:
+            self.messages.append(message)
+
+    def get_messages_by_type(self, msg_type: str) -> list[dict]:
+        """Get all messages of a specific type."""
+        return [m for m in self.messages if m.get('type') == msg_type]
+
+
+@pytest.mark.asyncio
+async def test_messages_arrive_in_order():
+    """Messages are delivered in the order they were sent."""
+    reader_conn, writer_conn = multiprocessing.Pipe(duplex=False)
+    reader = OutputReader(reader_conn)
+    channel = OutputChannel(writer_conn)
+    reader.attach()
+
+    for i in range(50):
+        channel.put({'seq': i})
+
+    received = [await asyncio.wait_for(reader.get(), timeout=1) for _ in range(50)]
+    assert [m['seq'] for m in received] == list(range(50))
+
+    channel.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_large_frames_are_reassembled():
+    """A message bigger than one pipe read arrives intact."""
+    reader_conn, writer_conn = multiprocessing.Pipe(duplex=False)
+    reader = OutputReader(reader_conn)
+    channel = OutputChannel(writer_conn)
+    reader.attach()
+
+    payload = 'x' * 500_000
+    loop = asyncio.get_running_loop()
+    # Pipe buffer is smaller than the payload, so write from another thread
+    send = loop.run_in_executor(None, channel.put, {'data': payload})
+
+    message = await asyncio.wait_for(reader.get(), timeout=5)
+    await send
+    assert message['data'] == payload
+
+    channel.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_closed_writer_raises_eof():
+    """Closing the kernel side ends the stream with EOFError."""
+    reader_conn, writer_conn = multiprocessing.Pipe(duplex=False)
+    reader = OutputReader(reader_conn)
+    channel = OutputChannel(writer_conn)
+    reader.attach()
+
+    channel.put({'last': True})
+    channel.close()
+
+    assert (await asyncio.wait_for(reader.get(), timeout=1)) == {'last': True}
+    with pytest.raises(EOFError):
+        await asyncio.wait_for(reader.get(), timeout=1)
+
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_until_flush():
+    """Buffered notifications go out as one frame, in order."""
+    reader_conn, writer_conn = multiprocessing.Pipe(duplex=False)
+    reader = OutputReader(reader_conn)
+    channel = OutputChannel(writer_conn)
+    batcher = NotificationBatcher(channel, flush_interval=60)
+    reader.attach()
+
+    for i in range(3):
+        batcher.add({'seq': i})
+    batcher.send({'type': 'ack'})
+
+    frame = await asyncio.wait_for(reader.get(), timeout=1)
+    assert frame['type'] == 'notification_batch'
+    assert [n['seq'] for n in frame['notifications']] == [0, 1, 2]
+    assert (await asyncio.wait_for(reader.get(), timeout=1)) == {'type': 'ack'}
+
+    channel.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_after_interval():
+    """A lone notification is sent on its own once the flush window passes."""
+    reader_conn, writer_conn = multiprocessing.Pipe(duplex=False)
+    reader = OutputReader(reader_conn)
+    channel = OutputChannel(writer_conn)
+    batcher = NotificationBatcher(channel, flush_interval=0.01)
+    reader.attach()
+
+    batcher.add({'seq': 0})
+
+    assert (await asyncio.wait_for(reader.get(), timeout=1)) == {'seq': 0}
+
+    channel.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_kernel_death_detected_immediately():
+    """Killing the kernel broadcasts kernel_error without a polling delay."""
+    broadcaster = MockBroadcaster()
+    coord = NotebookCoordinator(broadcaster)
+
+    notebook = NotebookResponse(
+        id='test-empty',
+        name='Test Kernel Death',
+        cells=[CellResponse(id='c1', type='python', code='x = 1')]
+    )
+    NotebookFileStorage.serialize_notebook(notebook)
+
+    try:
+        await coord.load_notebook('test-empty')
+
+        coord.kernel.process.kill()
+        await asyncio.sleep(0.2)
+
+        assert len(broadcaster.get_messages_by_type('kernel_error')) == 1
+        assert not coord.is_alive
+    finally:
+        await coord.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_output_task():
+    """The output task has finished by the time shutdown returns."""
+    coord = NotebookCoordinator(MockBroadcaster())
+
+    notebook = NotebookResponse(
+        id='test-empty',
+        name='Test Shutdown',
+        cells=[CellResponse(id='c1', type='python', code='x = 1')]
+    )
+    NotebookFileStorage.serialize_notebook(notebook)
+
+    await coord.load_notebook('test-empty')
+    output_task = coord._output_task
+    await coord.shutdown()
+
+    assert output_task.done()
+    assert not coord.is_alive
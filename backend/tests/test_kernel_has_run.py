@@ -23,8 +23,11 @@ class MockBroadcaster:
         self.messages: list[dict] = []
 
     async def broadcast(self, message: dict):
-        """Capture broadcasted message."""
-        self.messages.append(message)
+        """Capture broadcasted message (batch frames are unpacked)."""
+        if message.get('type') == 'batch':
+            self.messages.extend(message['messages'])
+        else:
+            self.messages.append(message)
 
     def get_messages_by_type(self, msg_type: str) -> list[dict]:
         """Get all messages of a specific type."""
@@ -65,7 +68,7 @@ def coordinator(event_loop):
 
     yield coord, broadcaster
 
-    coord.shutdown()
+    event_loop.run_until_complete(coord.shutdown())
 
 
 @pytest.mark.asyncio
@@ -261,7 +264,7 @@ async def test_registration_invalidates_has_run(coordinator):
 
 @pytest.mark.asyncio
 async def test_cascade_includes_descendants_always(coordinator):
-    """Running c1 should always cascade to c2 and c3, regardless of has_run."""
+    """Running c1 should always cascade to c2 and c3 (run, or skipped if unchanged), regardless of has_run."""
     coord, broadcaster = coordinator
 
     # Run all cells first
@@ -273,10 +276,117 @@ async def test_cascade_includes_descendants_always(coordinator):
     await coord.handle_run_cell('c1')
     await asyncio.sleep(0.8)
 
-    # Verify c2 and c3 executed (reactive cascade)
+    # Verify c2 and c3 were visited (reactive cascade)
     for cell_id in ['c1', 'c2', 'c3']:
         status_msgs = [
             m for m in broadcaster.messages
             if m.get('type') == 'cell_status' and m.get('cellId') == cell_id
         ]
         assert len(status_msgs) >= 1, f"Cell {cell_id} should execute (reactive cascade)"
+
+
+def statuses(broadcaster, cell_id: str) -> list[str]:
+    """Statuses broadcast for a cell, in order."""
+    return [
+        m['status'] for m in broadcaster.messages
+        if m.get('type') == 'cell_status' and m.get('cellId') == cell_id
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_values_skip_descendants(coordinator):
+    """Descendants are skipped when the re-run cell writes the same values."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    # Different code, same value of x
+    await coord.handle_cell_update('c1', 'x = 5 + 5')
+    await asyncio.sleep(0.3)
+    broadcaster.clear()
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    assert statuses(broadcaster, 'c1') == ['running', 'success']
+    assert statuses(broadcaster, 'c2') == ['skipped']
+    assert statuses(broadcaster, 'c3') == ['skipped']
+
+
+@pytest.mark.asyncio
+async def test_cascade_stops_where_values_stop_changing(coordinator):
+    """A changed cell runs its children, but only as far as values change."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    # y keeps its value, so c3 doesn't need to run
+    await coord.handle_cell_update('c2', 'y = x + x')
+    await asyncio.sleep(0.3)
+    broadcaster.clear()
+
+    await coord.handle_run_cell('c2')
+    await asyncio.sleep(0.8)
+
+    assert statuses(broadcaster, 'c2') == ['running', 'success']
+    assert statuses(broadcaster, 'c3') == ['skipped']
+
+    # A new value of x runs everything downstream
+    await coord.handle_cell_update('c1', 'x = 11')
+    await asyncio.sleep(0.3)
+    broadcaster.clear()
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    assert statuses(broadcaster, 'c2') == ['running', 'success']
+    assert statuses(broadcaster, 'c3') == ['running', 'success']
+
+
+@pytest.mark.asyncio
+async def test_cells_modifying_inputs_in_place_always_run(coordinator):
+    """A cell that mutates another cell's value isn't skipped when that value is recreated."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c1', "x = {'n': 10}")
+    await coord.handle_cell_update('c2', "x['n'] += 1\ny = x['n']")
+    await asyncio.sleep(0.3)
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+    broadcaster.clear()
+
+    # c1 recreates an equal dict that c2 hasn't modified yet
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    assert statuses(broadcaster, 'c2') == ['running', 'success']
+    assert statuses(broadcaster, 'c3') == ['skipped']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('setup, modify', [
+    ("x = []", "x.append(1)\ny = len(x)"),
+    (
+        "import pandas as pd\nx = pd.DataFrame({'v': [3, 1, 2]})",
+        "x.sort_values('v', inplace=True)\ny = int(x['v'].iloc[0])",
+    ),
+])
+async def test_cells_modifying_inputs_through_method_calls_run(coordinator, setup, modify):
+    """In-place changes made by method calls are found after the run, so the cell isn't skipped."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c1', setup)
+    await coord.handle_cell_update('c2', modify)
+    await asyncio.sleep(0.3)
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+    broadcaster.clear()
+
+    # c1 recreates the value c2 modified
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    assert statuses(broadcaster, 'c2') == ['running', 'success']
+    assert statuses(broadcaster, 'c3') == ['skipped']
@@ -0,0 +1,136 @@
+"""Tests for interrupting a running cascade."""
+import multiprocessing
+import pickle
+import queue
+import threading
+
+import pytest
+
+from app.kernel.channel import NotificationBatcher, OutputChannel
+from app.kernel.process import Kernel, _PythonRun
+from app.kernel.scheduler import clear_interrupt
+from app.kernel.types import CellChannel, ExecuteRequest, RegisterCellRequest
+
+
+def run_interrupted(kernel: Kernel, cells: dict[str, str], run: str, after: float = 0.3) -> Kernel:
+    """Register the cells, run one and interrupt the cascade after a delay."""
+    for cell_id, code in cells.items():
+        kernel.handle_register_cell(RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python').model_dump())
+
+    timer = threading.Timer(after, kernel.interrupt)
+    timer.start()
+    try:
+        kernel.handle_execute(ExecuteRequest(cell_id=run, code=cells[run], cell_type='python').model_dump())
+    finally:
+        timer.cancel()
+    return kernel
+
+
+def channel(kernel: Kernel, name: str) -> list[tuple[str, object]]:
+    return [(m['cell_id'], m['output']['data']) for m in kernel.output.messages if m['output']['channel'] == name]
+
+
+def test_interrupt_stops_cascade_and_keeps_namespace(new_kernel):
+    """The running cell gets a KeyboardInterrupt and the rest of the cascade is blocked."""
+    kernel = run_interrupted(
+        new_kernel(),
+        {'c1': 'x = 1', 'c2': 'y = x\nwhile True:\n    pass', 'c3': 'z = y'},
+        run='c1',
+    )
+
+    statuses = {cell_id: data['status'] for cell_id, data in channel(kernel, 'status')}
+    assert statuses == {'c1': 'success', 'c2': 'error', 'c3': 'blocked'}
+    assert 'KeyboardInterrupt' in channel(kernel, 'error')[0][1]['message']
+    assert kernel.python_executor.globals_dict['y'] == 1
+    assert not kernel.has_run['c3']
+
+
+def test_interrupt_while_idle_has_no_effect(new_kernel):
+    """An interrupt with nothing running isn't carried into the next run."""
+    kernel = new_kernel()
+    kernel.handle_register_cell(RegisterCellRequest(cell_id='c1', code='x = 1', cell_type='python').model_dump())
+
+    kernel.interrupt()
+    kernel.handle_execute(ExecuteRequest(cell_id='c1', code='x = 1', cell_type='python').model_dump())
+
+    assert [data['status'] for _, data in channel(kernel, 'status')] == ['idle', 'running', 'success']
+
+
+def test_interrupt_blocks_queued_runs(new_kernel):
+    """Runs requested before an interrupt are blocked even if they hadn't started."""
+    kernel = new_kernel()
+    slow = 'import time\nfor _ in range(100):\n    time.sleep(0.01)'
+    requests = queue.Queue()
+    for cell_id, code in (('c1', slow), ('c2', 'y = 1')):
+        requests.put(RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python').model_dump())
+    requests.put(ExecuteRequest(cell_id='c1', code=slow, cell_type='python').model_dump())
+    requests.put(ExecuteRequest(cell_id='c2', code='y = 1', cell_type='python').model_dump())
+    requests.put({'type': 'interrupt'})
+    requests.put({'type': 'shutdown'})
+    kernel.run(requests)
+
+    assert 'y' not in kernel.python_executor.globals_dict
+    assert [data['status'] for cell_id, data in channel(kernel, 'status') if cell_id == 'c2'][-1] == 'blocked'
+
+
+def test_held_interrupt_goes_to_cell_thread(new_kernel):
+    """An interrupt held while another thread flushes the cell's output is raised in the cell."""
+    kernel = new_kernel()
+    run = _PythonRun(threading.get_ident())
+    run.pending = True
+    kernel._python_threads['c1'] = run
+    raised = []
+
+    def flush():
+        try:
+            kernel._send_output(run, 'c1', CellChannel.STDOUT, 'x')
+        except KeyboardInterrupt:
+            raised.append('timer')
+
+    timer = threading.Thread(target=flush)
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            timer.start()
+            timer.join()
+            for _ in range(10**8):
+                pass
+    finally:
+        clear_interrupt(run.thread_id)
+        timer.join()
+    assert raised == []
+
+
+def test_interrupt_while_printing_keeps_channel_intact():
+    """Interrupts wait until output is queued, so every frame on the pipe stays readable."""
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    kernel = Kernel(NotificationBatcher(OutputChannel(writer), max_batch=4))
+    code = "while True:\n    print('x' * 1000)"
+    kernel.handle_register_cell(RegisterCellRequest(cell_id='c1', code=code, cell_type='python').model_dump())
+
+    messages = []
+
+    def drain():
+        while True:
+            try:
+                messages.append(pickle.loads(reader.recv_bytes()))
+            except EOFError:
+                return
+
+    drainer = threading.Thread(target=drain)
+    drainer.start()
+
+    timer = threading.Timer(0.3, kernel.interrupt)
+    timer.start()
+    try:
+        kernel.handle_execute(ExecuteRequest(cell_id='c1', code=code, cell_type='python').model_dump())
+        kernel.output.flush()
+    finally:
+        timer.cancel()
+        kernel.scheduler.shutdown()
+        kernel.loop.stop()
+        writer.close()
+        drainer.join(timeout=5)
+
+    notifications = [n for m in messages for n in m.get('notifications', [m])]
+    statuses = [n['output']['data']['status'] for n in notifications if n['output']['channel'] == 'status']
+    assert statuses[-1] == 'error'
@@ -0,0 +1,75 @@
+"""
+Tests for the warm kernel pool.
+
+Validates that:
+- The pool fills up to its configured size in the background
+- Checking out a warm kernel counts as a hit and returns a live process
+- The pool replenishes after checkout
+- An empty pool falls back to a cold start (miss)
+"""
+
+import time
+import pytest
+from app.kernel.pool import KernelPool
+
+
+def wait_for(predicate, timeout: float = 30.0) -> bool:
+    """Poll predicate until it returns True or timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def pool():
+    pool = KernelPool(size=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_fills_in_background(pool):
+    """Starting the pool pre-starts kernels up to its size."""
+    pool.start()
+
+    assert wait_for(lambda: pool.stats()['idle'] == 1)
+
+
+def test_warm_checkout_is_a_hit(pool):
+    """Checking out from a filled pool returns a running kernel instantly."""
+    pool.start()
+    assert wait_for(lambda: pool.stats()['idle'] == 1)
+
+    start = time.time()
+    kernel = pool.checkout()
+    duration = time.time() - start
+
+    try:
+        assert kernel.process.is_alive()
+        assert duration < 0.1, f"Warm checkout took {duration}s"
+
+        stats = pool.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 0
+        assert stats['hit_rate'] == 1.0
+
+        # Pool replenishes after checkout
+        assert wait_for(lambda: pool.stats()['idle'] == 1)
+    finally:
+        kernel.stop()
+
+
+def test_empty_pool_falls_back_to_cold_start():
+    """A disabled pool still hands out working kernels (as misses)."""
+    pool = KernelPool(size=0)
+    kernel = pool.checkout()
+
+    try:
+        assert kernel.process.is_alive()
+        assert pool.stats()['misses'] == 1
+        assert pool.stats()['hit_rate'] == 0.0
+    finally:
+        kernel.stop()
+        pool.shutdown()
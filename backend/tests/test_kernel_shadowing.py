@@ -0,0 +1,83 @@
+"""Tests for variables defined by several cells (resolved by notebook order)."""
+from app.kernel.process import Kernel
+from app.kernel.types import ExecuteRequest, RegisterCellRequest, RegisterCellsRequest, SetCellOrderRequest
+
+CELLS = {
+    'c1': 'x = 10',
+    'c2': 'y = x * 2',
+    'c3': 'x = 99',
+    'c4': 'z = x + 1',
+}
+
+
+def register_cells(kernel: Kernel) -> Kernel:
+    kernel.handle_register_cells(RegisterCellsRequest(
+        request_id='r1',
+        cells=[RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python') for cell_id, code in CELLS.items()],
+    ).model_dump())
+    return kernel
+
+
+def run(kernel: Kernel, cell_id: str, code: str = None):
+    if code is not None:
+        kernel.handle_register_cell(RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python').model_dump())
+    kernel.output.messages.clear()
+    kernel.handle_execute(ExecuteRequest(cell_id=cell_id, code=code or CELLS[cell_id], cell_type='python').model_dump())
+
+
+def statuses(kernel: Kernel) -> dict[str, list[str]]:
+    result: dict[str, list[str]] = {}
+    for m in kernel.output.messages:
+        if m['output']['channel'] == 'status':
+            result.setdefault(m['cell_id'], []).append(m['output']['data']['status'])
+    return result
+
+
+def test_readers_see_definition_above_them(new_kernel):
+    """c2 reads c1's x and c4 reads c3's, whichever order they run in."""
+    kernel = register_cells(new_kernel())
+    run(kernel, 'c4')
+    namespace = kernel.python_executor.globals_dict
+
+    assert (namespace['y'], namespace['z'], namespace['x']) == (20, 100, 99)
+    assert list(statuses(kernel)) == ['c1', 'c2', 'c3', 'c4']
+
+
+def test_redefinition_reruns_after_earlier_definition_changes(new_kernel):
+    """Changing c1 re-runs c3 so x ends up as its last definition; c4 sees no change."""
+    kernel = register_cells(new_kernel())
+    run(kernel, 'c4')
+    run(kernel, 'c1', 'x = 11')
+    namespace = kernel.python_executor.globals_dict
+
+    assert (namespace['y'], namespace['z'], namespace['x']) == (22, 100, 99)
+    assert statuses(kernel)['c3'][-1] == 'success'
+    assert statuses(kernel)['c4'] == ['skipped']
+
+
+def test_deleted_definition_hands_readers_back(new_kernel):
+    """Cells left out of the order are dropped; their readers fall back to c1."""
+    kernel = register_cells(new_kernel())
+    kernel.handle_set_cell_order(SetCellOrderRequest(cell_ids=['c1', 'c2', 'c4']).model_dump())
+
+    assert 'c3' not in kernel.cell_registry
+    assert kernel.graph.writers_of('x') == {'c1'}
+    assert kernel.graph.get_execution_order('c1') == ['c1', 'c2', 'c4']
+
+
+def test_fixed_cycle_reads_definition_above(new_kernel):
+    """A cell rejected for a cycle keeps its place, so once fixed it sees c1's x, not c3's."""
+    kernel = new_kernel()
+    kernel.handle_set_cell_order(SetCellOrderRequest(cell_ids=['c1', 'c2', 'c3', 'c4']).model_dump())
+    kernel.handle_register_cells(RegisterCellsRequest(
+        request_id='r1',
+        cells=[
+            RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python')
+            for cell_id, code in {'c1': 'x = 1', 'c3': 'x = 2', 'c4': 'q = y', 'c2': 'y = x + q'}.items()
+        ],
+    ).model_dump())
+    assert 'c2' not in kernel.cell_registry
+
+    run(kernel, 'c2', 'y = x')
+
+    assert kernel.python_executor.globals_dict['y'] == 1
@@ -0,0 +1,140 @@
+"""Tests for on-disk memoization of `# memo` cells."""
+import builtins
+
+import pytest
+
+from app.core.ast_parser import is_memoized
+from app.core.executor import Output
+from app.core.fingerprint import fingerprint
+from app.core.memo import MemoCache
+from app.kernel.process import Kernel
+from app.kernel.types import ExecuteRequest, RegisterCellRequest, RegisterCellsRequest
+
+MEMO_CELL = """# memo
+import builtins
+builtins._memo_test_runs = getattr(builtins, '_memo_test_runs', 0) + 1
+print('loading')
+data = [base * i for i in range(3)]
+"""
+
+
+@pytest.fixture
+def run_count():
+    builtins._memo_test_runs = 0
+    yield lambda: builtins._memo_test_runs
+    del builtins._memo_test_runs
+
+
+def run_notebook(kernel: Kernel, memo_dir, cells: dict[str, str]) -> Kernel:
+    """Register the cells with a fresh kernel and run them all."""
+    kernel.memo = MemoCache(memo_dir)
+    kernel.handle_register_cells(RegisterCellsRequest(
+        request_id='r1',
+        cells=[RegisterCellRequest(cell_id=cell_id, code=code, cell_type='python') for cell_id, code in cells.items()],
+    ).model_dump())
+    for cell_id in cells:
+        kernel.handle_execute(ExecuteRequest(cell_id=cell_id, code=cells[cell_id], cell_type='python').model_dump())
+    return kernel
+
+
+def stdout_of(kernel: Kernel, cell_id: str) -> str:
+    return ''.join(
+        m['output']['data'] for m in kernel.output.messages
+        if m.get('cell_id') == cell_id and m['output']['channel'] == 'stdout'
+    )
+
+
+def test_memo_directive():
+    """Only a line that is exactly `# memo` opts in."""
+    assert is_memoized("# memo\nx = 1")
+    assert is_memoized("x = 1\n  #MEMO  ")
+    assert not is_memoized("x = 1  # memo")
+    assert not is_memoized("# memoize this\nx = 1")
+
+
+def test_memo_cell_restored_after_restart(tmp_path, run_count, new_kernel):
+    """A new kernel restores a memo cell's writes and output instead of running it."""
+    cells = {'c1': 'base = 10', 'c2': MEMO_CELL}
+
+    first = run_notebook(new_kernel(), tmp_path, cells)
+    second = run_notebook(new_kernel(), tmp_path, cells)
+
+    assert run_count() == 1
+    assert second.python_executor.globals_dict['data'] == [0, 10, 20]
+    assert 'Restored from cache' in stdout_of(second, 'c2')
+    assert 'loading' in stdout_of(second, 'c2')
+    assert first.has_run['c2'] and second.has_run['c2']
+
+
+def test_memo_cell_reruns_when_inputs_change(tmp_path, run_count, new_kernel):
+    """Different input values are a miss."""
+    run_notebook(new_kernel(), tmp_path, {'c1': 'base = 10', 'c2': MEMO_CELL})
+    kernel = run_notebook(new_kernel(), tmp_path, {'c1': 'base = 11', 'c2': MEMO_CELL})
+
+    assert run_count() == 2
+    assert kernel.python_executor.globals_dict['data'] == [0, 11, 22]
+
+
+def test_memo_cell_updating_its_input_reruns(tmp_path, new_kernel):
+    """A memo cell that reads and writes the same name is keyed on its value before the run."""
+    def run_first_cell(base: str) -> Kernel:
+        kernel = new_kernel()
+        kernel.memo = MemoCache(tmp_path)
+        kernel.handle_register_cells(RegisterCellsRequest(request_id='r1', cells=[
+            RegisterCellRequest(cell_id='c1', code=base, cell_type='python'),
+            RegisterCellRequest(cell_id='c2', code="# memo\nx += 1", cell_type='python'),
+        ]).model_dump())
+        kernel.handle_execute(ExecuteRequest(cell_id='c1', code=base, cell_type='python').model_dump())
+        return kernel
+
+    assert run_first_cell('x = 1').python_executor.globals_dict['x'] == 2
+    second = run_first_cell('x = 100')
+
+    assert second.python_executor.globals_dict['x'] == 101
+    assert 'Restored from cache' not in stdout_of(second, 'c2')
+
+
+def test_identity_inputs_are_not_memoized(tmp_path):
+    """Inputs without a stable fingerprint (e.g. functions) can't be recognised after a restart."""
+    memo = MemoCache(tmp_path)
+
+    assert memo.key("# memo\ny = f()", {'f': fingerprint(lambda: 1)}) is None
+    assert memo.key("# memo\ny = pd.DataFrame()", {'pd': fingerprint(pytest)}) is not None
+
+
+def test_store_and_load_round_trip(tmp_path):
+    """Values, outputs and stdout come back as stored; modules are re-imported."""
+    memo = MemoCache(tmp_path)
+    key = memo.key("x = 1", {'a': fingerprint(1)})
+    outputs = [Output(mime_type='text/plain', data='1')]
+
+    assert memo.store(key, {'x': {'k': [1, 2]}, 'mod': builtins}, outputs, 'hi\n')
+    entry = memo.load(key)
+
+    assert entry.values == {'x': {'k': [1, 2]}, 'mod': builtins}
+    assert entry.outputs == outputs
+    assert entry.stdout == 'hi\n'
+
+
+def test_unpicklable_values_not_stored(tmp_path):
+    """A failed store leaves nothing behind."""
+    memo = MemoCache(tmp_path)
+
+    assert not memo.store('k', {'f': lambda: 1}, [], '')
+    assert memo.load('k') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    """Entries beyond max_bytes are evicted, least recently used first."""
+    memo = MemoCache(tmp_path, max_bytes=25_000)
+    blob = b'x' * 10_000
+
+    memo.store('a', {'v': blob}, [], '')
+    memo.store('b', {'v': blob}, [], '')
+    memo.load('a')  # b is now least recently used
+    memo.store('c', {'v': blob}, [], '')
+
+    assert memo.load('b') is None
+    assert memo.load('a') is not None
+    assert memo.load('c') is not None
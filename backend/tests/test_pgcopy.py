@@ -0,0 +1,123 @@
+"""Tests for the binary COPY decoder."""
+import struct
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from app.core import pgcopy
+from app.core.ast_parser import extract_sql_fetch_engine
+
+PG_EPOCH = datetime(2000, 1, 1)
+STRUCT_FORMATS = {'int2': '>h', 'int4': '>i', 'int8': '>q', 'float4': '>f', 'float8': '>d'}
+
+
+def encode_field(type_name, value) -> bytes:
+    """Encode one value the way PostgreSQL's binary send functions do."""
+    if value is None:
+        return struct.pack('>i', -1)
+    if type_name in ('text', 'varchar'):
+        data = value.encode('utf-8')
+    elif type_name == 'bool':
+        data = struct.pack('>?', value)
+    elif type_name == 'date':
+        data = struct.pack('>i', (value - PG_EPOCH.date()).days)
+    elif type_name in ('timestamp', 'timestamptz'):
+        delta = value - PG_EPOCH
+        data = struct.pack('>q', delta.days * 86_400_000_000 + delta.seconds * 1_000_000 + delta.microseconds)
+    else:
+        data = struct.pack(STRUCT_FORMATS[type_name], value)
+    return struct.pack('>i', len(data)) + data
+
+
+def encode_copy(type_names, rows) -> bytes:
+    """Build a binary COPY stream."""
+    parts = [pgcopy.SIGNATURE, struct.pack('>ii', 0, 0)]
+    for row in rows:
+        parts.append(struct.pack('>h', len(row)))
+        parts.extend(encode_field(name, value) for name, value in zip(type_names, row))
+    parts.append(struct.pack('>h', -1))
+    return b''.join(parts)
+
+
+def test_fixed_width_columns_without_nulls():
+    """Fixed-width columns with no NULLs decode to native arrays."""
+    types = ['int4', 'int8', 'float8', 'bool']
+    rows = [(1, 10**12, 1.5, True), (-2, 7, -0.25, False), (3, 0, 2.0, True)]
+
+    columns = pgcopy.decode(encode_copy(types, rows), types)
+
+    assert [column.values.tolist() for column in columns] == [list(values) for values in zip(*rows)]
+    assert all(column.nulls is None for column in columns)
+    assert columns[0].values.dtype == np.int32
+    assert columns[3].values.dtype == bool
+
+
+def test_nulls_and_text():
+    """NULLs are masked and text columns decode to str."""
+    types = ['int4', 'text', 'float8']
+    rows = [(1, 'alice', None), (None, None, 2.5), (3, 'zoë', 3.5)]
+
+    columns = pgcopy.decode(encode_copy(types, rows), types)
+
+    assert [pgcopy.to_list(column) for column in columns] == [list(values) for values in zip(*rows)]
+    assert columns[0].nulls.tolist() == [False, True, False]
+
+
+def test_dates_and_timestamps():
+    """Dates and timestamps decode to datetime64 and display as ISO strings."""
+    types = ['date', 'timestamp']
+    rows = [(date(2024, 2, 29), datetime(2024, 2, 29, 13, 45, 1, 250)), (date(1999, 12, 31), None)]
+
+    columns = pgcopy.decode(encode_copy(types, rows), types)
+
+    assert pgcopy.to_list(columns[0]) == ['2024-02-29', '1999-12-31']
+    assert pgcopy.to_list(columns[1]) == ['2024-02-29T13:45:01.000250', None]
+
+
+def test_empty_result():
+    """A stream with no rows gives empty columns."""
+    columns = pgcopy.decode(encode_copy(['int8', 'text'], []), ['int8', 'text'])
+
+    assert [len(column.values) for column in columns] == [0, 0]
+
+
+def test_rejects_non_copy_data():
+    """Data without the COPY signature is rejected."""
+    with pytest.raises(ValueError):
+        pgcopy.decode(b'not a copy stream', ['int4'])
+
+
+def test_to_dataframe_keeps_nullable_integers():
+    """Integer columns with NULLs become nullable Int columns, not floats."""
+    pytest.importorskip('pandas')
+    types = ['int8', 'int8']
+    columns = pgcopy.decode(encode_copy(types, [(1, 2), (None, 4)]), types)
+
+    df = pgcopy.to_dataframe(['a', 'a'], columns)
+
+    assert list(df.columns) == ['a', 'a']
+    assert str(df.iloc[:, 0].dtype) == 'Int64'
+    assert df.iloc[:, 1].tolist() == [2, 4]
+
+
+def test_to_dataframe_timestamptz_is_utc():
+    """timestamptz columns are UTC-aware, like the cursor engine's datetimes."""
+    pd = pytest.importorskip('pandas')
+    types = ['timestamptz', 'timestamp']
+    stamp = datetime(2024, 3, 1, 12, 30)
+    columns = pgcopy.decode(encode_copy(types, [(stamp, stamp), (None, stamp)]), types)
+
+    df = pgcopy.to_dataframe(['at', 'local'], columns)
+
+    assert df['at'].iloc[0] == pd.Timestamp(stamp, tz='UTC')
+    assert df['at'].isna().tolist() == [False, True]
+    assert df['local'].dt.tz is None
+
+
+def test_fetch_engine_directive():
+    """`-- engine:` selects the fetch engine."""
+    assert extract_sql_fetch_engine("-- engine: copy\nSELECT 1") == 'copy'
+    assert extract_sql_fetch_engine("SELECT 1\n--ENGINE:Auto") == 'auto'
+    assert extract_sql_fetch_engine("SELECT 1 -- engine: copy") is None
+    assert extract_sql_fetch_engine("-- engine: turbo\nSELECT 1") is None
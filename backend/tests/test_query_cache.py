@@ -0,0 +1,179 @@
+"""Tests for the SQL result cache."""
+import pytest
+
+from app.core.executor import SQLExecutor, _is_query
+from app.core.query_cache import QueryCache, estimate_size, make_key
+
+CONN = "postgresql://localhost/db"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    """Entries older than the TTL are misses."""
+    clock = FakeClock()
+    cache = QueryCache(max_bytes=1000, ttl=10, clock=clock)
+    key = make_key(CONN, "SELECT 1", [])
+
+    cache.put(key, 'result', 10)
+    clock.now = 9
+    assert cache.get(key).value == 'result'
+    clock.now = 10
+    assert cache.get(key) is None
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_evicted_by_size():
+    """Going over max_bytes evicts the least recently used entries."""
+    cache = QueryCache(max_bytes=100, ttl=60)
+    a, b, c = (make_key(CONN, f"SELECT {n}", []) for n in range(3))
+
+    cache.put(a, 'a', 40)
+    cache.put(b, 'b', 40)
+    cache.get(a)  # b is now least recently used
+    cache.put(c, 'c', 40)
+
+    assert cache.get(b) is None
+    assert cache.get(a).value == 'a'
+    assert cache.get(c).value == 'c'
+    assert cache.total_bytes == 80
+
+
+def test_oversized_result_not_cached():
+    """A result bigger than the whole cache is not stored."""
+    cache = QueryCache(max_bytes=100, ttl=60)
+    key = make_key(CONN, "SELECT 1", [])
+
+    cache.put(key, 'huge', 101)
+
+    assert cache.get(key) is None
+
+
+def test_invalidate_by_connection():
+    """Invalidation can be limited to one connection string."""
+    cache = QueryCache(max_bytes=1000, ttl=60)
+    mine = make_key(CONN, "SELECT 1", [])
+    theirs = make_key("postgresql://elsewhere/db", "SELECT 1", [])
+    cache.put(mine, 1, 10)
+    cache.put(theirs, 2, 10)
+
+    assert cache.invalidate(CONN) == 1
+    assert cache.get(mine) is None
+    assert cache.get(theirs).value == 2
+    assert cache.invalidate() == 1
+
+
+def test_key_normalization_and_parameter_types():
+    """Trailing whitespace/semicolons don't matter; parameter types do."""
+    assert make_key(CONN, "SELECT $1;\n", [1]) == make_key(CONN, "  SELECT $1", [1])
+    assert make_key(CONN, "SELECT $1", [1]) != make_key(CONN, "SELECT $1", [True])
+    assert make_key(CONN, "SELECT $1", [[1, 2]]) is not None
+    assert make_key(CONN, "SELECT $1", [{1}]) is None
+
+
+def test_statements_with_side_effects_are_writes():
+    """Only statements that just read data count as queries (cached, COPY-able)."""
+    assert _is_query("SELECT n FROM t")
+    assert _is_query("-- as df\nWITH u AS (SELECT 1) SELECT * FROM u")
+    assert _is_query("VALUES (1), (2)")
+    assert _is_query("SELECT intopic, sequence_value FROM t")
+
+    assert not _is_query("UPDATE t SET n = 1")
+    assert not _is_query("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d")
+    assert not _is_query("SELECT n INTO new_table FROM t")
+    assert not _is_query("SELECT nextval('t_id_seq')")
+    assert not _is_query("SELECT setval('t_id_seq', 10)")
+    assert not _is_query("SELECT set_config('search_path', 'app', false)")
+    assert not _is_query("SELECT pg_advisory_lock(1)")
+
+
+def test_estimate_size_samples_lists():
+    """List columns are estimated, not measured exactly, but scale with length."""
+    small = estimate_size([list(range(100))])
+    large = estimate_size([list(range(10_000))])
+
+    assert 0 < small < large
+    assert large == pytest.approx(small * 100, rel=0.2)
+
+
+class CountingSQLExecutor(SQLExecutor):
+    """SQLExecutor whose database always returns the same two rows."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.queries = []
+
+    async def _fetch_result(self, sql, params, engine):
+        self.queries.append((sql, params))
+        return 'cursor', ['n'], [[params[0] if params else 1, 2]], False
+
+
+@pytest.mark.asyncio
+async def test_unchanged_parameters_reuse_result():
+    """Re-running with the same parameter values doesn't query again."""
+    executor = CountingSQLExecutor()
+    executor.set_connection_string(CONN)
+
+    first = await executor.execute("SELECT n FROM t WHERE n > {x}", {'x': 1})
+    second = await executor.execute("SELECT n FROM t WHERE n > {x}", {'x': 1})
+    third = await executor.execute("SELECT n FROM t WHERE n > {x}", {'x': 5})
+
+    assert len(executor.queries) == 2
+    assert second.outputs[0].data == first.outputs[0].data
+    assert 'from cache' in second.stdout
+    assert third.outputs[0].data['rows'] == [[5], [2]]
+
+
+@pytest.mark.asyncio
+async def test_cache_opt_out_and_writes_invalidate():
+    """`-- cache: off` always queries; other statements clear the connection's results."""
+    executor = CountingSQLExecutor()
+    executor.set_connection_string(CONN)
+
+    await executor.execute("-- cache: off\nSELECT 1", {})
+    await executor.execute("-- cache: off\nSELECT 1", {})
+    assert len(executor.queries) == 2
+
+    await executor.execute("SELECT 1", {})
+    await executor.execute("UPDATE t SET n = 1", {})
+    await executor.execute("SELECT 1", {})
+    assert len(executor.queries) == 5
+
+
+@pytest.mark.asyncio
+async def test_explicit_run_bypasses_cache():
+    """A run the user asked for queries again and refreshes the cached result."""
+    executor = CountingSQLExecutor()
+    executor.set_connection_string(CONN)
+
+    await executor.execute("SELECT 1", {})
+    rerun = await executor.execute("SELECT 1", {}, use_cache=False)
+    cascaded = await executor.execute("SELECT 1", {})
+
+    assert len(executor.queries) == 2
+    assert 'from cache' not in rerun.stdout
+    assert 'from cache' in cascaded.stdout
+
+
+@pytest.mark.asyncio
+async def test_data_modifying_cte_is_a_write():
+    """WITH ... DELETE/INSERT/UPDATE/MERGE isn't cached and clears cached results."""
+    executor = CountingSQLExecutor()
+    executor.set_connection_string(CONN)
+    delete = "WITH d AS (DELETE FROM t WHERE n > 1 RETURNING *) SELECT count(*) FROM d"
+
+    await executor.execute("SELECT 1", {})
+    await executor.execute(delete, {})
+    await executor.execute(delete, {})
+    await executor.execute("SELECT 1", {})
+    assert len(executor.queries) == 4
+
+    await executor.execute("WITH u AS (SELECT n, updated_at FROM t) SELECT * FROM u", {})
+    await executor.execute("WITH u AS (SELECT n, updated_at FROM t) SELECT * FROM u", {})
+    assert len(executor.queries) == 5
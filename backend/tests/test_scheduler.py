@@ -0,0 +1,138 @@
+"""
+Tests for the cascade scheduler.
+
+Validates that:
+- Dependencies always finish before their dependents start
+- Independent SQL cells run concurrently
+- Python cells run one at a time unless parallel Python is enabled
+- The concurrency limit is respected
+- A cancelled run starts no more cells, including a cancel before it starts
+"""
+
+import threading
+import time
+import pytest
+from app.kernel.scheduler import CascadeScheduler
+
+
+class Recorder:
+    """run_cell stand-in that records start/end times and peak concurrency."""
+
+    def __init__(self, duration: float = 0.1):
+        self.duration = duration
+        self.starts: dict[str, float] = {}
+        self.ends: dict[str, float] = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, cell_id: str):
+        with self._lock:
+            self.starts[cell_id] = time.monotonic()
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.duration)
+        with self._lock:
+            self.active -= 1
+            self.ends[cell_id] = time.monotonic()
+
+
+# Diamond: a → b, a → c, b → d, c → d
+DIAMOND_ORDER = ['a', 'b', 'c', 'd']
+DIAMOND_EDGES = [('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd')]
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = CascadeScheduler(max_workers=4)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_dependencies_finish_before_dependents(scheduler):
+    """Every cell starts only after all of its parents ended."""
+    recorder = Recorder(duration=0.02)
+
+    scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: False)
+
+    assert set(recorder.ends) == set(DIAMOND_ORDER)
+    for parent, child in DIAMOND_EDGES:
+        assert recorder.ends[parent] <= recorder.starts[child]
+
+
+def test_independent_sql_cells_run_concurrently(scheduler):
+    """The two diamond siblings overlap, so the cascade takes ~3 steps, not 4."""
+    recorder = Recorder(duration=0.2)
+
+    start = time.monotonic()
+    scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: False)
+    elapsed = time.monotonic() - start
+
+    assert recorder.peak == 2
+    assert elapsed < 0.75, f"Cascade took {elapsed}s"
+
+
+def test_python_cells_are_serialized(scheduler):
+    """Python siblings don't overlap by default."""
+    recorder = Recorder(duration=0.05)
+
+    scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: True)
+
+    assert recorder.peak == 1
+
+
+def test_parallel_python_opt_in():
+    """With parallel_python, Python siblings overlap too."""
+    scheduler = CascadeScheduler(max_workers=4, parallel_python=True)
+    recorder = Recorder(duration=0.2)
+
+    try:
+        scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: True)
+    finally:
+        scheduler.shutdown()
+
+    assert recorder.peak == 2
+
+
+def test_concurrency_limit():
+    """No more than max_workers cells run at once."""
+    scheduler = CascadeScheduler(max_workers=2)
+    recorder = Recorder(duration=0.05)
+    cells = [f'q{i}' for i in range(6)]
+
+    try:
+        scheduler.run(cells, [], recorder, is_python=lambda c: False)
+    finally:
+        scheduler.shutdown()
+
+    assert recorder.peak == 2
+    assert set(recorder.ends) == set(cells)
+
+
+def test_cancel_stops_starting_cells(scheduler):
+    """Cells not started when the run is cancelled are returned; a new run starts afresh."""
+    recorder = Recorder(duration=0.02)
+
+    def run_cell(cell_id: str):
+        recorder(cell_id)
+        if cell_id == 'a':
+            scheduler.cancel()
+
+    not_run = scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, run_cell, is_python=lambda c: False)
+
+    assert set(recorder.ends) == {'a'}
+    assert not_run == ['b', 'c', 'd']
+    scheduler.reset()
+    assert scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: False) == []
+
+
+def test_cancel_before_run_is_kept(scheduler):
+    """A cancel that arrives before a run starts stops it; reset() clears it."""
+    recorder = Recorder(duration=0.01)
+
+    scheduler.cancel()
+    assert scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: False) == DIAMOND_ORDER
+    assert recorder.starts == {}
+
+    scheduler.reset()
+    assert scheduler.run(DIAMOND_ORDER, DIAMOND_EDGES, recorder, is_python=lambda c: False) == []
@@ -0,0 +1,158 @@
+"""
+Tests for notebook-scoped session sharing.
+
+Validates that:
+- Connections to the same notebook share one coordinator
+- Different notebooks get different coordinators
+- Broadcasts only reach connections of the same notebook
+- The kernel is kept for an idle grace period after the last disconnect
+- Re-attaching within the grace period reuses the session
+"""
+
+import pytest
+import asyncio
+from app.orchestration.session import SessionRegistry
+
+
+class FakeCoordinator:
+    """Stand-in coordinator that records lifecycle calls (no kernel process)."""
+
+    instances: list["FakeCoordinator"] = []
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.loaded_notebook = None
+        self.shutdown_called = False
+        FakeCoordinator.instances.append(self)
+
+    @property
+    def is_alive(self) -> bool:
+        return not self.shutdown_called
+
+    async def load_notebook(self, notebook_id: str):
+        await asyncio.sleep(0.01)
+        if notebook_id == 'missing':
+            raise ValueError(f"Notebook {notebook_id} not found")
+        self.loaded_notebook = notebook_id
+
+    async def shutdown(self):
+        self.shutdown_called = True
+
+
+@pytest.fixture
+def sent():
+    FakeCoordinator.instances.clear()
+    return []
+
+
+def make_registry(sent, idle_grace=0.1):
+    async def send(connection_id: str, message: dict):
+        sent.append((connection_id, message))
+
+    return SessionRegistry(send=send, coordinator_factory=FakeCoordinator, idle_grace=idle_grace)
+
+
+@pytest.mark.asyncio
+async def test_same_notebook_shares_coordinator(sent):
+    """Two connections to one notebook attach to the same coordinator."""
+    registry = make_registry(sent)
+
+    coord_a, coord_b = await asyncio.gather(
+        registry.acquire('nb1', 'conn-a'),
+        registry.acquire('nb1', 'conn-b'),
+    )
+
+    assert coord_a is coord_b
+    assert len(FakeCoordinator.instances) == 1
+    assert registry.get('nb1').ref_count == 2
+
+
+@pytest.mark.asyncio
+async def test_different_notebooks_get_separate_coordinators(sent):
+    """Each notebook gets its own coordinator."""
+    registry = make_registry(sent)
+
+    coord_1 = await registry.acquire('nb1', 'conn-a')
+    coord_2 = await registry.acquire('nb2', 'conn-b')
+
+    assert coord_1 is not coord_2
+    assert coord_1.loaded_notebook == 'nb1'
+    assert coord_2.loaded_notebook == 'nb2'
+
+
+@pytest.mark.asyncio
+async def test_broadcast_is_scoped_to_notebook(sent):
+    """A notebook's broadcasts only reach its own connections."""
+    registry = make_registry(sent)
+
+    coord_1 = await registry.acquire('nb1', 'conn-a')
+    await registry.acquire('nb1', 'conn-b')
+    await registry.acquire('nb2', 'conn-c')
+
+    await coord_1.broadcaster.broadcast({'type': 'cell_status', 'cellId': 'c1', 'status': 'running'})
+
+    assert sorted(cid for cid, _ in sent) == ['conn-a', 'conn-b']
+
+
+@pytest.mark.asyncio
+async def test_last_disconnect_tears_down_after_grace(sent):
+    """Kernel survives until the idle grace period expires."""
+    registry = make_registry(sent, idle_grace=0.1)
+
+    coord = await registry.acquire('nb1', 'conn-a')
+    await registry.acquire('nb1', 'conn-b')
+
+    await registry.release('nb1', 'conn-a')
+    await registry.release('nb1', 'conn-b')
+
+    # Still alive during grace period
+    assert not coord.shutdown_called
+    assert registry.get('nb1') is not None
+
+    await asyncio.sleep(0.2)
+
+    assert coord.shutdown_called
+    assert registry.get('nb1') is None
+
+
+@pytest.mark.asyncio
+async def test_reattach_within_grace_reuses_session(sent):
+    """Reconnecting before the grace period ends keeps the same kernel."""
+    registry = make_registry(sent, idle_grace=0.1)
+
+    coord = await registry.acquire('nb1', 'conn-a')
+    await registry.release('nb1', 'conn-a')
+
+    await asyncio.sleep(0.05)
+    coord_again = await registry.acquire('nb1', 'conn-b')
+    await asyncio.sleep(0.1)
+
+    assert coord_again is coord
+    assert not coord.shutdown_called
+    assert len(FakeCoordinator.instances) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached(sent):
+    """A notebook that fails to load doesn't leave a session behind."""
+    registry = make_registry(sent)
+
+    with pytest.raises(ValueError):
+        await registry.acquire('missing', 'conn-a')
+
+    assert registry.get('missing') is None
+    assert FakeCoordinator.instances[0].shutdown_called
+
+
+@pytest.mark.asyncio
+async def test_dead_session_is_replaced(sent):
+    """A new connection to a notebook whose kernel died gets a fresh coordinator."""
+    registry = make_registry(sent)
+
+    coord = await registry.acquire('nb1', 'conn-a')
+    coord.shutdown_called = True  # Simulate kernel death
+
+    coord_new = await registry.acquire('nb1', 'conn-b')
+
+    assert coord_new is not coord
+    assert len(FakeCoordinator.instances) == 2
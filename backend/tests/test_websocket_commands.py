@@ -17,9 +17,11 @@ These tests validate the simplified async architecture where:
 
 import pytest
 import asyncio
+import time
 from app.orchestration.coordinator import NotebookCoordinator
 from app.models import NotebookResponse, CellResponse
 from app.file_storage import NotebookFileStorage
+from app.websocket.handler import handle_message, manager
 
 
 class MockBroadcaster:
@@ -27,10 +29,15 @@ class MockBroadcaster:
 
     def __init__(self):
         self.messages: list[dict] = []
+        self.frames = 0
 
     async def broadcast(self, message: dict):
-        """Capture broadcasted message."""
-        self.messages.append(message)
+        """Capture broadcasted message (batch frames are unpacked)."""
+        self.frames += 1
+        if message.get('type') == 'batch':
+            self.messages.extend(message['messages'])
+        else:
+            self.messages.append(message)
 
     def get_messages_by_type(self, msg_type: str) -> list[dict]:
         """Get all messages of a specific type."""
@@ -43,6 +50,7 @@ class MockBroadcaster:
     def clear(self):
         """Clear message history."""
         self.messages.clear()
+        self.frames = 0
 
 
 @pytest.fixture
@@ -71,7 +79,37 @@ def coordinator(event_loop):
 
     yield coord, broadcaster
 
-    coord.shutdown()
+    event_loop.run_until_complete(coord.shutdown())
+
+
+@pytest.mark.asyncio
+async def test_load_notebook_waits_for_registration_ack():
+    """load_notebook returns only once every cell's dependencies are known."""
+    broadcaster = MockBroadcaster()
+    coord = NotebookCoordinator(broadcaster)
+
+    notebook = NotebookResponse(
+        id='test-commands',
+        name='Test Command Operations',
+        cells=[
+            CellResponse(id='c1', type='python', code='x = 10'),
+            CellResponse(id='c2', type='python', code='y = x * 2'),
+            CellResponse(id='c3', type='sql', code='SELECT {y} AS y'),
+        ]
+    )
+    NotebookFileStorage.serialize_notebook(notebook)
+
+    try:
+        await coord.load_notebook('test-commands')
+
+        # No sleep: metadata for all cells must already have been broadcast
+        updated = {m['cellId']: m['cell'] for m in broadcaster.get_messages_by_type('cell_updated')}
+        assert set(updated) == {'c1', 'c2', 'c3'}
+        assert updated['c2']['reads'] == ['x']
+        assert updated['c2']['writes'] == ['y']
+        assert updated['c3']['reads'] == ['y']
+    finally:
+        await coord.shutdown()
 
 
 @pytest.mark.asyncio
@@ -255,6 +293,52 @@ async def test_cascade_execution_order(coordinator):
     assert execution_starts['c2'] < execution_starts['c3']
 
 
+@pytest.mark.asyncio
+async def test_cascade_notifications_are_batched(coordinator):
+    """A cascade's notifications reach clients in far fewer frames than messages."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    # running/success/metadata for each of the three cells
+    assert len(broadcaster.get_messages_by_type('cell_status')) == 6
+    assert len(broadcaster.get_messages_by_type('cell_updated')) == 3
+
+    # Flushed at each cell start and at the end of the cascade
+    assert broadcaster.frames <= 4, f"{broadcaster.frames} frames for {len(broadcaster.messages)} messages"
+
+
+@pytest.mark.asyncio
+async def test_large_table_output_is_paged(coordinator):
+    """Only the first page of a big table is sent; more rows arrive on request."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c1', 'import pandas as pd\npd.DataFrame({"n": range(1200)})')
+    await asyncio.sleep(0.5)
+    broadcaster.clear()
+
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(1.5)
+
+    outputs = [m for m in broadcaster.get_messages_by_type('cell_output') if m['cellId'] == 'c1']
+    assert len(outputs) == 1
+    table = outputs[0]['output']['data']
+    assert table['total_rows'] == 1200
+    assert len(table['rows']) < 1200
+    assert table['rows'][0] == [0]
+
+    first_page = len(table['rows'])
+    await coord.handle_fetch_rows('c1', first_page, 100)
+    await asyncio.sleep(0.3)
+
+    pages = broadcaster.get_messages_by_type('cell_table_page')
+    assert len(pages) == 1
+    assert pages[0]['offset'] == first_page
+    assert pages[0]['totalRows'] == 1200
+    assert pages[0]['rows'] == [[n] for n in range(first_page, first_page + 100)]
+
+
 @pytest.mark.asyncio
 async def test_independent_cells_no_cascade(coordinator):
     """Test that running an independent cell doesn't trigger others."""
@@ -354,26 +438,42 @@ async def test_handlers_are_non_blocking(coordinator):
 
 @pytest.mark.asyncio
 async def test_multiple_rapid_cell_updates(coordinator):
-    """Test that rapid cell updates are all processed correctly."""
+    """Test that rapid cell updates are coalesced into one registration of the last code."""
     coord, broadcaster = coordinator
 
     # Send 5 rapid updates
     for i in range(5):
-        await coord.handle_cell_update('c1', f'x = {i}')
+        await coord.handle_cell_update('c1', f'x{i} = {i}')
 
     # Wait for all to process
     await asyncio.sleep(0.5)
 
     # Final code should be last update
     cell = next(c for c in coord.notebook.cells if c.id == 'c1')
-    assert cell.code == 'x = 4'
+    assert cell.code == 'x4 = 4'
+    reloaded = NotebookFileStorage.parse_notebook('test-commands')
+    assert next(c for c in reloaded.cells if c.id == 'c1').code.strip() == 'x4 = 4'
 
-    # Should have multiple cell_updated messages
+    # The kernel only saw the last version
     updated_msgs = [
         m for m in broadcaster.messages
         if m.get('type') == 'cell_updated' and m.get('cellId') == 'c1'
     ]
-    assert len(updated_msgs) >= 5
+    assert len(updated_msgs) == 1
+    assert updated_msgs[0]['cell']['writes'] == ['x4']
+
+
+@pytest.mark.asyncio
+async def test_run_cell_registers_pending_update(coordinator):
+    """Running a cell right after editing it runs the new code."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c1', 'x = 7\nprint(x)')
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.8)
+
+    stdout = ''.join(m['data'] for m in broadcaster.get_messages_by_type('cell_stdout') if m['cellId'] == 'c1')
+    assert stdout == '7\n'
 
 
 @pytest.mark.asyncio
@@ -440,3 +540,130 @@ async def test_sql_cell_update_broadcasts_metadata(coordinator):
         if m.get('type') == 'cell_updated' and m.get('cellId') == 'c3'
     ]
     assert len(updated_msgs) >= 1
+
+
+@pytest.mark.asyncio
+async def test_sql_result_binding_registers_write(coordinator):
+    """A `-- as name` SQL cell writes that name, so Python readers depend on it."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_create_cell('sql')
+    await asyncio.sleep(0.1)
+    sql_cell_id = broadcaster.get_messages_by_type('cell_created')[0]['cellId']
+
+    await coord.handle_cell_update(sql_cell_id, "-- as df_users\nSELECT * FROM users WHERE id = {x}")
+    await asyncio.sleep(0.3)
+
+    updated = [
+        m for m in broadcaster.get_messages_by_type('cell_updated')
+        if m['cellId'] == sql_cell_id
+    ]
+    assert updated[-1]['cell']['reads'] == ['x']
+    assert updated[-1]['cell']['writes'] == ['df_users']
+
+
+
+@pytest.mark.asyncio
+async def test_interrupt_long_running_cell(coordinator):
+    """Interrupting stops the running cell and blocks the rest, without restarting the kernel."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c2', 'y = x * 2\nwhile True:\n    pass')
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.5)
+    pid = coord.kernel.process.pid
+
+    await coord.handle_interrupt()
+    await asyncio.sleep(0.5)
+
+    statuses = {m['cellId']: m['status'] for m in broadcaster.get_messages_by_type('cell_status')}
+    assert statuses['c2'] == 'error'
+    assert statuses['c3'] == 'blocked'
+    errors = [m for m in broadcaster.get_messages_by_type('cell_error') if m['cellId'] == 'c2']
+    assert 'KeyboardInterrupt' in errors[0]['error']
+
+    # Same kernel, namespace intact
+    broadcaster.clear()
+    await coord.handle_cell_update('c2', 'y = x * 2')
+    await coord.handle_run_cell('c2')
+    await asyncio.sleep(0.5)
+    assert coord.kernel.process.pid == pid
+    statuses = {m['cellId']: m['status'] for m in broadcaster.get_messages_by_type('cell_status')}
+    assert statuses == {'c2': 'success', 'c3': 'success'}
+
+
+@pytest.mark.asyncio
+async def test_interrupt_blocking_call(coordinator):
+    """A cell blocked in a C call (time.sleep) is interrupted without waiting for it to return."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c2', 'import time\ntime.sleep(8)\ny = x * 2')
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.5)
+
+    start = time.monotonic()
+    await coord.handle_interrupt()
+    while not broadcaster.get_messages_by_type('cell_error') and time.monotonic() - start < 5:
+        await asyncio.sleep(0.05)
+
+    assert time.monotonic() - start < 2
+    errors = [m for m in broadcaster.get_messages_by_type('cell_error') if m['cellId'] == 'c2']
+    assert 'KeyboardInterrupt' in errors[0]['error']
+
+
+@pytest.mark.asyncio
+async def test_kernel_responsive_during_long_run(coordinator):
+    """Heartbeats and registrations are answered while a cell is still running."""
+    coord, broadcaster = coordinator
+
+    await coord.handle_cell_update('c2', 'y = x * 2\nwhile True:\n    pass')
+    await coord.handle_run_cell('c1')
+    await asyncio.sleep(0.5)
+
+    heartbeat = await coord.heartbeat(timeout=1)
+    assert heartbeat is not None and heartbeat.running == ['c2']
+
+    broadcaster.clear()
+    await coord.handle_cell_update('c3', 'z = w + 5')
+    await asyncio.sleep(0.4)
+    updated = [m for m in broadcaster.get_messages_by_type('cell_updated') if m['cellId'] == 'c3']
+    assert updated and updated[-1]['cell']['reads'] == ['w']
+
+    await coord.handle_interrupt()
+    await asyncio.sleep(0.3)
+    heartbeat = await coord.heartbeat(timeout=1)
+    assert heartbeat.running == [] and heartbeat.queued == 0
+
+
+class RecordingWebSocket:
+    """Captures messages sent to one client connection."""
+
+    def __init__(self):
+        self.sent: list[dict] = []
+
+    async def send_json(self, message: dict):
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_and_variable_lookup_messages(coordinator):
+    """Both are answered to the asking connection over the control channel, even mid-run."""
+    coord, broadcaster = coordinator
+    websocket = RecordingWebSocket()
+    manager.active_connections['conn-1'] = websocket
+
+    try:
+        await coord.handle_cell_update('c2', 'y = x * 2\nwhile True:\n    pass')
+        await coord.handle_run_cell('c1')
+        await asyncio.sleep(0.5)
+
+        await handle_message('conn-1', coord, {'type': 'heartbeat'})
+        await handle_message('conn-1', coord, {'type': 'variable_lookup', 'variable': 'y'})
+        await coord.handle_interrupt()
+    finally:
+        manager.active_connections.pop('conn-1', None)
+
+    assert websocket.sent == [
+        {'type': 'heartbeat', 'alive': True, 'running': ['c2'], 'queued': 0},
+        {'type': 'variable_lookup', 'variable': 'y', 'readers': ['c3'], 'writers': ['c2']},
+    ]
@@ -29,8 +29,11 @@ class MockBroadcaster:
         self.messages: list[dict] = []
 
     async def broadcast(self, message: dict):
-        """Capture broadcasted message."""
-        self.messages.append(message)
+        """Capture broadcasted message (batch frames are unpacked)."""
+        if message.get('type') == 'batch':
+            self.messages.extend(message['messages'])
+        else:
+            self.messages.append(message)
 
     def get_messages_by_type(self, msg_type: str) -> list[dict]:
         """Get all messages of a specific type."""
@@ -76,7 +79,7 @@ def coordinator(event_loop):
     yield coord, broadcaster
 
     # Cleanup
-    coord.shutdown()
+    event_loop.run_until_complete(coord.shutdown())
 
 
 @pytest.mark.asyncio
@@ -311,4 +314,4 @@ async def test_crud_with_empty_notebook(coordinator):
     assert len(coord.notebook.cells) == 1
 
     # Cleanup
-    coord.shutdown()
+    await coord.shutdown()
@@ -34,7 +34,7 @@ import type {
 
 // Define types from inline unions
 export type CellType = 'python' | 'sql';
-export type CellStatus = 'idle' | 'running' | 'success' | 'error' | 'blocked';
+export type CellStatus = 'idle' | 'running' | 'success' | 'error' | 'blocked' | 'skipped';
 
 // Re-export with convenient aliases
 export type Cell = CellResponse;
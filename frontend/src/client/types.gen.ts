@@ -19,7 +19,7 @@ export type CellResponse = {
     /**
      * Status
      */
-    status?: 'idle' | 'running' | 'success' | 'error' | 'blocked';
+    status?: 'idle' | 'running' | 'success' | 'error' | 'blocked' | 'skipped';
     /**
      * Stdout
      */
@@ -184,6 +184,10 @@ export type TableData = {
      * Truncated
      */
     truncated?: string | null;
+    /**
+     * Total Rows
+     */
+    total_rows?: number | null;
 };
 
 /**
@@ -5,10 +5,10 @@ import { KeyboardShortcutsDialog } from "./KeyboardShortcutsDialog";
 import { Button } from "./ui/button";
 import { Input } from "./ui/input";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "./ui/select";
-import { Plus, Keyboard, FileText, Pencil, Trash2 } from "lucide-react";
+import { Plus, Keyboard, FileText, Pencil, Trash2, DatabaseZap, Square } from "lucide-react";
 import * as api from "../api-client";
 import { WSMessage, useNotebookWebSocket } from "../useNotebookWebSocket";
-import type { Cell, CellType, CellStatus, NotebookMetadata } from "../api-client";
+import type { Cell, CellType, CellStatus, NotebookMetadata, TableData } from "../api-client";
 
 export type { CellType, CellStatus };
 
@@ -16,6 +16,16 @@ export interface CellData extends Cell {
   // Extend Cell type from API with any additional frontend-only fields if needed
 }
 
+// Characters of streamed stdout/stderr kept per cell (matches the kernel's buffer)
+const MAX_STREAM_CHARS = 1024 * 1024;
+
+function appendStream(existing: string | null | undefined, chunk: string): string {
+  const combined = (existing || "") + chunk;
+  return combined.length > MAX_STREAM_CHARS
+    ? combined.slice(combined.length - MAX_STREAM_CHARS)
+    : combined;
+}
+
 export function NotebookApp() {
   const { notebookId: urlNotebookId } = useParams<{ notebookId?: string }>();
   const navigate = useNavigate();
@@ -152,10 +162,12 @@ export function NotebookApp() {
         );
         break;
       case "cell_stdout":
+      case "cell_stderr":
+        // Both streams are shown interleaved, in arrival order
         setCells((prev) =>
           prev.map((c) =>
             c.id === msg.cellId
-              ? { ...c, stdout: (c.stdout || "") + msg.data }
+              ? { ...c, stdout: appendStream(c.stdout, msg.data) }
               : c
           )
         );
@@ -167,6 +179,33 @@ export function NotebookApp() {
           )
         );
         break;
+      case "cell_table_page":
+        // Append a requested page to the cell's paged table (if it's the next one)
+        setCells((prev) =>
+          prev.map((c) => {
+            if (c.id !== msg.cellId || !c.outputs) return c;
+            return {
+              ...c,
+              outputs: c.outputs.map((output) => {
+                const table = output.data as TableData;
+                if (
+                  typeof output.data !== "object" ||
+                  output.data === null ||
+                  table.type !== "table" ||
+                  !Array.isArray(table.rows) ||
+                  table.rows.length !== msg.offset
+                ) {
+                  return output;
+                }
+                return {
+                  ...output,
+                  data: { ...table, rows: [...table.rows, ...msg.rows], total_rows: msg.totalRows },
+                };
+              }),
+            };
+          })
+        );
+        break;
       case "cell_error":
         setCells((prev) =>
           prev.map((c) =>
@@ -249,6 +288,10 @@ export function NotebookApp() {
     sendMessage({ type: 'run_cell', cellId: id });
   };
 
+  const fetchRows = (id: string, offset: number, limit: number) => {
+    sendMessage({ type: 'fetch_rows', cellId: id, offset, limit });
+  };
+
   const focusCell = useCallback((direction: "up" | "down") => {
     if (!focusedCellId) {
       setFocusedCellId(cells[0]?.id || null);
@@ -275,6 +318,16 @@ export function NotebookApp() {
     });
   };
 
+  const clearSqlCache = () => {
+    sendMessage({ type: 'clear_sql_cache' });
+  };
+
+  const interruptKernel = () => {
+    sendMessage({ type: 'interrupt' });
+  };
+
+  const anyCellRunning = cells.some((cell) => cell.status === "running");
+
   const handleCreateNotebook = async () => {
     try {
       const { notebook_id } = await api.createNotebook();
@@ -521,6 +574,25 @@ export function NotebookApp() {
               }}
               className="w-32 sm:w-40 md:w-48 lg:w-56 xl:w-64 2xl:w-80"
             />
+            <Button
+              variant="ghost"
+              size="icon"
+              onClick={clearSqlCache}
+              title="Clear cached SQL results"
+              className="shrink-0"
+            >
+              <DatabaseZap className="h-4 w-4" />
+            </Button>
+            <Button
+              variant="ghost"
+              size="icon"
+              onClick={interruptKernel}
+              disabled={!anyCellRunning}
+              title="Interrupt running cells"
+              className="shrink-0"
+            >
+              <Square className="h-4 w-4" />
+            </Button>
           </div>
         </header>
 
@@ -536,6 +608,7 @@ export function NotebookApp() {
                   cell={cell}
                   onUpdateCode={(code) => updateCellCode(cell.id, code)}
                   onRun={() => runCell(cell.id)}
+                  onFetchRows={(offset, limit) => fetchRows(cell.id, offset, limit)}
                   onDelete={() => deleteCell(cell.id)}
                   isFocused={focusedCellId === cell.id}
                   onFocus={() => setFocusedCellId(cell.id)}
@@ -2,7 +2,7 @@ import { useEffect, useRef, useState } from "react";
 import { Card } from "./ui/card";
 import { Button } from "./ui/button";
 import { Badge } from "./ui/badge";
-import { Play, Trash2, Loader2, CheckCircle2, XCircle, AlertCircle } from "lucide-react";
+import { Play, Trash2, Loader2, CheckCircle2, XCircle, AlertCircle, SkipForward } from "lucide-react";
 import type { CellData } from "./NotebookApp";
 import { OutputRenderer } from "./OutputRenderer";
 import Editor, { type Monaco } from "@monaco-editor/react";
@@ -12,6 +12,7 @@ interface NotebookCellProps {
   cell: CellData;
   onUpdateCode: (code: string) => Promise<void>;
   onRun: () => void;
+  onFetchRows: (offset: number, limit: number) => void;
   onDelete: () => void;
   isFocused: boolean;
   onFocus: () => void;
@@ -24,6 +25,7 @@ export function NotebookCell({
   cell, 
   onUpdateCode, 
   onRun, 
+  onFetchRows,
   onDelete, 
   isFocused, 
   onFocus,
@@ -207,6 +209,8 @@ export function NotebookCell({
     success: { icon: CheckCircle2, color: "bg-green-500", label: "Success" },
     error: { icon: XCircle, color: "bg-destructive", label: "Error" },
     blocked: { icon: AlertCircle, color: "bg-yellow-500", label: "Blocked" },
+    // Re-run skipped because nothing it reads changed; outputs are from the last run
+    skipped: { icon: SkipForward, color: "bg-muted", label: "Unchanged" },
   };
 
   const status = statusConfig[cell.status as keyof typeof statusConfig] || statusConfig.idle;
@@ -285,7 +289,7 @@ export function NotebookCell({
       {cell.outputs && cell.outputs.length > 0 && (
         <div className="bg-muted/30 p-4 space-y-2">
           {cell.outputs.map((output, idx) => (
-            <OutputRenderer key={idx} output={output} cellId={cell.id} outputIndex={idx} />
+            <OutputRenderer key={idx} output={output} cellId={cell.id} outputIndex={idx} onFetchRows={onFetchRows} />
           ))}
         </div>
       )}
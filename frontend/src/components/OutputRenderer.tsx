@@ -9,8 +9,12 @@ interface OutputRendererProps {
   output: Output;
   cellId?: string;
   outputIndex?: number;
+  onFetchRows?: (offset: number, limit: number) => void;
 }
 
+// Rows requested per "Load more" click
+const TABLE_FETCH_SIZE = 500;
+
 // PlotlySpec interface - must be defined before the type guard
 interface PlotlySpec {
   data: Data[];
@@ -40,7 +44,7 @@ function isPlotlySpec(data: unknown): data is PlotlySpec {
   );
 }
 
-export function OutputRenderer({ output, cellId, outputIndex }: OutputRendererProps) {
+export function OutputRenderer({ output, cellId, outputIndex, onFetchRows }: OutputRendererProps) {
   switch (output.mime_type) {
     case 'image/png':
       if (typeof output.data !== 'string') {
@@ -107,6 +111,7 @@ export function OutputRenderer({ output, cellId, outputIndex }: OutputRendererPr
                 ))}
               </tbody>
             </table>
+            <TableFooter data={output.data} onFetchRows={onFetchRows} />
           </div>
         );
       }
@@ -131,6 +136,38 @@ export function OutputRenderer({ output, cellId, outputIndex }: OutputRendererPr
   }
 }
 
+interface TableFooterProps {
+  data: TableData;
+  onFetchRows?: (offset: number, limit: number) => void;
+}
+
+// Row count, "Load more" for paged tables, and the truncation notice
+function TableFooter({ data, onFetchRows }: TableFooterProps) {
+  const loaded = data.rows.length;
+  const total = data.total_rows ?? loaded;
+  if (loaded >= total && !data.truncated) {
+    return null;
+  }
+
+  return (
+    <div className="flex-row-between px-3 py-2">
+      <span className="text-helper">
+        Showing {loaded.toLocaleString()} of {total.toLocaleString()} rows
+        {data.truncated ? ` (${data.truncated})` : ""}
+      </span>
+      {loaded < total && onFetchRows && (
+        <button
+          type="button"
+          className="text-helper underline"
+          onClick={() => onFetchRows(loaded, TABLE_FETCH_SIZE)}
+        >
+          Load more
+        </button>
+      )}
+    </div>
+  );
+}
+
 interface VegaLiteRendererProps {
   spec: VisualizationSpec;
 }
@@ -18,8 +18,16 @@ export type WSMessage =
   | { type: "cell_deleted"; cellId: string }
   | { type: "cell_status"; cellId: string; status: CellStatus }
   | { type: "cell_stdout"; cellId: string; data: string }
+  | { type: "cell_stderr"; cellId: string; data: string }
   | { type: "cell_error"; cellId: string; error: string }
   | { type: "cell_output"; cellId: string; output: OutputResponse }
+  | {
+      type: "cell_table_page";
+      cellId: string;
+      offset: number;
+      rows: Array<Array<string | number | boolean | null>>;
+      totalRows: number;
+    }
   | {
       type: "db_connection_updated";
       connectionString: string;
@@ -31,6 +39,21 @@ export type WSMessage =
       error: string;
     };
 
+// Several messages coalesced by the backend into one frame
+export interface WSBatchMessage {
+  type: "batch";
+  messages: unknown[];
+}
+
+function isWSBatchMessage(msg: unknown): msg is WSBatchMessage {
+  return (
+    typeof msg === "object" &&
+    msg !== null &&
+    (msg as { type?: unknown }).type === "batch" &&
+    Array.isArray((msg as { messages?: unknown }).messages)
+  );
+}
+
 // Keep existing type guards for compatibility
 export function isWSMessage(msg: unknown): msg is WSMessage {
   if (typeof msg !== "object" || msg === null || !("type" in msg)) {
@@ -94,6 +117,19 @@ export function useNotebookWebSocket(
             return;
           }
 
+          // Unpack batches in order; React batches the resulting state
+          // updates into a single render
+          if (isWSBatchMessage(data)) {
+            for (const message of data.messages) {
+              if (isWSMessage(message)) {
+                options.onMessage(message);
+              } else {
+                console.error("Invalid WebSocket message structure:", message);
+              }
+            }
+            return;
+          }
+
           // Validate and forward to consumer
           if (isWSMessage(data)) {
             options.onMessage(data);